@@ -0,0 +1,92 @@
+"""Уведомления об изменениях таблицы deposits (LISTEN/NOTIFY)
+
+Revision ID: 0001_deposit_change_notify
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_deposit_change_notify"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL зафиксирован здесь, а не импортируется из backend.app.db.notify:
+# миграция должна применяться одинаково и после изменений кода приложения
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS deposits_notify_insert ON deposits",
+    "DROP TRIGGER IF EXISTS deposits_notify_update ON deposits",
+    "DROP TRIGGER IF EXISTS deposits_notify_delete ON deposits",
+    "DROP TRIGGER IF EXISTS deposits_notify_truncate ON deposits",
+]
+
+TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION notify_deposit_changes() RETURNS trigger AS $$
+    DECLARE
+        ids text;
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            ids := '*';
+        ELSIF TG_OP = 'INSERT' THEN
+            SELECT string_agg(id::text, ',') INTO ids FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT string_agg(id::text, ',') INTO ids FROM old_rows;
+        ELSE
+            SELECT string_agg(id::text, ',') INTO ids FROM (
+                SELECT id FROM new_rows UNION SELECT id FROM old_rows
+            ) AS changed;
+        END IF;
+        IF ids IS NULL THEN
+            RETURN NULL;
+        END IF;
+        IF length(ids) > 7900 THEN
+            ids := '*';
+        END IF;
+        PERFORM pg_notify('deposit_changes', ids);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *DROP_TRIGGERS,
+    """
+    CREATE TRIGGER deposits_notify_insert AFTER INSERT ON deposits
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_update AFTER UPDATE ON deposits
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_delete AFTER DELETE ON deposits
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_truncate AFTER TRUNCATE ON deposits
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+]
+
+DROP_TRIGGER_DDL = [
+    *DROP_TRIGGERS,
+    "DROP FUNCTION IF EXISTS notify_deposit_changes()",
+]
+
+
+def upgrade() -> None:
+    """Триггеры deposits_notify_* для инкрементальной синхронизации каталога"""
+    for statement in TRIGGER_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Удаляет триггеры и функцию уведомлений"""
+    for statement in DROP_TRIGGER_DDL:
+        op.execute(statement)
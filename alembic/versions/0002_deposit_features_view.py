@@ -0,0 +1,95 @@
+"""Материализованное представление deposit_features с признаками каталога
+
+Revision ID: 0002_deposit_features_view
+Revises: 0001_deposit_change_notify
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_deposit_features_view"
+down_revision: Union[str, None] = "0001_deposit_change_notify"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL зафиксирован здесь, а не импортируется из backend.app.db.features:
+# миграция должна применяться одинаково и после изменений кода приложения
+VIEW_DDL = [
+    r"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS deposit_features AS
+    WITH cleaned AS (
+        SELECT
+            id,
+            regexp_replace(
+                replace(name, U&'\00A0', ' '), '^\s+|\s+$', '', 'g'
+            ) AS name,
+            rate, term_months, can_replenish, min_amount, currency, payout_mode
+        FROM deposits
+    ),
+    medians AS (
+        SELECT name, percentile_cont(0.5) WITHIN GROUP (ORDER BY rate) AS rate
+        FROM cleaned
+        GROUP BY name
+    ),
+    term_mode AS (
+        SELECT mode() WITHIN GROUP (ORDER BY term_months) AS term_months
+        FROM cleaned
+    ),
+    filled AS (
+        SELECT
+            c.id,
+            c.name,
+            coalesce(c.rate, m.rate) AS rate,
+            coalesce(c.term_months, t.term_months) AS term_months,
+            c.can_replenish,
+            c.min_amount,
+            c.currency,
+            c.payout_mode
+        FROM cleaned AS c
+        LEFT JOIN medians AS m ON m.name = c.name
+        CROSS JOIN term_mode AS t
+        WHERE c.currency IS NOT NULL AND c.min_amount IS NOT NULL
+    )
+    SELECT
+        id,
+        name,
+        rate::double precision AS rate,
+        term_months::bigint AS term_months,
+        can_replenish::int AS can_replenish,
+        trunc(min_amount)::bigint AS min_amount,
+        (currency = 'RUB') AS "currency_RUB",
+        (currency = 'USD') AS "currency_USD",
+        (payout_mode = 'monthly') AS "payout_mode_monthly",
+        CASE
+            WHEN term_months <= 0 THEN NULL
+            WHEN term_months <= 6 THEN 3
+            WHEN term_months <= 12 THEN 2
+            WHEN term_months <= 24 THEN 1
+            ELSE 0
+        END AS risk_level,
+        (term_months >= 12)::int AS goal_accumulation
+    FROM filled
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS deposit_features_id ON deposit_features (id)",
+    """
+    CREATE INDEX IF NOT EXISTS deposit_features_filter
+    ON deposit_features (term_months, min_amount, can_replenish)
+    """,
+]
+
+DROP_VIEW_DDL = ["DROP MATERIALIZED VIEW IF EXISTS deposit_features"]
+
+
+def upgrade() -> None:
+    """Представление с этапами data_prep и индексы для фильтра подбора"""
+    for statement in VIEW_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Удаляет представление вместе с индексами"""
+    for statement in DROP_VIEW_DDL:
+        op.execute(statement)
@@ -0,0 +1,68 @@
+"""Индексы для /deposits и счётчик версии каталога для ETag
+
+Revision ID: 0003_deposits_browse
+Revises: 0002_deposit_features_view
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_deposits_browse"
+down_revision: Union[str, None] = "0002_deposit_features_view"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL зафиксирован здесь, а не импортируется из backend.app.db.catalog_version:
+# миграция должна применяться одинаково и после изменений кода приложения
+TRIGGER_DDL = [
+    "INSERT INTO deposit_catalog_version (id, version) VALUES (1, 0) "
+    "ON CONFLICT (id) DO NOTHING",
+    """
+    CREATE OR REPLACE FUNCTION bump_deposit_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE deposit_catalog_version SET version = version + 1 WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS deposits_bump_version ON deposits",
+    """
+    CREATE TRIGGER deposits_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON deposits
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_deposit_catalog_version()
+    """,
+]
+
+DROP_TRIGGER_DDL = [
+    "DROP TRIGGER IF EXISTS deposits_bump_version ON deposits",
+    "DROP FUNCTION IF EXISTS bump_deposit_catalog_version()",
+]
+
+
+def upgrade() -> None:
+    """Индексы (rate, id) и (currency, rate, id), таблица счётчика и триггер"""
+    op.create_index("ix_deposits_rate_id", "deposits", ["rate", "id"])
+    op.create_index(
+        "ix_deposits_currency_rate_id", "deposits", ["currency", "rate", "id"]
+    )
+    op.create_table(
+        "deposit_catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.CheckConstraint("id = 1", name="ck_single_row"),
+    )
+    for statement in TRIGGER_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Удаляет триггер, таблицу счётчика и индексы"""
+    for statement in DROP_TRIGGER_DDL:
+        op.execute(statement)
+    op.drop_table("deposit_catalog_version")
+    op.drop_index("ix_deposits_currency_rate_id", table_name="deposits")
+    op.drop_index("ix_deposits_rate_id", table_name="deposits")
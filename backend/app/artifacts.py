@@ -0,0 +1,10 @@
+"""Расширения бинарных артефактов модели и каталога.
+
+Отдельный модуль без numpy/pandas: пути к артефактам нужны уже при
+импорте сервера, а сами форматы — только при загрузке снимка.
+"""
+
+# Каталог в колоночном формате (директория с .npy по колонкам)
+COLUMNAR_SUFFIX = ".npcat"
+# Упакованный случайный лес (директория с .npy-массивами узлов)
+FOREST_SUFFIX = ".npforest"
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.ranking import preference_key
+
+
+class CandidateIndex:
+    """
+    Индекс каталога вкладов для отбора кандидатов в /recommend.
+
+    Строится один раз при загрузке данных: строки раскладываются по корзинам
+    (can_replenish, term_months), внутри каждой корзины позиции отсортированы
+    по min_amount. Запрос сводится к бинарному поиску по сроку и сумме и
+    нарезке готовых массивов вместо булевых масок по всему DataFrame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        term = df["term_months"].to_numpy()
+        replenish = df["can_replenish"].to_numpy()
+        amount = df["min_amount"].to_numpy()
+
+        # Отсортированные уникальные сроки — общая ось для всех корзин
+        self.terms = np.unique(term)
+        # Уникальные пороги суммы — точки, где меняется результат query
+        self.amounts = np.unique(amount)
+
+        # Для каждого значения can_replenish: позиции, отсортированные по
+        # (term_months, min_amount), их min_amount и границы сроков
+        self._arrays = {}
+        for flag in pd.unique(replenish):
+            rows = np.flatnonzero(replenish == flag)
+            rows = rows[np.lexsort((amount[rows], term[rows]))]
+            bounds = np.searchsorted(term[rows], self.terms, side="left")
+            self._arrays[int(flag)] = (rows, amount[rows], np.append(bounds, len(rows)))
+        self._slice_buckets()
+
+    def _slice_buckets(self):
+        # replenish -> список (отсортированные min_amount, позиции) по срокам;
+        # корзины — срезы общих массивов, без копирования
+        self._buckets = {
+            flag: [
+                (amounts[lo:hi], rows[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            for flag, (rows, amounts, bounds) in self._arrays.items()
+        }
+
+    def arrays(self) -> dict:
+        """Массивы индекса для сохранения (см. from_arrays)"""
+        arrays = {
+            "size": np.array(self.size),
+            "terms": self.terms,
+            "amounts": self.amounts,
+        }
+        for flag, (rows, amounts, bounds) in self._arrays.items():
+            arrays[f"rows_{flag}"] = rows
+            arrays[f"amount_{flag}"] = amounts
+            arrays[f"bounds_{flag}"] = bounds
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "CandidateIndex":
+        """
+        Восстанавливает индекс из массивов arrays() без пересортировки —
+        например, из отображённых в память файлов общего снимка.
+        """
+        index = cls.__new__(cls)
+        index.size = int(arrays["size"])
+        index.terms = arrays["terms"]
+        index.amounts = arrays["amounts"]
+        index._arrays = {
+            int(key[len("rows_") :]): (
+                arrays[key],
+                arrays[key.replace("rows_", "amount_")],
+                arrays[key.replace("rows_", "bounds_")],
+            )
+            for key in arrays
+            if key.startswith("rows_")
+        }
+        index._slice_buckets()
+        return index
+
+    def profile_key(
+        self,
+        amount: float,
+        term_months: int,
+        can_replenish: str = "any",
+        risk_tolerance: str | None = None,
+        goal: str | None = None,
+    ) -> tuple:
+        """
+        Нормализует профиль к границам каталога: сумма округляется вниз
+        до ближайшего min_amount, срок — до ближайшего term_months,
+        склонность к риску и цель — до кодов preference_key.
+
+        Профили с одинаковым ключом получают одинаковую выдачу.
+        Если сумма или срок меньше любых в каталоге, вместо границы — None.
+        """
+        k = int(np.searchsorted(self.amounts, amount, side="right"))
+        n_terms = int(np.searchsorted(self.terms, term_months, side="right"))
+        return (
+            self.amounts[k - 1].item() if k else None,
+            self.terms[n_terms - 1].item() if n_terms else None,
+            can_replenish if can_replenish in ("yes", "no") else "any",
+            *preference_key(risk_tolerance, goal),
+        )
+
+    def _flags(self, can_replenish: str) -> list:
+        if can_replenish == "yes":
+            return [f for f in self._buckets if f == 1]
+        if can_replenish == "no":
+            return [f for f in self._buckets if f == 0]
+        return list(self._buckets)
+
+    def count(self, amount: float, term_months: int, can_replenish: str = "any") -> int:
+        """Число строк, которые вернул бы query, без сборки самих позиций"""
+        n_terms = int(np.searchsorted(self.terms, term_months, side="right"))
+        return sum(
+            int(np.searchsorted(amounts, amount, side="right"))
+            for flag in self._flags(can_replenish)
+            for amounts, _ in self._buckets[flag][:n_terms]
+        )
+
+    def query(self, amount: float, term_months: int, can_replenish: str = "any"):
+        """
+        Возвращает позиции строк (в порядке исходного DataFrame), для которых
+        min_amount <= amount, term_months <= term_months и выполнен фильтр
+        по возможности пополнения ("yes" / "no" / "any").
+        """
+        flags = self._flags(can_replenish)
+        n_terms = int(np.searchsorted(self.terms, term_months, side="right"))
+        parts = []
+        for flag in flags:
+            for amounts, positions in self._buckets[flag][:n_terms]:
+                k = int(np.searchsorted(amounts, amount, side="right"))
+                if k:
+                    parts.append(positions[:k])
+
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
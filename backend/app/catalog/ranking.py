@@ -0,0 +1,280 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.income import IncomeEngine, currency_codes
+
+# Наибольший risk_level (см. add_features в scripts/data_prep.py),
+# который клиент с данной склонностью к риску принимает без оговорок
+RISK_TOLERANCE = {"low": 1, "medium": 2, "high": 3}
+# Значение goal_accumulation, соответствующее цели клиента
+GOALS = {"accumulation": 1, "passive_income": 0}
+# Код «без предпочтения по цели»
+ANY_GOAL = 2
+MAX_RISK = max(RISK_TOLERANCE.values())
+# Порядок выдачи внутри уровня предпочтения: по ставке или по доходу
+SORT_ORDERS = ("rate", "income")
+
+# Массивы индекса, которые можно сохранить и отобразить в память
+RANKING_ARRAYS = (
+    "positions",
+    "rate",
+    "probability",
+    "amount",
+    "term",
+    "passed",
+    "payout",
+    "replenish",
+    "currency",
+    "keys",
+    "bounds",
+)
+
+
+def preference_key(risk_tolerance: str | None, goal: str | None) -> tuple:
+    """
+    Нормализует предпочтения клиента: (наибольший приемлемый risk_level,
+    goal_accumulation или ANY_GOAL). Неизвестные значения означают
+    отсутствие предпочтения.
+    """
+    return (
+        RISK_TOLERANCE.get(risk_tolerance, MAX_RISK),
+        GOALS.get(goal, ANY_GOAL),
+    )
+
+
+def preference_tier(risk, goal_flag, max_risk: int, goal: int):
+    """
+    Уровень предпочтения вклада (0 — лучший): сначала вклады в пределах
+    склонности к риску, среди них — подходящие под цель клиента.
+    """
+    over_risk = np.asarray(risk) > max_risk
+    other_goal = (np.asarray(goal_flag) != goal) & (goal != ANY_GOAL)
+    return over_risk * 2 + other_goal
+
+
+def rank_order(rate, probability) -> np.ndarray:
+    """
+    Базовый порядок выдачи: по убыванию ставки, при равной ставке —
+    по убыванию вероятности, дальше — по позиции в каталоге.
+    """
+    return np.lexsort((-np.asarray(probability), -np.asarray(rate)))
+
+
+class RankingIndex:
+    """
+    Индекс для выдачи топ-k рекомендаций в /recommend.
+
+    Каталог разбит на партиции по (risk_level, goal_accumulation,
+    can_replenish), внутри каждой строки заранее упорядочены по ставке
+    (rank_order) и лежат одним непрерывным отрезком общих массивов.
+    Запрос обходит партиции в порядке предпочтения клиента, в каждой
+    берёт первые k подходящих по сумме, сроку и порогу вероятности строк
+    и сливает их по ставке — без фильтрации и сортировки всего каталога.
+
+    С sort_by="income" внутри уровня вклады упорядочиваются по доходу
+    на сумму клиента (IncomeEngine). Доход не убывает со ставкой, поэтому
+    партиция просматривается по убыванию ставки, пока верхняя оценка
+    дохода следующей строки не станет меньше k-го найденного дохода.
+    """
+
+    def __init__(self, catalog: pd.DataFrame, threshold: float):
+        rate = catalog["rate"].to_numpy()
+        probability = catalog["probability"].to_numpy()
+        risk = catalog["risk_level"].to_numpy()
+        goal = catalog["goal_accumulation"].to_numpy()
+        replenish = catalog["can_replenish"].to_numpy()
+
+        base = rank_order(rate, probability)
+        # Стабильная сортировка по ключу партиции сохраняет порядок по ставке
+        order = base[np.lexsort((replenish[base], goal[base], risk[base]))]
+        self.positions = order
+        self.rate = rate[order]
+        self.probability = probability[order]
+        self.amount = catalog["min_amount"].to_numpy()[order]
+        self.term = catalog["term_months"].to_numpy()[order]
+        self.passed = self.probability >= threshold
+        self.payout = catalog["payout_mode_monthly"].to_numpy().astype(bool)[order]
+        self.replenish = replenish.astype(bool)[order]
+        self.currency = currency_codes(
+            catalog["currency_RUB"].to_numpy(), catalog["currency_USD"].to_numpy()
+        )[order]
+
+        # Ключи партиций (risk_level, goal_accumulation, can_replenish)
+        # и границы их отрезков
+        keys = np.column_stack([risk[order], goal[order], replenish[order]])
+        starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate([[0], starts]) if len(order) else starts
+        self.keys = keys[starts]
+        self.bounds = np.append(starts, len(order))
+
+    def arrays(self) -> dict:
+        """Массивы индекса для сохранения (см. from_arrays)"""
+        return {name: getattr(self, name) for name in RANKING_ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> "RankingIndex":
+        """
+        Восстанавливает индекс из массивов arrays() без пересортировки.
+        KeyError, если каких-то массивов нет (сохранены старой версией).
+        """
+        index = cls.__new__(cls)
+        for name in RANKING_ARRAYS:
+            setattr(index, name, arrays[name])
+        return index
+
+    @cached_property
+    def income(self) -> IncomeEngine:
+        """Расчёт дохода по строкам индекса (без копирования массивов)"""
+        return IncomeEngine(
+            self.rate, self.term, self.payout, self.replenish, self.currency
+        )
+
+    def top(
+        self,
+        amount: float,
+        term_months: int,
+        can_replenish: str = "any",
+        risk_tolerance: str | None = None,
+        goal: str | None = None,
+        k: int = 11,
+        require_passed: bool = True,
+        sort_by: str = "rate",
+        monthly_topup: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Позиции (в исходном каталоге) первых k вкладов с min_amount <= amount,
+        term_months <= term_months и подходящим пополнением, упорядоченных
+        по уровню предпочтения, затем по ставке (sort_by="rate") или по доходу
+        на amount с ежемесячным взносом monthly_topup (sort_by="income").
+        С require_passed берутся только вклады с вероятностью не ниже порога.
+        """
+        preference = preference_key(risk_tolerance, goal)
+        return self.select(
+            amount,
+            term_months,
+            can_replenish,
+            preference,
+            k,
+            require_passed,
+            sort_by,
+            monthly_topup,
+        )
+
+    def select(
+        self,
+        amount: float,
+        term_months: float,
+        can_replenish: str,
+        preference: tuple,
+        k: int,
+        require_passed: bool = True,
+        sort_by: str = "rate",
+        monthly_topup: float = 0.0,
+    ) -> np.ndarray:
+        """То же, что top, но с уже нормализованными предпочтениями"""
+        partitions = np.arange(len(self.keys))
+        if can_replenish == "yes":
+            partitions = partitions[self.keys[:, 2] == 1]
+        elif can_replenish == "no":
+            partitions = partitions[self.keys[:, 2] == 0]
+        tiers = preference_tier(
+            self.keys[partitions, 0], self.keys[partitions, 1], *preference
+        )
+
+        engine = self.income if sort_by == "income" else None
+
+        picked = []
+        count = 0
+        query = (amount, term_months, k, require_passed)
+        for tier in np.unique(tiers):
+            if engine is None:
+                rows = [self._first(p, *query) for p in partitions[tiers == tier]]
+            else:
+                rows = [
+                    self._best_income(engine, p, *query, monthly_topup)
+                    for p in partitions[tiers == tier]
+                ]
+            rows = np.concatenate(rows)
+            # Слияние партиций уровня по тем же ключам, что и rank_order
+            order = [self.positions[rows], -self.probability[rows], -self.rate[rows]]
+            if engine is not None:
+                income = engine.project(amount, term_months, monthly_topup, rows)
+                order.append(-income)
+            rows = rows[np.lexsort(order)]
+            picked.append(rows[: k - count])
+            count += len(picked[-1])
+            if count >= k:
+                break
+        if not picked:
+            return np.empty(0, dtype=np.intp)
+        return self.positions[np.concatenate(picked)]
+
+    def _first(
+        self, partition: int, amount: float, term_months: int, k: int, require_passed
+    ) -> np.ndarray:
+        """
+        Первые k подходящих строк партиции. Партиция просматривается
+        блоками растущего размера, чтобы при частых совпадениях не
+        проверять её целиком.
+        """
+        lo, hi = int(self.bounds[partition]), int(self.bounds[partition + 1])
+        found = []
+        count = 0
+        step = max(64, 4 * k)
+        while lo < hi and count < k:
+            stop = min(hi, lo + step)
+            ok = (self.amount[lo:stop] <= amount) & (self.term[lo:stop] <= term_months)
+            if require_passed:
+                ok &= self.passed[lo:stop]
+            rows = np.flatnonzero(ok)[: k - count] + lo
+            found.append(rows)
+            count += len(rows)
+            lo = stop
+            step *= 4
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+    def _best_income(
+        self,
+        engine: IncomeEngine,
+        partition: int,
+        amount: float,
+        term_months: int,
+        k: int,
+        require_passed,
+        monthly_topup: float,
+    ) -> np.ndarray:
+        """
+        k строк партиции с наибольшим доходом (при равном доходе — в порядке
+        rank_order). Строки идут по убыванию ставки, и просмотр
+        останавливается, когда верхняя оценка дохода по ставке следующей
+        строки меньше k-го лучшего дохода.
+        """
+        lo, hi = int(self.bounds[partition]), int(self.bounds[partition + 1])
+        best = np.empty(0, dtype=np.intp)
+        income = np.empty(0)
+        step = max(64, 4 * k)
+        while lo < hi:
+            stop = min(hi, lo + step)
+            ok = (self.amount[lo:stop] <= amount) & (self.term[lo:stop] <= term_months)
+            if require_passed:
+                ok &= self.passed[lo:stop]
+            rows = np.flatnonzero(ok) + lo
+            best = np.concatenate([best, rows])
+            income = np.concatenate(
+                [income, engine.project(amount, term_months, monthly_topup, rows)]
+            )
+            # Строки уже в порядке rank_order, стабильная сортировка его сохраняет
+            keep = np.argsort(-income, kind="stable")[:k]
+            keep.sort()
+            best, income = best[keep], income[keep]
+            lo = stop
+            step *= 4
+            if len(best) == k and lo < hi:
+                bound = engine.upper_bound(
+                    self.rate[lo], amount, term_months, monthly_topup
+                )
+                if bound < income.min():
+                    break
+        return best
@@ -0,0 +1,70 @@
+import pandas as pd
+
+# Признаки, которые ожидает модель (в правильном порядке)
+FEATURES = [
+    "id",
+    "rate",
+    "term_months",
+    "can_replenish",
+    "min_amount",
+    "currency_RUB",
+    "currency_USD",
+    "payout_mode_monthly",
+    "risk_level",
+    "goal_accumulation",
+]
+
+
+def ensure_id(df: pd.DataFrame) -> pd.DataFrame:
+    """Обеспечивает наличие колонки 'id' для модели"""
+    if "id" not in df.columns:
+        df = df.reset_index(drop=False)
+        df.rename(columns={"index": "id"}, inplace=True)
+    return df
+
+
+def model_features(pipeline) -> list[str]:
+    """
+    Признаки, на которых обучена модель (feature_names_in_), или FEATURES,
+    если модель их не запомнила
+    """
+    names = getattr(pipeline, "feature_names_in_", None)
+    return FEATURES if names is None else [str(name) for name in names]
+
+
+def add_derived_features(df: pd.DataFrame, features: list[str]) -> pd.DataFrame:
+    """
+    Досчитывает признаки модели, которых нет в очищенном каталоге, но которые
+    выводятся из его колонок (доход projected_income, см. train_model.py
+    --income-feature)
+    """
+    from backend.app.catalog.income import INCOME_FEATURE, add_income_feature
+
+    if INCOME_FEATURE in features and INCOME_FEATURE not in df.columns:
+        df = add_income_feature(df)
+    return df
+
+
+def missing_features(df: pd.DataFrame, features: list[str] = FEATURES) -> list[str]:
+    """Возвращает признаки модели, которых нет в каталоге"""
+    return [col for col in features if col not in df.columns]
+
+
+def score_catalog(
+    df: pd.DataFrame, pipeline, features: list[str] = FEATURES
+) -> pd.DataFrame:
+    """
+    Один раз прогоняет модель по всему каталогу и сохраняет результат
+    в колонку 'probability'.
+
+    Все признаки модели — свойства самого вклада и не зависят от
+    пользователя, поэтому вероятность можно посчитать заранее,
+    а /recommend сводится к фильтрации и сортировке готовых значений.
+    Колонка добавляется в переданный DataFrame без копирования остальных
+    колонок (важно для каталога, отображённого в память).
+    """
+    if df.empty:
+        df["probability"] = pd.Series(dtype=float)
+        return df
+    df["probability"] = pipeline.predict_proba(df[features])[:, 1]
+    return df
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.app.artifacts import COLUMNAR_SUFFIX
+
+# Компактные типы колонок очищенного каталога — и в памяти, и на диске.
+# Название хранится категорией: коды + один экземпляр каждой строки.
+# Ставка остаётся float64: в float32 она теряет сотые, от которых зависят
+# доход и порядок выдачи. Dummy-колонки currency_* и payout_mode_* — bool
+# (1 байт на строку).
+CATALOG_SCHEMA = {
+    "id": "int32",
+    "name": "category",
+    "rate": "float64",
+    "term_months": "int16",
+    "can_replenish": "int8",
+    "min_amount": "int32",
+    "risk_level": "int8",
+    "goal_accumulation": "int8",
+}
+DUMMY_PREFIXES = ("currency_", "payout_mode_")
+
+
+def column_dtype(name: str, series: pd.Series) -> str:
+    """Тип колонки по схеме каталога (неизвестные колонки — как есть)"""
+    if name in CATALOG_SCHEMA:
+        dtype = CATALOG_SCHEMA[name]
+        # Целые, не помещающиеся в компактный тип, остаются int64
+        if dtype.startswith("int") and len(series):
+            info = np.iinfo(dtype)
+            if series.min() < info.min or series.max() > info.max:
+                return "int64"
+        return dtype
+    if name.startswith(DUMMY_PREFIXES):
+        return "bool"
+    return str(series.dtype)
+
+
+def compact_catalog(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит колонки каталога к типам CATALOG_SCHEMA. Колонки, уже
+    имеющие нужный тип (например, отображённые в память), не копируются.
+    """
+    return pd.DataFrame(
+        {
+            name: df[name].astype(column_dtype(name, df[name]), copy=False)
+            for name in df.columns
+        },
+        copy=False,
+    )
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """Память колонок (байт, со строками) до и после compact_catalog"""
+    old = before.memory_usage(index=False, deep=True)
+    new = after.memory_usage(index=False, deep=True)
+    return {
+        "before": int(old.sum()),
+        "after": int(new.sum()),
+        "columns": {name: (int(old[name]), int(new[name])) for name in new.index},
+    }
+
+
+def format_report(report: dict) -> str:
+    """Строка отчёта memory_report для вывода в консоль"""
+    ratio = report["before"] / max(report["after"], 1)
+    return (
+        f"{report['before'] / 2**20:.1f} МБ -> {report['after'] / 2**20:.1f} МБ "
+        f"(в {ratio:.1f} раза меньше)"
+    )
+
+
+def save_catalog(
+    df: pd.DataFrame, path: str | Path, source: str | Path | None = None
+) -> Path:
+    """
+    Сохраняет каталог в колоночном бинарном формате: по файлу .npy на
+    колонку и schema.json с порядком колонок и их типами (CATALOG_SCHEMA).
+    У категориальных колонок рядом с кодами лежит словарь значений.
+
+    Запись идёт во временную директорию, которая затем подменяет
+    старую, поэтому читатели не видят наполовину записанный каталог.
+
+    source — путь к CSV того же каталога: его контрольная сумма
+    сохраняется в schema.json, чтобы не читать колоночную версию
+    после перезаписи CSV (см. catalog_source).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    columns = []
+    for i, (name, series) in enumerate(compact_catalog(df).items()):
+        column = {"name": name, "dtype": str(series.dtype), "file": f"{i}.npy"}
+        if column["dtype"] == "category":
+            values = series.cat.codes.to_numpy()
+            categories = series.cat.categories.astype(str).to_numpy(dtype=np.str_)
+            column["categories"] = f"{i}.categories.npy"
+            np.save(tmp_path / column["categories"], categories, allow_pickle=False)
+        else:
+            values = series.to_numpy()
+        np.save(tmp_path / column["file"], values, allow_pickle=False)
+        columns.append(column)
+
+    schema = {
+        "rows": len(df),
+        "columns": columns,
+        "source_digest": file_digest(source) if source else None,
+    }
+    (tmp_path / "schema.json").write_text(
+        json.dumps(schema, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+    return replace_directory(tmp_path, path)
+
+
+def file_digest(path: str | Path) -> str:
+    """Контрольная сумма содержимого файла (sha256)"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def replace_directory(tmp_path: Path, path: Path) -> Path:
+    """Подменяет директорию path полностью записанной tmp_path"""
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(old_path, ignore_errors=True)
+    if path.exists():
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+def load_columnar(path: str | Path, mmap: bool = True) -> pd.DataFrame:
+    """
+    Загружает каталог из колоночного формата. Числовые колонки и коды
+    категорий отображаются в память (mmap) только для чтения и не
+    копируются, так что несколько процессов делят одни и те же страницы.
+    """
+    path = Path(path)
+    schema = json.loads((path / "schema.json").read_text(encoding="utf-8"))
+    data = {}
+    for column in schema["columns"]:
+        values = np.load(
+            path / column["file"], mmap_mode="r" if mmap else None, allow_pickle=False
+        )
+        if column["dtype"] == "category":
+            categories = np.load(path / column["categories"], allow_pickle=False)
+            values = pd.Categorical.from_codes(
+                np.asarray(values), categories=pd.Index(categories.astype(object))
+            )
+        elif column["dtype"] == "str":
+            # Каталоги, сохранённые до перехода на категории
+            values = values.astype(object)
+        else:
+            # Обычный ndarray-вид на те же страницы, без подкласса np.memmap
+            values = np.asarray(values)
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def catalog_source(csv_path: str | Path) -> Path:
+    """
+    Путь, с которого следует читать каталог: колоночная версия рядом
+    с CSV, если она есть и собрана из этого же CSV, иначе сам CSV.
+    """
+    csv_path = Path(csv_path)
+    columnar = csv_path.with_suffix(COLUMNAR_SUFFIX)
+    schema_path = columnar / "schema.json"
+    if not schema_path.exists():
+        return csv_path
+    if csv_path.is_file():
+        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        if schema.get("source_digest") != file_digest(csv_path):
+            return csv_path
+    return columnar
+
+
+def load_catalog(path: str | Path, mmap: bool = True) -> pd.DataFrame:
+    """
+    Общий загрузчик каталога для сервера и обучения.
+    Принимает путь к CSV или к колоночной директории; для CSV
+    предпочитается колоночная версия рядом, если она собрана из него.
+    Типы колонок CSV не меняются (см. compact_catalog).
+    """
+    path = catalog_source(path)
+    if path.suffix == COLUMNAR_SUFFIX:
+        return load_columnar(path, mmap=mmap)
+    return pd.read_csv(path)
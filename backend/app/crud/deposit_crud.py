@@ -1,3 +1,7 @@
+import base64
+import json
+
+from sqlalchemy import literal_column, text, tuple_
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -5,11 +9,160 @@ from sqlalchemy.future import select
 from backend.app.db.models import Deposit
 
 
+# Составной уникальный ключ вклада и изменяемые при upsert поля
+UPSERT_KEY = ["name", "term_months", "payout_mode", "min_amount"]
+UPDATE_COLUMNS = ["rate", "can_replenish", "currency"]
+INSERT_COLUMNS = UPSERT_KEY + UPDATE_COLUMNS
+
+# Ограничение PostgreSQL на число параметров в одном запросе
+MAX_BIND_PARAMS = 32767
+# Начиная с какого объёма выгоднее грузить через COPY во временную таблицу
+COPY_THRESHOLD = 5000
+
+
+def _prepare_records(deposit_data: list[dict]) -> list[dict]:
+    """
+    Приводит записи к полному набору колонок (со значениями по умолчанию
+    из модели) и оставляет по одной записи на ключ — последнюю.
+    Повтор ключа в одном INSERT ... ON CONFLICT недопустим в PostgreSQL.
+    """
+    defaults = {
+        column.name: column.default.arg
+        for column in Deposit.__table__.columns
+        if column.default is not None
+    }
+    unique = {}
+    for record in deposit_data:
+        row = {col: record.get(col, defaults.get(col)) for col in INSERT_COLUMNS}
+        unique[tuple(row[col] for col in UPSERT_KEY)] = row
+    return list(unique.values())
+
+
+def _changed_condition(target: str, source: str) -> str:
+    """Условие «значения действительно изменились» для ON CONFLICT DO UPDATE"""
+    current = ", ".join(f"{target}.{col}" for col in UPDATE_COLUMNS)
+    incoming = ", ".join(f"{source}.{col}" for col in UPDATE_COLUMNS)
+    return f"({current}) IS DISTINCT FROM ({incoming})"
+
+
+async def _upsert_insert(session: AsyncSession, records: list[dict], chunk_size: int):
+    """Upsert порциями INSERT ... VALUES ... ON CONFLICT DO UPDATE"""
+    inserted = updated = 0
+    table = Deposit.__table__
+    for start in range(0, len(records), chunk_size):
+        stmt = insert(Deposit).values(records[start : start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=UPSERT_KEY,
+            set_={col: stmt.excluded[col] for col in UPDATE_COLUMNS},
+            # Строки с неизменными значениями не перезаписываются
+            where=tuple_(*(table.c[col] for col in UPDATE_COLUMNS)).is_distinct_from(
+                tuple_(*(stmt.excluded[col] for col in UPDATE_COLUMNS))
+            ),
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        result = await session.execute(stmt)
+        flags = result.scalars().all()
+        inserted += sum(flags)
+        updated += len(flags) - sum(flags)
+    return inserted, updated
+
+
+async def _upsert_copy(session: AsyncSession, records: list[dict]):
+    """
+    Upsert через COPY во временную таблицу и один INSERT ... SELECT
+    ... ON CONFLICT DO UPDATE из неё (только для asyncpg).
+    """
+    conn = await session.connection()
+    table = Deposit.__tablename__
+    staging = f"{table}_staging"
+    cols = ", ".join(INSERT_COLUMNS)
+
+    # Временная таблица создаётся внутри транзакции сессии и удаляется при commit
+    await conn.execute(
+        text(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {cols} FROM {table} WITH NO DATA"
+        )
+    )
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        staging,
+        records=[tuple(r[col] for col in INSERT_COLUMNS) for r in records],
+        columns=INSERT_COLUMNS,
+    )
+    result = await conn.execute(
+        text(
+            f"""
+            WITH merged AS (
+                INSERT INTO {table} ({cols})
+                SELECT {cols} FROM {staging}
+                ON CONFLICT ({", ".join(UPSERT_KEY)}) DO UPDATE
+                SET {", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)}
+                WHERE {_changed_condition(table, "EXCLUDED")}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted) AS inserted,
+                   count(*) FILTER (WHERE NOT inserted) AS updated
+            FROM merged
+            """
+        )
+    )
+    row = result.one()
+    return row.inserted, row.updated
+
+
+async def bulk_upsert_deposits(
+    session: AsyncSession,
+    deposit_data: list[dict],
+    method: str = "auto",
+    chunk_size: int | None = None,
+) -> dict:
+    """
+    Массовая вставка или обновление вкладов по составному ключу
+    "name", "term_months", "payout_mode", "min_amount".
+
+    Параметры:
+        session (AsyncSession): асинхронная сессия SQLAlchemy
+        deposit_data (list[dict]): список словарей с данными вкладов
+        method (str): "insert" — порции INSERT ... ON CONFLICT,
+            "copy" — COPY во временную таблицу и слияние,
+            "auto" — COPY для больших объёмов на asyncpg, иначе insert
+        chunk_size (int | None): строк в одном INSERT; по умолчанию
+            максимум, укладывающийся в лимит параметров PostgreSQL
+
+    Строки, значения которых не изменились, не перезаписываются.
+
+    Возвращает:
+        dict: число вставленных, обновлённых и неизменённых записей
+    """
+    records = _prepare_records(deposit_data)
+    if not records:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    if method == "auto":
+        is_asyncpg = session.bind is not None and session.bind.dialect.driver == "asyncpg"
+        method = "copy" if is_asyncpg and len(records) >= COPY_THRESHOLD else "insert"
+
+    if method == "copy":
+        inserted, updated = await _upsert_copy(session, records)
+    else:
+        chunk_size = chunk_size or MAX_BIND_PARAMS // len(INSERT_COLUMNS)
+        inserted, updated = await _upsert_insert(session, records, chunk_size)
+    await session.commit()
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(records) - inserted - updated,
+    }
+
+
 async def create_or_update_deposit(
     session: AsyncSession, deposit_data: dict
 ) -> Deposit:
     """
-    Создаёт новую запись вклада или обновляет существующую по уникальному имени.
+    Создаёт или обновляет одну запись вклада через bulk_upsert_deposits —
+    по тому же составному ключу "name", "term_months", "payout_mode",
+    "min_amount" и с теми же значениями по умолчанию.
 
     Параметры:
         session (AsyncSession): асинхронная сессия SQLAlchemy
@@ -18,49 +171,107 @@ async def create_or_update_deposit(
     Возвращает:
         Deposit: объект вклада из базы после создания или обновления
     """
-    stmt = select(Deposit).where(Deposit.name == deposit_data["name"])
-    result = await session.execute(stmt)
-    deposit = result.scalars().first()
-
-    if not deposit:
-        # Если вклад с таким именем отсутствует, создаём новый
-        deposit = Deposit(**deposit_data)
-        session.add(deposit)
-        await session.commit()
-        await session.refresh(deposit)
-    else:
-        # Если вклад найден — обновляем его поля
-        for key, value in deposit_data.items():
-            setattr(deposit, key, value)
-        await session.commit()
-
-    return deposit
+    await bulk_upsert_deposits(session, [deposit_data], method="insert")
+    (record,) = _prepare_records([deposit_data])
+    stmt = select(Deposit).where(
+        *(getattr(Deposit, col) == record[col] for col in UPSERT_KEY)
+    )
+    return (await session.execute(stmt)).scalars().one()
 
 
-async def create_or_update_deposit_bulk(session, deposit_data: list[dict]):
+async def create_or_update_deposit_bulk(session, deposit_data: list[dict]) -> dict:
     """
     Массовая вставка или обновление записей Deposit (upsert) с помощью
     PostgreSQL оператора ON CONFLICT DO UPDATE.
 
     Используется составной уникальный ключ по полям:
     "name", "term_months", "payout_mode", "min_amount".
+    Большие списки автоматически разбиваются на порции
+    (см. bulk_upsert_deposits).
 
     Параметры:
         session (AsyncSession): асинхронная сессия SQLAlchemy
         deposit_data (list[dict]): список словарей с данными вкладов
+
+    Возвращает:
+        dict: число вставленных, обновлённых и неизменённых записей
     """
-    if not deposit_data:
-        return
-
-    stmt = insert(Deposit).values(deposit_data)
-    stmt = stmt.on_conflict_do_update(
-        index_elements=["name", "term_months", "payout_mode", "min_amount"],
-        set_={
-            "rate": stmt.excluded.rate,
-            "can_replenish": stmt.excluded.can_replenish,
-            "min_amount": stmt.excluded.min_amount,
-            "currency": stmt.excluded.currency,
-        },
-    )
-    await session.execute(stmt)
-    await session.commit()
\ No newline at end of file
+    return await bulk_upsert_deposits(session, deposit_data)
+
+
+def encode_cursor(rate: float, deposit_id: int) -> str:
+    """Курсор страницы: позиция последней выданной строки (rate, id)"""
+    raw = json.dumps([rate, deposit_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """Обратное к encode_cursor; ValueError при повреждённом курсоре"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rate, deposit_id = json.loads(raw)
+        return float(rate), int(deposit_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Некорректный курсор: {cursor!r}") from exc
+
+
+async def list_deposits(
+    session: AsyncSession,
+    currency: list[str] | None = None,
+    term_min: int | None = None,
+    term_max: int | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    replenishable: bool | None = None,
+    after: tuple[float, int] | None = None,
+    descending: bool = True,
+    limit: int = 50,
+) -> tuple[list[Deposit], tuple[float, int] | None]:
+    """
+    Страница вкладов по фильтрам, упорядоченная по (rate, id).
+
+    Пагинация по ключу: следующая страница начинается строго после
+    позиции after, поэтому глубокие страницы читают из индекса
+    ix_deposits_rate_id только limit строк, без OFFSET.
+
+    Параметры:
+        session (AsyncSession): асинхронная сессия SQLAlchemy
+        currency (list[str] | None): допустимые валюты
+        term_min, term_max (int | None): границы срока, месяцев
+        amount_min, amount_max (float | None): границы минимальной суммы
+        replenishable (bool | None): только пополняемые или только нет
+        after (tuple | None): (rate, id) последней строки прошлой страницы
+        descending (bool): сначала большие ставки
+        limit (int): размер страницы
+
+    Возвращает:
+        tuple: вклады страницы и позиция для следующей (None — страниц больше нет)
+    """
+    stmt = select(Deposit)
+    if currency:
+        stmt = stmt.where(Deposit.currency.in_(currency))
+    if term_min is not None:
+        stmt = stmt.where(Deposit.term_months >= term_min)
+    if term_max is not None:
+        stmt = stmt.where(Deposit.term_months <= term_max)
+    if amount_min is not None:
+        stmt = stmt.where(Deposit.min_amount >= amount_min)
+    if amount_max is not None:
+        stmt = stmt.where(Deposit.min_amount <= amount_max)
+    if replenishable is not None:
+        stmt = stmt.where(Deposit.can_replenish.is_(replenishable))
+
+    key = tuple_(Deposit.rate, Deposit.id)
+    if after is not None:
+        stmt = stmt.where(key < after if descending else key > after)
+    if descending:
+        stmt = stmt.order_by(Deposit.rate.desc(), Deposit.id.desc())
+    else:
+        stmt = stmt.order_by(Deposit.rate, Deposit.id)
+
+    # Лишняя строка показывает, есть ли следующая страница
+    rows = (await session.execute(stmt.limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return list(rows), None
+    page = list(rows[:limit])
+    return page, (page[-1].rate, page[-1].id)
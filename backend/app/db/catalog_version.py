@@ -0,0 +1,47 @@
+from sqlalchemy import select, text
+
+from backend.app.db.models import CatalogVersion, Deposit
+
+# Подключение к БД здесь не создаётся: функции получают соединение
+# или сессию. Миграция alembic 0003 хранит свою копию TRIGGER_DDL —
+# изменение триггера здесь требует новой миграции
+
+_TABLE = CatalogVersion.__tablename__
+
+# Триггер уровня оператора: один инкремент на INSERT/UPDATE/DELETE/TRUNCATE,
+# а не на каждую строку массового upsert
+TRIGGER_DDL = [
+    f"INSERT INTO {_TABLE} (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+    f"""
+    CREATE OR REPLACE FUNCTION bump_deposit_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE {_TABLE} SET version = version + 1 WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS deposits_bump_version ON {Deposit.__tablename__}",
+    f"""
+    CREATE TRIGGER deposits_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {Deposit.__tablename__}
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_deposit_catalog_version()
+    """,
+]
+
+DROP_TRIGGER_DDL = [
+    f"DROP TRIGGER IF EXISTS deposits_bump_version ON {Deposit.__tablename__}",
+    "DROP FUNCTION IF EXISTS bump_deposit_catalog_version()",
+]
+
+
+async def install_version(conn):
+    """Создаёт таблицу счётчика и триггер на соединении conn"""
+    await conn.run_sync(CatalogVersion.__table__.create, checkfirst=True)
+    for statement in TRIGGER_DDL:
+        await conn.execute(text(statement))
+
+
+async def catalog_version(session) -> int:
+    """Текущее значение счётчика изменений таблицы вкладов"""
+    query = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+    return (await session.execute(query)).scalar_one()
@@ -7,9 +7,23 @@ from sqlalchemy.orm import sessionmaker
 load_dotenv()  # Загружаем переменные окружения из .env файла
 
 DATABASE_URL = os.getenv("DATABASE_URL")  # Получаем строку подключения к БД
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL не задана")
 
-# Создаём асинхронный движок SQLAlchemy с выводом SQL-запросов (echo=True)
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Логирование SQL и размер пула соединений настраиваются через окружение:
+# DB_ECHO=1 включает вывод SQL-запросов (по умолчанию выключен)
+DB_ECHO = os.getenv("DB_ECHO", "0").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Создаём асинхронный движок SQLAlchemy
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
 
 # Создаём асинхронный сессионный класс, который будет создавать сессии для работы с БД
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
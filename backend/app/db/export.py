@@ -0,0 +1,189 @@
+import asyncio
+import io
+
+import pandas as pd
+from sqlalchemy import Boolean, Float, Integer, text
+
+from backend.app.db.database import engine
+from backend.app.db.models import Deposit
+
+# Примерный размер блока CSV, который разбирается в один DataFrame
+COPY_BLOCK_BYTES = 4 << 20
+
+
+def _column_dtypes(model=Deposit) -> dict:
+    """Типы колонок для разбора выгрузки по описанию модели SQLAlchemy"""
+    dtypes = {}
+    for column in model.__table__.columns:
+        if isinstance(column.type, Boolean):
+            dtypes[column.name] = "bool"
+        elif isinstance(column.type, Float):
+            dtypes[column.name] = "float64"
+        elif isinstance(column.type, Integer):
+            dtypes[column.name] = "int64"
+        else:
+            dtypes[column.name] = "object"
+    return dtypes
+
+
+def _parse_block(block: bytes, columns: list[str], dtypes: dict) -> pd.DataFrame:
+    """Разбирает блок строк COPY ... CSV в DataFrame с типами из модели"""
+    return pd.read_csv(
+        io.BytesIO(block),
+        names=columns,
+        header=None,
+        true_values=["t"],
+        false_values=["f"],
+        dtype={name: dtype for name, dtype in dtypes.items() if dtype != "bool"},
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def _row_boundary(data: bytes, quoted: bool) -> tuple[int, bool]:
+    """
+    Конец последней полной строки CSV в очередном куске data (0 — в куске
+    строка не завершается) и, открыта ли кавычка в конце куска.
+    quoted — открыта ли кавычка перед куском. Перевод строки внутри
+    кавычек строку не завершает; кусок просматривается один раз.
+    """
+    end, pos = 0, 0
+    for part in data.split(b'"'):
+        if not quoted:
+            newline = part.rfind(b"\n")
+            if newline != -1:
+                end = pos + newline + 1
+        pos += len(part) + 1
+        quoted = not quoted
+    return end, not quoted
+
+
+async def stream_table(
+    table_name: str = Deposit.__tablename__,
+    model=Deposit,
+    block_bytes: int = COPY_BLOCK_BYTES,
+    dtypes: dict | None = None,
+):
+    """
+    Асинхронно выгружает таблицу через COPY ... TO STDOUT (CSV) на общем
+    движке из database.py и отдаёт её блоками DataFrame.
+
+    Строки не превращаются в Python-объекты: байты COPY режутся по
+    границам строк и разбираются pandas. Очередь между COPY и потребителем
+    ограничена, так что в памяти держится лишь несколько блоков.
+    Для представлений без модели SQLAlchemy колонки и типы задаёт dtypes.
+    """
+    dtypes = dtypes or _column_dtypes(model)
+    columns = list(dtypes)
+    names = ", ".join(f'"{name}"' for name in columns)
+    query = f"SELECT {names} FROM {table_name}"
+    queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+
+    async def sink(data: bytes):
+        await queue.put(data)
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+
+        async def copy():
+            try:
+                await driver.copy_from_query(query, output=sink, format="csv")
+            finally:
+                await queue.put(None)
+
+        task = asyncio.create_task(copy())
+        # Накопленные байты, конец последней полной строки в них
+        # и открыта ли кавычка: каждый кусок COPY просматривается один раз
+        buffer = bytearray()
+        cut, quoted = 0, False
+        try:
+            while (data := await queue.get()) is not None:
+                end, quoted = _row_boundary(data, quoted)
+                if end:
+                    cut = len(buffer) + end
+                buffer += data
+                if len(buffer) >= block_bytes and cut:
+                    yield _parse_block(buffer[:cut], columns, dtypes)
+                    del buffer[:cut]
+                    cut = 0
+            await task
+            if buffer:
+                yield _parse_block(buffer, columns, dtypes)
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+async def stream_table_cursor(
+    table_name: str = Deposit.__tablename__, chunksize: int = 50_000
+):
+    """
+    Запасной путь для драйверов без COPY: серверный курсор
+    на том же асинхронном движке, выборка порциями по chunksize строк.
+    """
+    async with engine.connect() as conn:
+        result = await conn.stream(text(f"SELECT * FROM {table_name}"))
+        columns = list(result.keys())
+        async for partition in result.partitions(chunksize):
+            yield pd.DataFrame(partition, columns=columns)
+
+
+async def load_table(table_name: str = Deposit.__tablename__) -> pd.DataFrame:
+    """Загружает всю таблицу в один DataFrame через COPY"""
+    chunks = [chunk async for chunk in stream_table(table_name)]
+    if not chunks:
+        return pd.DataFrame(columns=list(_column_dtypes()))
+    return pd.concat(chunks, ignore_index=True)
+
+
+async def table_digest(table_name: str = Deposit.__tablename__) -> str:
+    """
+    Контрольная сумма содержимого таблицы, посчитанная на стороне БД.
+    Позволяет понять, изменились ли данные, не выгружая их. Склеиваются
+    md5 строк (32 байта на строку), а не сами строки: текст агрегата
+    в PostgreSQL ограничен 1 ГБ.
+    """
+    query = text(
+        "SELECT md5(coalesce(string_agg(h, '' ORDER BY h), '')) "
+        f"FROM (SELECT md5(t::text) AS h FROM {table_name} AS t) AS hashes"
+    )
+    async with engine.connect() as conn:
+        return (await conn.execute(query)).scalar_one()
+
+
+async def load_features(refresh: bool = True) -> pd.DataFrame:
+    """
+    Готовые признаки каталога из материализованного представления
+    (db/features.py) вместо выгрузки сырой таблицы и preprocess_frame.
+    С refresh представление сначала обновляется CONCURRENTLY — читатели
+    старой версии не блокируются. ValueError, если категории таблицы
+    не совпадают с dummy-колонками представления.
+    """
+    from backend.app.db.features import (
+        CATEGORIES_SQL,
+        FEATURE_DTYPES,
+        FEATURE_VIEW,
+        REFRESH_SQL,
+        check_categories,
+    )
+
+    async with engine.begin() as conn:
+        check_categories(*(await conn.execute(text(CATEGORIES_SQL))).one())
+        if refresh:
+            await conn.execute(text(REFRESH_SQL))
+    chunks = [
+        chunk async for chunk in stream_table(FEATURE_VIEW, dtypes=FEATURE_DTYPES)
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=list(FEATURE_DTYPES))
+    df = pd.concat(chunks, ignore_index=True)
+    # Порядок строк представления после CONCURRENTLY не определён
+    return df.sort_values("id", ignore_index=True)
+
+
+async def preprocess_db_async(table_name: str = Deposit.__tablename__) -> pd.DataFrame:
+    """Полная цепочка препроцессинга с выгрузкой таблицы через COPY"""
+    from scripts.data_prep import preprocess_frame
+
+    return preprocess_frame(await load_table(table_name))
@@ -0,0 +1,152 @@
+from sqlalchemy import text
+
+from backend.app.db.models import Deposit
+
+# Подключение к БД здесь не создаётся: функции получают соединение
+# от вызывающего кода. Миграция alembic 0002 хранит свою копию VIEW_DDL —
+# изменение представления здесь требует новой миграции
+
+# Материализованное представление с признаками каталога (как preprocess_db)
+FEATURE_VIEW = "deposit_features"
+
+# Значения категориальных колонок, под которые построены dummy-колонки
+# представления. get_dummies(drop_first=True) отбрасывает первое значение
+# в порядке сортировки, поэтому колонки EUR и end в представлении нет.
+FEATURE_CATEGORIES = {
+    "currency": ["EUR", "RUB", "USD"],
+    "payout_mode": ["end", "monthly"],
+}
+
+# Колонки представления в порядке preprocess_db и их типы в pandas
+FEATURE_DTYPES = {
+    "id": "int64",
+    "name": "category",
+    "rate": "float64",
+    "term_months": "int64",
+    "can_replenish": "int64",
+    "min_amount": "int64",
+    "currency_RUB": "bool",
+    "currency_USD": "bool",
+    "payout_mode_monthly": "bool",
+    "risk_level": "int64",
+    "goal_accumulation": "int64",
+}
+
+
+def _dummies(column: str) -> str:
+    # Имена в кавычках: иначе PostgreSQL приведёт currency_RUB к нижнему регистру
+    return ",\n".join(
+        f"        ({column} = '{value}') AS \"{column}_{value}\""
+        for value in FEATURE_CATEGORIES[column][1:]
+    )
+
+
+# Этапы data_prep в SQL:
+#   - clean_strings: NBSP в названии заменяется пробелом, пробельные
+#     символы по краям убираются;
+#   - drop_duplicates: полные дубликаты невозможны — id первичный ключ;
+#   - fill_missing: пропуск ставки — медиана по названию, срока — мода
+#     (при равенстве частот наименьшее значение, как Series.mode()[0]),
+#     строки без валюты или минимальной суммы отбрасываются. Сейчас эти
+#     колонки NOT NULL, но семантика сохранена на случай смягчения схемы;
+#   - normalize_types: min_amount усекается до целого, can_replenish — 0/1;
+#   - encode_features: dummy-колонки по FEATURE_CATEGORIES;
+#   - add_features: корзины pd.cut(bins=[0, 6, 12, 24, max]) с правой
+#     границей включительно, goal_accumulation — срок от 12 месяцев.
+VIEW_DDL = [
+    f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {FEATURE_VIEW} AS
+    WITH cleaned AS (
+        SELECT
+            id,
+            regexp_replace(
+                replace(name, U&'\\00A0', ' '), '^\\s+|\\s+$', '', 'g'
+            ) AS name,
+            rate, term_months, can_replenish, min_amount, currency, payout_mode
+        FROM {Deposit.__tablename__}
+    ),
+    medians AS (
+        SELECT name, percentile_cont(0.5) WITHIN GROUP (ORDER BY rate) AS rate
+        FROM cleaned
+        GROUP BY name
+    ),
+    term_mode AS (
+        SELECT mode() WITHIN GROUP (ORDER BY term_months) AS term_months
+        FROM cleaned
+    ),
+    filled AS (
+        SELECT
+            c.id,
+            c.name,
+            coalesce(c.rate, m.rate) AS rate,
+            coalesce(c.term_months, t.term_months) AS term_months,
+            c.can_replenish,
+            c.min_amount,
+            c.currency,
+            c.payout_mode
+        FROM cleaned AS c
+        LEFT JOIN medians AS m ON m.name = c.name
+        CROSS JOIN term_mode AS t
+        WHERE c.currency IS NOT NULL AND c.min_amount IS NOT NULL
+    )
+    SELECT
+        id,
+        name,
+        rate::double precision AS rate,
+        term_months::bigint AS term_months,
+        can_replenish::int AS can_replenish,
+        trunc(min_amount)::bigint AS min_amount,
+{_dummies("currency")},
+{_dummies("payout_mode")},
+        CASE
+            WHEN term_months <= 0 THEN NULL
+            WHEN term_months <= 6 THEN 3
+            WHEN term_months <= 12 THEN 2
+            WHEN term_months <= 24 THEN 1
+            ELSE 0
+        END AS risk_level,
+        (term_months >= 12)::int AS goal_accumulation
+    FROM filled
+    """,
+    # Уникальный индекс обязателен для REFRESH ... CONCURRENTLY
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {FEATURE_VIEW}_id ON {FEATURE_VIEW} (id)",
+    # Фильтр подбора: срок, минимальная сумма, пополнение
+    f"""
+    CREATE INDEX IF NOT EXISTS {FEATURE_VIEW}_filter
+    ON {FEATURE_VIEW} (term_months, min_amount, can_replenish)
+    """,
+]
+
+DROP_VIEW_DDL = [f"DROP MATERIALIZED VIEW IF EXISTS {FEATURE_VIEW}"]
+
+REFRESH_SQL = f"REFRESH MATERIALIZED VIEW CONCURRENTLY {FEATURE_VIEW}"
+
+# Наборы значений категориальных колонок в самой таблице
+CATEGORIES_SQL = (
+    "SELECT array_agg(DISTINCT currency), array_agg(DISTINCT payout_mode) "
+    f"FROM {Deposit.__tablename__} "
+    "WHERE currency IS NOT NULL AND min_amount IS NOT NULL"
+)
+
+
+def check_categories(currencies, payout_modes):
+    """
+    ValueError, если набор валют или способов выплаты в таблице
+    не совпадает с dummy-колонками представления: тогда preprocess_db
+    дал бы другие колонки, и признаки нужно готовить в pandas
+    """
+    found = {
+        "currency": sorted(currencies or []),
+        "payout_mode": sorted(payout_modes or []),
+    }
+    if found != FEATURE_CATEGORIES:
+        raise ValueError(
+            f"Категории таблицы {found} не совпадают с представлением "
+            f"{FEATURE_VIEW} ({FEATURE_CATEGORIES})"
+        )
+
+
+async def install_view(conn):
+    """Создаёт представление и его индексы на соединении conn"""
+    for statement in VIEW_DDL:
+        await conn.execute(text(statement))
@@ -1,4 +1,14 @@
-from sqlalchemy import Boolean, Column, Float, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Column,
+    Float,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -36,10 +46,29 @@ class Deposit(Base):
             "min_amount",
             name="uq_name_term_payout_min",
         ),  # Составной уникальный индекс для предотвращения дублирования
+        # Постраничная выдача /deposits по (rate, id), в т.ч. внутри валюты
+        Index("ix_deposits_rate_id", "rate", "id"),
+        Index("ix_deposits_currency_rate_id", "currency", "rate", "id"),
     )
 
     def __repr__(self):
         return (
             f"<Deposit(name={self.name}, rate={self.rate}, term={self.term_months}m, "
             f"replenish={self.can_replenish}, min_amount={self.min_amount}, payout_mode={self.payout_mode})>"
-        )
\ No newline at end of file
+        )
+
+
+class CatalogVersion(Base):
+    """
+    Счётчик изменений таблицы 'deposits' (одна строка).
+
+    Увеличивается триггером на каждый изменяющий оператор
+    (см. db/catalog_version.py); по нему /deposits строит ETag.
+    """
+
+    __tablename__ = "deposit_catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (CheckConstraint("id = 1", name="ck_single_row"),)
@@ -0,0 +1,161 @@
+import pandas as pd
+from sqlalchemy import text
+
+from backend.app.db.models import Deposit
+
+# Движок БД подключается внутри функций: database.py требует DATABASE_URL
+# уже при импорте. Миграция alembic 0001 хранит свою копию TRIGGER_DDL —
+# изменение триггеров здесь требует новой миграции
+
+# Канал LISTEN/NOTIFY с изменениями таблицы вкладов
+CHANNEL = "deposit_changes"
+# Полезная нагрузка «изменилось слишком много строк — сверить всю таблицу»
+ALL_ROWS = "*"
+# Ограничение PostgreSQL на полезную нагрузку NOTIFY — 8000 байт
+MAX_PAYLOAD = 7900
+
+_DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS deposits_notify_{event} ON deposits"
+    for event in ("insert", "update", "delete", "truncate")
+]
+
+# Триггеры уровня оператора с таблицами переходов: один NOTIFY на оператор
+# со списком id через запятую, а не по уведомлению на строку при массовом
+# upsert. Если список не помещается в нагрузку (или таблицу очистили
+# TRUNCATE), отправляется ALL_ROWS.
+TRIGGER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION notify_deposit_changes() RETURNS trigger AS $$
+    DECLARE
+        ids text;
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            ids := '{ALL_ROWS}';
+        ELSIF TG_OP = 'INSERT' THEN
+            SELECT string_agg(id::text, ',') INTO ids FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT string_agg(id::text, ',') INTO ids FROM old_rows;
+        ELSE
+            SELECT string_agg(id::text, ',') INTO ids FROM (
+                SELECT id FROM new_rows UNION SELECT id FROM old_rows
+            ) AS changed;
+        END IF;
+        IF ids IS NULL THEN
+            RETURN NULL;
+        END IF;
+        IF length(ids) > {MAX_PAYLOAD} THEN
+            ids := '{ALL_ROWS}';
+        END IF;
+        PERFORM pg_notify('{CHANNEL}', ids);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *_DROP_TRIGGERS,
+    """
+    CREATE TRIGGER deposits_notify_insert AFTER INSERT ON deposits
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_update AFTER UPDATE ON deposits
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_delete AFTER DELETE ON deposits
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+    """
+    CREATE TRIGGER deposits_notify_truncate AFTER TRUNCATE ON deposits
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_deposit_changes()
+    """,
+]
+
+DROP_TRIGGER_DDL = [
+    *_DROP_TRIGGERS,
+    "DROP FUNCTION IF EXISTS notify_deposit_changes()",
+]
+
+
+async def install_trigger(conn):
+    """Создаёт (или пересоздаёт) триггеры уведомлений на соединении conn"""
+    for statement in TRIGGER_DDL:
+        await conn.execute(text(statement))
+
+
+def parse_payload(payload: str) -> set[int] | None:
+    """Id изменённых строк из уведомления; None — сверить всю таблицу"""
+    if payload.strip() == ALL_ROWS:
+        return None
+    return {int(part) for part in payload.split(",") if part.strip()}
+
+
+async def fetch_deposits(ids) -> pd.DataFrame:
+    """
+    Текущие версии строк с данными id (удалённых строк в результате нет)
+    с теми же типами колонок, что и выгрузка COPY
+    """
+    from backend.app.db.database import engine
+    from backend.app.db.export import _column_dtypes
+
+    dtypes = _column_dtypes()
+    columns = list(dtypes)
+    query = text(
+        f"SELECT {', '.join(columns)} FROM {Deposit.__tablename__} "
+        "WHERE id = ANY(:ids)"
+    )
+    async with engine.connect() as conn:
+        rows = (await conn.execute(query, {"ids": sorted(ids)})).all()
+    return pd.DataFrame(rows, columns=columns).astype(
+        {name: dtype for name, dtype in dtypes.items() if dtype != "object"}
+    )
+
+
+async def table_stats(names=None) -> dict:
+    """
+    Глобальная статистика таблицы, от которой зависит подготовка строк
+    (как в collect_global_stats): наборы валют и способов выплаты
+    для dummy-колонок, наибольший срок для корзин risk_level, мода
+    срока и медианы ставки по названию для заполнения пропусков.
+    Медианы считаются по всей таблице для названий names (None — для всех)
+    """
+    from backend.app.db.database import engine
+
+    table = Deposit.__tablename__
+    query = text(
+        "SELECT array_agg(DISTINCT currency), array_agg(DISTINCT payout_mode), "
+        "max(term_months), mode() WITHIN GROUP (ORDER BY term_months) "
+        f"FROM {table}"
+    )
+    # Название очищается так же, как в clean_strings: NBSP -> пробел, strip
+    clean_name = (
+        r"regexp_replace(replace(name, chr(160), ' '), '^\s+|\s+$', '', 'g')"
+    )
+    medians_query = (
+        f"SELECT {clean_name} AS clean_name, "
+        "percentile_cont(0.5) WITHIN GROUP (ORDER BY rate) "
+        f"FROM {table}"
+    )
+    params = {}
+    if names is not None:
+        medians_query += f" WHERE {clean_name} = ANY(:names)"
+        params["names"] = sorted(
+            {str(name).replace("\u00a0", " ").strip() for name in names}
+        )
+    medians_query += " GROUP BY clean_name"
+    async with engine.connect() as conn:
+        currencies, payout_modes, term_max, term_mode = (
+            await conn.execute(query)
+        ).one()
+        medians = (await conn.execute(text(medians_query), params)).all()
+    return {
+        "categories": {
+            "currency": sorted(currencies or []),
+            "payout_mode": sorted(payout_modes or []),
+        },
+        "term_max": term_max,
+        "term_mode": term_mode,
+        "rate_medians": pd.Series(dict(medians), dtype=float),
+    }
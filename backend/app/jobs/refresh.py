@@ -0,0 +1,226 @@
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+def prep_stage(table: str, output: str, source: str, previous: str | None) -> dict:
+    """
+    Подготовка данных из БД. Таблица читается через COPY на общем
+    асинхронном движке; этап пропускается, если содержимое таблицы
+    не изменилось с прошлого запуска и очищенный файл на месте.
+    С source="view" признаки берутся из материализованного представления
+    (обновляется CONCURRENTLY), а не готовятся в pandas.
+    """
+    return asyncio.run(_prep_stage(table, output, source, previous))
+
+
+async def _prep_stage(
+    table: str, output: str, source: str, previous: str | None
+) -> dict:
+    from backend.app.catalog.storage import COLUMNAR_SUFFIX, save_catalog
+    from backend.app.db.database import engine
+    from backend.app.db.export import load_features, preprocess_db_async, table_digest
+
+    try:
+        digest = await table_digest(table)
+        if digest == previous and Path(output).exists():
+            return {"skipped": True, "digest": digest}
+        df_clean = None
+        if source == "view":
+            try:
+                df_clean = await load_features()
+            except ValueError as exc:
+                # Новая категория: dummy-колонки представления устарели
+                print(f"[WARNING] Признаки готовятся в pandas: {exc}")
+        if df_clean is None:
+            df_clean = await preprocess_db_async(table)
+    finally:
+        # Соединения пула привязаны к циклу событий этого asyncio.run
+        await engine.dispose()
+
+    # CSV остаётся как экспорт, сервер и обучение читают колоночную версию
+    df_clean.to_csv(output, index=False)
+    save_catalog(df_clean, Path(output).with_suffix(COLUMNAR_SUFFIX), source=output)
+    return {"skipped": False, "digest": digest, "rows": len(df_clean)}
+
+
+def train_stage(data_path: str, model_output: str, previous: str | None) -> dict:
+    """
+    Обучение модели. Пропускается, если очищенный каталог не изменился
+    и модель уже сохранена.
+    """
+    from backend.app.catalog.storage import file_digest
+    from scripts.train_model import train_model
+
+    digest = file_digest(data_path)
+    if digest == previous and Path(model_output).exists():
+        return {"skipped": True, "digest": digest}
+
+    metrics = train_model(data_path, model_output)
+    return {"skipped": False, "digest": digest, **metrics}
+
+
+@dataclass
+class RefreshStatus:
+    """Состояние фонового обновления, которое показывает админ-панель"""
+
+    status: str = "Готов к обновлению"
+    progress: int = 0
+    active: bool = False
+    stages: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class RefreshJob:
+    """
+    Фоновое обновление данных и модели внутри сервера.
+
+    Этапы (подготовка данных, обучение) выполняются в отдельном
+    долгоживущем процессе, поэтому не блокируют цикл событий, а pandas и
+    sklearn импортируются в нём один раз. Каждый этап пропускается, если
+    контрольная сумма его входа совпадает с прошлым успешным запуском.
+    Ход выполнения, время этапов и ошибки пишутся в RefreshStatus,
+    а длительности этапов и итог запуска — в метрики (если переданы).
+    Одновременно может выполняться только одно обновление.
+    """
+
+    def __init__(
+        self,
+        progress: RefreshStatus,
+        table: str,
+        clean_path: Path,
+        model_path: Path,
+        state_path: Path,
+        on_reload,
+        metrics=None,
+        source: str = "table",
+    ):
+        self.progress = progress
+        self.metrics = metrics
+        self.table = table
+        self.source = source
+        self.clean_path = clean_path
+        self.model_path = model_path
+        self.state_path = state_path
+        self.on_reload = on_reload
+        self._pool = None
+        # Обработчик POST синхронный и выполняется в пуле потоков:
+        # проверка и установка флага должны быть атомарными
+        self._start_lock = threading.Lock()
+
+    def try_start(self) -> bool:
+        """Помечает обновление как активное; False, если оно уже идёт"""
+        with self._start_lock:
+            if self.progress.active:
+                return False
+            self.progress.active = True
+        self.progress.status = "Запуск обновления..."
+        self.progress.stages = {}
+        self.progress.error = None
+        self._set_progress(0)
+        return True
+
+    def _set_progress(self, percent: int):
+        self.progress.progress = percent
+        if self.metrics is not None:
+            self.metrics.refresh_progress.set(percent)
+
+    def _finish_stage(self, name: str, status: str, started: float):
+        seconds = time.perf_counter() - started
+        self.progress.stages[name] = {"status": status, "seconds": round(seconds, 3)}
+        if self.metrics is not None:
+            self.metrics.observe_refresh_stage(name, status, seconds)
+
+    def _count_run(self, result: str):
+        if self.metrics is not None:
+            self.metrics.refresh_runs.labels(result).inc()
+
+    def _load_state(self) -> dict:
+        if self.state_path.exists():
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        return {}
+
+    def _save_state(self, state: dict):
+        self.state_path.write_text(json.dumps(state), encoding="utf-8")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(self):
+        """Последовательно выполняет этапы обновления (вызывать после try_start)"""
+        loop = asyncio.get_running_loop()
+        state = self._load_state()
+        stages = [
+            (
+                "prep",
+                "Подготовка данных...",
+                prep_stage,
+                (self.table, str(self.clean_path), self.source),
+            ),
+            (
+                "train",
+                "Обучение модели...",
+                train_stage,
+                (str(self.clean_path), str(self.model_path)),
+            ),
+        ]
+        total = len(stages) + 1
+        changed = False
+        name = None
+        started = time.perf_counter()
+
+        try:
+            for done, (name, status, fn, args) in enumerate(stages):
+                self.progress.status = status
+                started = time.perf_counter()
+                result = await loop.run_in_executor(
+                    self._get_pool(), fn, *args, state.get(name)
+                )
+                self._finish_stage(
+                    name, "skipped" if result["skipped"] else "done", started
+                )
+                self._set_progress(int(100 * (done + 1) / total))
+                changed = changed or not result["skipped"]
+                state[name] = result["digest"]
+                self._save_state(state)
+
+            # Новый снимок собирается в стороне и подменяет текущий без рестарта
+            name = "reload"
+            self.progress.status = "Загрузка новой модели..."
+            started = time.perf_counter()
+            if changed:
+                await loop.run_in_executor(None, self.on_reload)
+            self._finish_stage("reload", "done" if changed else "skipped", started)
+            self._set_progress(100)
+            self.progress.status = (
+                "Обновление успешно закончено."
+                if changed
+                else "Данные не изменились, обновление не требуется."
+            )
+            self._count_run("updated" if changed else "unchanged")
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                self._pool = None
+            self._finish_stage(name, "error", started)
+            self.progress.status = f"Ошибка обновления: {exc}"
+            self.progress.error = str(exc)
+            self._count_run("error")
+        finally:
+            self.progress.active = False
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from datetime import datetime
+
+
+def diff_rows(catalog, rows) -> tuple:
+    """
+    Сверка подготовленной таблицы целиком с каталогом снимка.
+    Возвращает (новые и изменённые строки rows, id удалённых строк).
+    """
+    columns = [c for c in rows.columns if c in catalog.columns]
+    if len(columns) < len(rows.columns):
+        # Набор колонок изменился — пусть patch_snapshot сообщит об ошибке
+        return rows, set()
+    new = rows.astype(catalog.dtypes[columns].to_dict()).set_index("id")
+    old = catalog[columns].set_index("id").reindex(new.index)[new.columns]
+    # Пропуск на одном месте в обеих версиях — не изменение (NaN != NaN)
+    same = (new == old) | (new.isna() & old.isna())
+    changed = ~same.all(axis=1).to_numpy()
+    deleted = set(catalog["id"].tolist()) - set(rows["id"].tolist())
+    return rows[changed], deleted
+
+
+class CatalogSync:
+    """
+    Инкрементальная синхронизация каталога снимка с таблицей deposits.
+
+    Триггеры таблицы (см. db/notify.py) на каждый оператор отправляют
+    NOTIFY со списком изменённых id. Задача слушает канал на соединении
+    общего асинхронного движка, копит id в течение delay секунд, затем
+    перечитывает эти строки, прогоняет их через те же этапы data_prep
+    (с глобальной статистикой таблицы, включая медианы ставки по названию)
+    и встраивает в снимок через registry.patch: модель считает вероятности
+    только для изменённых строк, индексы собираются заново, снимок
+    подменяется атомарно.
+
+    Уведомление «все строки» (слишком много id, TRUNCATE) и переподключение
+    после разрыва приводят к сверке всей таблицы с каталогом. Изменения
+    живут в памяти процесса: файлы каталога обновляет полное обновление
+    (RefreshJob), и следующая перезагрузка снимка берёт их.
+    """
+
+    def __init__(
+        self,
+        registry,
+        delay: float = 0.5,
+        reconnect_delay: float = 5.0,
+        ping_interval: float = 30.0,
+        metrics=None,
+    ):
+        self.registry = registry
+        self.delay = delay
+        self.reconnect_delay = reconnect_delay
+        self.ping_interval = ping_interval
+        self.metrics = metrics
+        self.enabled = False
+        self.connected = False
+        self.batches = 0
+        self.rows = 0
+        self.last_sync_at: datetime | None = None
+        self.last_error: str | None = None
+        self._pending: set[int] = set()
+        self._full = False
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Запускает прослушивание в текущем цикле событий (из lifespan)"""
+        self.enabled = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        from backend.app.db.notify import parse_payload
+
+        ids = parse_payload(payload)
+        if ids is None:
+            self._full = True
+        else:
+            self._pending |= ids
+        self._wakeup.set()
+
+    async def run(self):
+        """Слушает канал и переподключается после разрыва соединения"""
+        from backend.app.db.database import engine
+        from backend.app.db.notify import CHANNEL
+
+        reconnect = False
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(CHANNEL, self._on_notify)
+                    self.connected = True
+                    # Пока соединения не было, уведомления терялись
+                    if reconnect:
+                        self._full = True
+                        self._wakeup.set()
+                    reconnect = True
+                    try:
+                        while True:
+                            await self._drain()
+                            # Проверка живости соединения, иначе разрыв
+                            # заметили бы только по отсутствию уведомлений.
+                            # Запрос идёт мимо SQLAlchemy: её транзакция
+                            # задержала бы уведомления до своего завершения
+                            await driver.execute("SELECT 1")
+                    finally:
+                        self.connected = False
+                        if not driver.is_closed():
+                            await driver.remove_listener(CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = str(exc)
+                print(f"[WARNING] Синхронизация каталога прервана: {exc}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _drain(self):
+        """Ждёт уведомлений (не дольше ping_interval) и применяет накопленное"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.ping_interval)
+        except asyncio.TimeoutError:
+            pass
+        if not (self._pending or self._full):
+            return
+        if self.registry.current is None:
+            # Снимок ещё прогревается: изменения подождут его
+            await asyncio.sleep(self.delay)
+            return
+        # Даём массовым изменениям накопиться в одну пересборку
+        await asyncio.sleep(self.delay)
+        self._wakeup.clear()
+        ids, full = self._pending, self._full
+        self._pending, self._full = set(), False
+        try:
+            await self.apply(ids, full)
+        except Exception:
+            # Изменения не потеряны: вернём их к следующей попытке
+            self._pending |= ids
+            self._full = self._full or full
+            raise
+
+    async def apply(self, ids: set[int], full: bool = False) -> int:
+        """
+        Перечитывает строки ids (или всю таблицу при full) и встраивает их
+        в снимок. Возвращает число изменённых строк каталога.
+        """
+        from backend.app.db.export import load_table
+        from backend.app.db.notify import fetch_deposits, table_stats
+
+        started = time.perf_counter()
+        raw = await load_table() if full else await fetch_deposits(ids)
+        # Медианы ставки — по всей таблице для названий изменённых строк,
+        # а не по самим строкам, как при полной пересборке
+        stats = await table_stats(None if full else raw["name"].unique())
+        try:
+            changed = await asyncio.to_thread(self._patch, raw, stats, ids, full)
+        except ValueError as exc:
+            # Изменения не встраиваются (например, новая валюта меняет
+            # dummy-колонки модели) — нужно полное обновление
+            self.last_error = str(exc)
+            print(f"[WARNING] Изменения каталога не применены: {exc}")
+            self._observe("rejected", started)
+            return 0
+        self.batches += 1
+        self.rows += changed
+        self.last_sync_at = datetime.now()
+        self.last_error = None
+        self._observe("patched" if changed else "unchanged", started)
+        return changed
+
+    def _patch(self, raw, stats: dict, ids: set[int], full: bool) -> int:
+        from scripts.data_prep import preprocess_rows
+
+        if full and raw.empty:
+            raise ValueError("Таблица deposits пуста, каталог оставлен как есть")
+        rows = raw if raw.empty else preprocess_rows(raw, stats)
+        if full:
+            rows, deleted = diff_rows(self.registry.current.catalog, rows)
+        else:
+            deleted = set(ids) - set(raw["id"].tolist())
+        if rows.empty and not deleted:
+            return 0
+        self.registry.patch(rows, deleted)
+        return len(rows) + len(deleted)
+
+    def _observe(self, result: str, started: float):
+        if self.metrics is not None:
+            self.metrics.observe_sync(result, time.perf_counter() - started)
+
+    def status(self) -> dict:
+        """Состояние синхронизации для админ-панели и /metrics"""
+        last_at = self.last_sync_at
+        return {
+            "sync_enabled": self.enabled,
+            "sync_connected": self.connected,
+            "sync_batches": self.batches,
+            "sync_rows": self.rows,
+            "sync_last_at": last_at.isoformat() if last_at else None,
+            "sync_error": self.last_error,
+        }
@@ -0,0 +1,283 @@
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Границы корзин для этапов /recommend (секунды): от 0.1 мс до 2.5 с
+STAGE_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+# Размер набора кандидатов после фильтрации по сумме и сроку
+CANDIDATE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Этапы фонового обновления длятся от долей секунды до минут
+REFRESH_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class _SourcesCollector:
+    """
+    Собирает значения, которые уже хранятся в других объектах сервера
+    (реестр снимков, пул инференса, кэш), в момент чтения метрик,
+    чтобы не дублировать счётчики.
+    """
+
+    def __init__(self, metrics: "ServerMetrics"):
+        self.metrics = metrics
+
+    def collect(self):
+        sources = self.metrics.sources()
+        if "model_version" in sources:
+            yield _gauge(
+                "deposit_model_version",
+                "Версия обслуживаемого снимка модели",
+                sources["model_version"] or 0,
+            )
+            yield _gauge(
+                "deposit_catalog_rows", "Строк в каталоге снимка", sources["rows"]
+            )
+            yield _gauge(
+                "deposit_snapshot_shared",
+                "1, если снимок подключён из общего для воркеров сегмента",
+                int(sources.get("shared", False)),
+            )
+            yield _gauge(
+                "deposit_model_load_error",
+                "1, если последняя загрузка снимка завершилась ошибкой",
+                int(sources["load_error"] is not None),
+            )
+        if sources.get("tier_cost_ms"):
+            family = GaugeMetricFamily(
+                "deposit_recommend_tier_cost_ms",
+                "Медианное время подбора /recommend по уровню обслуживания, мс",
+                labels=["tier"],
+            )
+            for tier, cost_ms in sources["tier_cost_ms"].items():
+                if cost_ms is not None:
+                    family.add_metric([tier], cost_ms)
+            yield family
+        if sources.get("recent_p95_ms") is not None:
+            yield _gauge(
+                "deposit_recommend_recent_p95_ms",
+                "p95 времени ответов /recommend за окно сброса нагрузки, мс",
+                sources["recent_p95_ms"],
+            )
+        if sources.get("sync_enabled"):
+            yield _gauge(
+                "deposit_catalog_sync_connected",
+                "1, если синхронизация каталога слушает изменения таблицы",
+                int(sources["sync_connected"]),
+            )
+        if "pending" in sources:
+            yield _gauge(
+                "deposit_inference_pending",
+                "Запросов в пуле инференса (в работе и в очереди)",
+                sources["pending"],
+            )
+            yield _counter(
+                "deposit_inference_rejected",
+                "Запросов, отклонённых из-за переполнения очереди",
+                sources["rejected"],
+            )
+        if "cache_size" in sources:
+            yield _gauge(
+                "deposit_recommend_cache_entries",
+                "Записей в кэше подбора",
+                sources["cache_size"],
+            )
+            yield _counter(
+                "deposit_recommend_cache_hits", "Попаданий в кэш", sources["cache_hits"]
+            )
+            yield _counter(
+                "deposit_recommend_cache_misses",
+                "Промахов кэша",
+                sources["cache_misses"],
+            )
+
+
+def _gauge(name, documentation, value):
+    family = GaugeMetricFamily(name, documentation)
+    family.add_metric([], value)
+    return family
+
+
+def _counter(name, documentation, value):
+    family = CounterMetricFamily(name, documentation)
+    family.add_metric([], value)
+    return family
+
+
+class ServerMetrics:
+    """
+    Метрики сервера в формате Prometheus.
+
+    Гистограммы этапов /recommend и фонового обновления, счётчики исходов
+    подбора (пустой результат, запасной топ по ставке) и значения
+    из реестра снимков, пула и кэша. Отсюда читают и /metrics,
+    и админ-панель (summary), поэтому цифры в них совпадают.
+    Реестр метрик свой, а не глобальный: повторное создание объекта
+    (например, в тестах) не конфликтует с уже зарегистрированными именами.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self.stage_seconds = Histogram(
+            "deposit_recommend_stage_seconds",
+            "Время этапов /recommend",
+            ["stage"],
+            buckets=STAGE_BUCKETS,
+            registry=self.registry,
+        )
+        self.candidates = Histogram(
+            "deposit_recommend_candidates",
+            "Размер набора кандидатов после фильтрации",
+            buckets=CANDIDATE_BUCKETS,
+            registry=self.registry,
+        )
+        self.outcomes = Counter(
+            "deposit_recommend_results",
+            "Ответы /recommend по исходу: ok, empty, fallback, rejected, "
+            "unavailable, warming_up",
+            ["outcome"],
+            registry=self.registry,
+        )
+        self.tiers = Counter(
+            "deposit_recommend_tier",
+            "Ответы /recommend по уровню обслуживания (порядку выдачи)",
+            ["tier"],
+            registry=self.registry,
+        )
+        self.refresh_stage_seconds = Histogram(
+            "deposit_refresh_stage_seconds",
+            "Время этапов фонового обновления",
+            ["stage", "status"],
+            buckets=REFRESH_BUCKETS,
+            registry=self.registry,
+        )
+        self.refresh_runs = Counter(
+            "deposit_refresh_runs",
+            "Запуски фонового обновления по результату: updated, unchanged, error",
+            ["result"],
+            registry=self.registry,
+        )
+        self.refresh_progress = Gauge(
+            "deposit_refresh_progress",
+            "Прогресс текущего обновления, %",
+            registry=self.registry,
+        )
+        self.sync_seconds = Histogram(
+            "deposit_catalog_sync_seconds",
+            "Время применения изменений таблицы к каталогу по результату: "
+            "patched, unchanged, rejected",
+            ["result"],
+            buckets=REFRESH_BUCKETS,
+            registry=self.registry,
+        )
+        self._sources = []
+        self.registry.register(_SourcesCollector(self))
+
+    def watch(self, *status_fns):
+        """
+        Подключает источники состояния — функции без аргументов,
+        возвращающие словарь (registry.status, executor.stats, cache.stats).
+        """
+        self._sources.extend(status_fns)
+
+    def sources(self) -> dict:
+        """Текущие значения всех подключённых источников одним словарём"""
+        merged = {}
+        for fn in self._sources:
+            merged.update(fn())
+        return merged
+
+    def observe_recommend(self, result: dict, timings: dict):
+        """
+        Учитывает один ответ /recommend: время этапов (мс), размер набора
+        кандидатов, уровень обслуживания и исход подбора.
+        """
+        for stage, ms in timings.items():
+            self.stage_seconds.labels(stage).observe(ms / 1000)
+        if "candidates" in result:
+            self.candidates.observe(result["candidates"])
+        if result.get("sort_by"):
+            self.tiers.labels(result["sort_by"]).inc()
+        if result.get("candidates") == 0:
+            outcome = "empty"
+        elif result.get("error"):
+            outcome = "unavailable"
+        elif result.get("fallback"):
+            outcome = "fallback"
+        else:
+            outcome = "ok"
+        self.outcomes.labels(outcome).inc()
+
+    def observe_rejected(self):
+        """Запрос отклонён из-за переполнения очереди (429)"""
+        self.outcomes.labels("rejected").inc()
+
+    def observe_refresh_stage(self, stage: str, status: str, seconds: float):
+        self.refresh_stage_seconds.labels(stage, status).observe(seconds)
+
+    def observe_sync(self, result: str, seconds: float):
+        self.sync_seconds.labels(result).observe(seconds)
+
+    def _value(self, name: str, labels: dict | None = None) -> float:
+        return self.registry.get_sample_value(name, labels or {}) or 0.0
+
+    def summary(self) -> dict:
+        """
+        Сводка для админ-панели: источники состояния, счётчики исходов
+        и среднее время этапов /recommend (мс) по тем же метрикам,
+        что отдаются в /metrics.
+        """
+        outcomes = {
+            outcome: int(
+                self._value("deposit_recommend_results_total", {"outcome": outcome})
+            )
+            for outcome in (
+                "ok",
+                "empty",
+                "fallback",
+                "rejected",
+                "unavailable",
+                "warming_up",
+            )
+        }
+        stage_ms = {}
+        for stage in ("queue", "cache", "filter", "rank", "render"):
+            labels = {"stage": stage}
+            count = self._value("deposit_recommend_stage_seconds_count", labels)
+            if count:
+                total = self._value("deposit_recommend_stage_seconds_sum", labels)
+                stage_ms[stage] = round(total / count * 1000, 3)
+        sources = self.sources()
+        served = {
+            tier: int(self._value("deposit_recommend_tier_total", {"tier": tier}))
+            for tier in sources.get("tier_cost_ms", {})
+        }
+        return {
+            **sources,
+            "recommend_results": outcomes,
+            "recommend_stage_ms": stage_ms,
+            "recommend_tiers": served,
+        }
+
+    def render(self) -> tuple[bytes, str]:
+        """Текст метрик в формате Prometheus и его Content-Type"""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
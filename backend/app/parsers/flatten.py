@@ -0,0 +1,113 @@
+"""Развёртка ответа valQvbGroup (valQvbList → csQvbList → qvbList → dcfTarList)
+в колоночные массивы и векторизованный выбор максимальной ставки по ключу.
+
+Не зависит ни от сети, ни от БД: на вход — уже разобранный JSON
+одной или нескольких групп/регионов (terrBankCode).
+"""
+import numpy as np
+import pandas as pd
+
+CURRENCIES = {643: "RUB", 810: "RUB", 840: "USD", 978: "EUR"}
+DEDUP_KEY = ["name", "term_months", "payout_mode", "min_amount"]
+COLUMNS = [
+    "name",
+    "term_months",
+    "rate",
+    "can_replenish",
+    "min_amount",
+    "currency",
+    "payout_mode",
+]
+
+
+def flatten_columns(payloads: dict | list[dict]) -> dict[str, np.ndarray]:
+    """
+    Разворачивает один или несколько ответов в колоночные массивы
+    (по элементу на тариф dcfTarList), без дедупликации.
+
+    Атрибуты вклада собираются по одному разу на qvbList и размножаются
+    на его тарифы через np.repeat, а не копируются в словарь на каждый тариф.
+    """
+    if isinstance(payloads, dict):
+        payloads = [payloads]
+
+    deposits, currencies = [], []
+    for data in payloads:
+        for block in data.get("valQvbList", []):
+            before = len(deposits)
+            for cs in block.get("csQvbList", []):
+                deposits.extend(cs.get("qvbList", []))
+            currency = CURRENCIES.get(block["currencyCode"], "RUB")
+            currencies.extend([currency] * (len(deposits) - before))
+
+    tariffs = [q.get("dcfTarList", []) for q in deposits]
+    counts = np.fromiter(map(len, tariffs), dtype=np.int64, count=len(tariffs))
+    flat = [t for group in tariffs for t in group]
+
+    def per_deposit(values, dtype):
+        return np.repeat(np.array(values, dtype=dtype), counts)
+
+    return {
+        "name": per_deposit(
+            [q.get("depositShortName") or q["depositName"] for q in deposits], object
+        ),
+        "term_months": per_deposit([q.get("begTerm", 0) for q in deposits], np.int64),
+        "rate": np.array([t["rate"] for t in flat], dtype=np.float64),
+        "can_replenish": per_deposit(
+            [bool(q.get("isReplenish", False)) for q in deposits], bool
+        ),
+        # Тип суммы выводится из данных: целые суммы остаются целыми в записях
+        "min_amount": np.array([t["sumBeg"] for t in flat]),
+        "currency": per_deposit(currencies, object),
+        "payout_mode": per_deposit(["end"] * len(deposits), object),
+    }
+
+
+def key_codes(columns: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Номер ключа дедупликации для каждой строки, в порядке первого появления.
+
+    Каждая колонка ключа факторизуется отдельно (хэш по одному массиву
+    быстрее, чем по кортежам), и коды объединяются в смешанной системе
+    счисления: combined * len(uniques) + codes однозначен, пока коды лежат
+    в [0, len(uniques)). Поэтому пропуски (None/NaN) получают собственный
+    код, а не -1, иначе ключ с пропуском совпал бы с соседним. После
+    каждой колонки номера сжимаются повторной факторизацией, чтобы
+    произведение числа уникальных значений не переполнило int64.
+    """
+    combined = np.zeros(len(columns["rate"]), dtype=np.int64)
+    for col in DEDUP_KEY:
+        codes, uniques = pd.factorize(columns[col], use_na_sentinel=False)
+        combined = pd.factorize(combined * len(uniques) + codes)[0]
+    return combined
+
+
+def dedupe_max_rate(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Оставляет по одной строке на (name, term_months, payout_mode, min_amount)
+    с максимальной ставкой — групповой редукцией вместо словаря в цикле.
+
+    Порядок и выбор при равных ставках совпадают с прежним циклом:
+    ключи идут в порядке первого появления, из равных берётся первая строка.
+    """
+    n = len(columns["rate"])
+    if n == 0:
+        return columns
+    codes = key_codes(columns)
+    # Внутри ключа: сначала максимальная ставка, при равенстве — более ранняя строка
+    order = np.lexsort((np.arange(n), -columns["rate"], codes))
+    first = np.ones(n, dtype=bool)
+    first[1:] = codes[order][1:] != codes[order][:-1]
+    picked = order[first]
+    return {col: values[picked] for col, values in columns.items()}
+
+
+def to_records(columns: dict[str, np.ndarray]) -> list[dict]:
+    """Преобразует колонки в список словарей для upsert в БД"""
+    lists = [columns[col].tolist() for col in COLUMNS]
+    return [dict(zip(COLUMNS, row)) for row in zip(*lists)]
+
+
+def flatten_records(payloads: dict | list[dict]) -> list[dict]:
+    """Развёртка ответов и выбор максимальной ставки; результат — записи для БД"""
+    return to_records(dedupe_max_rate(flatten_columns(payloads)))
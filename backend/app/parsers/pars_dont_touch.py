@@ -6,11 +6,11 @@ from pathlib import Path
 
 import requests
 from dotenv import load_dotenv
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from backend.app.db.models import Deposit
+from backend.app.crud.deposit_crud import bulk_upsert_deposits
+from backend.app.parsers.flatten import flatten_records
 
 """Этот скрипт перезапишет таблицу в БД лучше не трогать!!!!
    Просто для ознакомления!
@@ -39,22 +39,9 @@ HEADERS = {
 }
 
 
-async def upsert_deposits(session: AsyncSession, records: list[dict]):
-    if not records:
-        return
-    # Построение SQL-запроса для вставки с обновлением при конфликте
-    stmt = insert(Deposit).values(records)
-    stmt = stmt.on_conflict_do_update(
-        index_elements=["name", "term_months", "payout_mode", "min_amount"],
-        set_={
-            "rate": stmt.excluded.rate,
-            "can_replenish": stmt.excluded.can_replenish,
-            "currency": stmt.excluded.currency,
-            "min_amount": stmt.excluded.min_amount,
-        },
-    )
-    await session.execute(stmt)
-    await session.commit()
+async def upsert_deposits(session: AsyncSession, records: list[dict]) -> dict:
+    # Общий массовый upsert: порции или COPY, неизменённые строки пропускаются
+    return await bulk_upsert_deposits(session, records)
 
 
 async def main():
@@ -72,38 +59,8 @@ async def main():
     )
     print(f"Raw JSON saved to {raw_path}")
 
-    # Парсим и собираем нужные поля из JSON-ответа
-    records_raw = []
-    for block in data.get("valQvbList", []):
-        currency = {643: "RUB", 810: "RUB", 840: "USD", 978: "EUR"}.get(
-            block["currencyCode"], "RUB"
-        )
-        for cs in block.get("csQvbList", []):
-            for q in cs.get("qvbList", []):
-                name = q.get("depositShortName") or q["depositName"]
-                term_m = q.get("begTerm", 0)
-                can_repl = bool(q.get("isReplenish", False))  # ← вот здесь
-                for t in q.get("dcfTarList", []):
-                    records_raw.append(
-                        {
-                            "name": name,
-                            "term_months": term_m,
-                            "rate": t["rate"],
-                            "can_replenish": can_repl,
-                            "min_amount": t["sumBeg"],
-                            "currency": currency,
-                            "payout_mode": "end",
-                        }
-                    )
-
-    # Оставляем уникальные записи, выбирая с максимальной ставкой
-    unique = {}
-    for r in records_raw:
-        key = (r["name"], r["term_months"], r["payout_mode"], r["min_amount"])
-        prev = unique.get(key)
-        if not prev or r["rate"] > prev["rate"]:
-            unique[key] = r
-    records = list(unique.values())
+    # Разворачиваем тарифы и оставляем уникальные записи с максимальной ставкой
+    records = flatten_records(data)
 
     # Логируем распарсенные записи
     print(f"→ Parsed {len(records)} unique rows:")
@@ -119,8 +76,12 @@ async def main():
         engine, class_=AsyncSession, expire_on_commit=False
     )
     async with AsyncSessionLocal() as session:
-        await upsert_deposits(session, records)
-        print(f"[OK] Upserted {len(records)} records into DB")
+        stats = await upsert_deposits(session, records)
+        print(
+            f"[OK] Upserted {len(records)} records into DB: "
+            f"inserted={stats['inserted']} updated={stats['updated']} "
+            f"unchanged={stats['unchanged']}"
+        )
 
 
 if __name__ == "__main__":
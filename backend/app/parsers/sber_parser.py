@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Инкрементальный парсер вкладов Сбера по нескольким группам (valQvbGroup).
+
+Группы скачиваются параллельно через общий пул соединений httpx с
+ограничением частоты запросов. Для каждой группы хранится сырой JSON
+(data_sber/calc_<id>.json) и метаданные (ETag, Last-Modified, sha256):
+неизменённые группы отсекаются условным запросом (304) или по хэшу
+содержимого, и в БД уходят только записи изменившихся групп. Кэш
+изменившихся групп записывается только после того, как их записи
+приняты (см. apply в sync_groups), иначе сбой записи в БД оставил бы
+группы «неизменёнными» при следующем прогоне.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import httpx
+
+from backend.app.parsers.flatten import flatten_records
+
+BASE_URL = "https://www.sberbank.com/proxy/services/deposit/dict/depositCalc/valQvbGroup"
+DEFAULT_PARAMS = {"terrBankCode": "038", "timeZone": "0"}
+HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": "https://www.sberbank.com/ru/person/contributions/deposits",
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/115.0.0.0 Safari/537.36"
+    ),
+}
+CACHE_DIR = Path(__file__).parent / "data_sber"
+
+
+class RateLimiter:
+    """Не чаще rate запросов в секунду на все параллельные задачи"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class GroupCache:
+    """
+    Сырые ответы и метаданные по группам на диске:
+    calc_<id>.json и cache_meta.json с ETag, Last-Modified и sha256.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_path = self.cache_dir / "cache_meta.json"
+        self.meta = (
+            json.loads(self.meta_path.read_text(encoding="utf-8"))
+            if self.meta_path.exists()
+            else {}
+        )
+
+    def raw_path(self, group_id: int) -> Path:
+        return self.cache_dir / f"calc_{group_id}.json"
+
+    def digest(self, group_id: int) -> str | None:
+        """sha256 сохранённого ответа (считается по файлу, если метаданных нет)"""
+        entry = self.meta.get(str(group_id), {})
+        if "sha256" in entry:
+            return entry["sha256"]
+        path = self.raw_path(group_id)
+        if path.exists():
+            return content_digest(json.loads(path.read_text(encoding="utf-8")))
+        return None
+
+    def conditional_headers(self, group_id: int) -> dict:
+        """Заголовки условного запроса, если сырой ответ группы сохранён"""
+        if not self.raw_path(group_id).exists():
+            return {}
+        entry = self.meta.get(str(group_id), {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, group_id: int, data: dict, meta: dict):
+        """Сохраняет сырой ответ группы и её метаданные (sha256, ETag, ...)"""
+        self.raw_path(group_id).write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self.meta[str(group_id)] = meta
+
+    def save_meta(self):
+        self.meta_path.write_text(json.dumps(self.meta, indent=2), encoding="utf-8")
+
+
+def content_digest(data: dict) -> str:
+    """Хэш содержимого ответа, не зависящий от форматирования JSON"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def fetch_group(
+    client: httpx.AsyncClient,
+    limiter: RateLimiter,
+    cache: GroupCache,
+    group_id: int,
+    base_url: str = BASE_URL,
+    params: dict = DEFAULT_PARAMS,
+) -> dict:
+    """
+    Скачивает одну группу и сообщает, изменилась ли она:
+    {"group_id", "status": "not_modified" | "unchanged" | "changed", "records"}.
+    Изменившаяся группа несёт ещё "raw" и "meta" для записи в кэш,
+    сам кэш здесь не меняется.
+    """
+    await limiter.wait()
+    response = await client.get(
+        f"{base_url}/{group_id}",
+        params=params,
+        headers=cache.conditional_headers(group_id),
+    )
+    if response.status_code == 304:
+        return {"group_id": group_id, "status": "not_modified", "records": []}
+    response.raise_for_status()
+
+    data = response.json()
+    digest = content_digest(data)
+    if digest == cache.digest(group_id):
+        return {"group_id": group_id, "status": "unchanged", "records": []}
+
+    return {
+        "group_id": group_id,
+        "status": "changed",
+        "records": flatten_records(data),
+        "raw": data,
+        "meta": {
+            "sha256": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        },
+    }
+
+
+async def sync_groups(
+    group_ids: list[int],
+    base_url: str = BASE_URL,
+    params: dict = DEFAULT_PARAMS,
+    cache_dir: Path = CACHE_DIR,
+    concurrency: int = 8,
+    rate: float = 5.0,
+    timeout: float = 20.0,
+    apply=None,
+) -> list[dict]:
+    """
+    Параллельно скачивает группы и возвращает результат по каждой
+    (см. fetch_group). Ошибка одной группы не останавливает остальные:
+    она попадает в результат со статусом "error".
+
+    apply — корутина, принимающая записи изменившихся групп (например,
+    upsert в БД). Кэш этих групп записывается только после её успешного
+    завершения; если она падает, исключение пробрасывается, а кэш
+    остаётся прежним, и следующий прогон скачает группы заново.
+    """
+    cache = GroupCache(cache_dir)
+    limiter = RateLimiter(rate)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        headers=HEADERS, limits=limits, timeout=timeout
+    ) as client:
+        results = await asyncio.gather(
+            *(
+                fetch_group(client, limiter, cache, group_id, base_url, params)
+                for group_id in group_ids
+            ),
+            return_exceptions=True,
+        )
+    results = [
+        {"group_id": group_id, "status": "error", "error": str(result), "records": []}
+        if isinstance(result, Exception)
+        else result
+        for group_id, result in zip(group_ids, results)
+    ]
+
+    changed = [result for result in results if result["status"] == "changed"]
+    if apply is not None and changed:
+        await apply([r for result in changed for r in result["records"]])
+    for result in changed:
+        cache.store(result["group_id"], result.pop("raw"), result.pop("meta"))
+    cache.save_meta()
+    return results
+
+
+async def main(group_ids: list[int], base_url: str, concurrency: int, rate: float):
+    from backend.app.crud.deposit_crud import bulk_upsert_deposits
+    from backend.app.db.database import async_session, engine
+
+    stats = {}
+
+    async def upsert(records: list[dict]):
+        async with async_session() as session:
+            stats.update(await bulk_upsert_deposits(session, records))
+        stats["records"] = len(records)
+
+    try:
+        results = await sync_groups(
+            group_ids,
+            base_url=base_url,
+            concurrency=concurrency,
+            rate=rate,
+            apply=upsert,
+        )
+    finally:
+        await engine.dispose()
+    for result in results:
+        print(
+            f"group={result['group_id']:<6} status={result['status']:<12} "
+            f"records={len(result['records'])} {result.get('error', '')}"
+        )
+
+    if not stats:
+        print("[OK] Изменений нет, БД не трогаем")
+        return
+    print(
+        f"[OK] Upserted {stats['records']} records into DB: "
+        f"inserted={stats['inserted']} updated={stats['updated']} "
+        f"unchanged={stats['unchanged']}"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Парсинг групп вкладов Сбера")
+    parser.add_argument("groups", nargs="+", type=int, help="id групп valQvbGroup")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0, help="запросов в секунду")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.groups, args.base_url, args.concurrency, args.rate))
@@ -0,0 +1,54 @@
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class DepositProfile(BaseModel):
+    """
+    Профиль клиента для подбора вкладов — те же поля, что и в форме /recommend.
+    """
+
+    amount: float
+    term_months: int
+    can_replenish: Literal["any", "yes", "no"] = "any"
+    risk_tolerance: str = "low"
+    goal: str = "accumulation"
+    monthly_topup: float = Field(0.0, ge=0)
+
+
+class BatchRecommendRequest(BaseModel):
+    """
+    Запрос пакетного подбора вкладов для множества профилей.
+    """
+
+    profiles: list[DepositProfile]
+    top_k: int = Field(11, ge=1, le=100)
+    # Порядок выдачи, по умолчанию как в /recommend — по доходу
+    sort_by: Literal["income", "rate"] = "income"
+
+
+class DepositOut(BaseModel):
+    """
+    Вклад из таблицы deposits в ответе /deposits.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    rate: float
+    term_months: int
+    can_replenish: bool
+    min_amount: float
+    currency: str
+    payout_mode: str
+
+
+class DepositPage(BaseModel):
+    """
+    Страница /deposits: вклады, курсор следующей страницы и версия каталога.
+    """
+
+    items: list[DepositOut]
+    next_cursor: str | None = None
+    version: int
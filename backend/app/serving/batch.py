@@ -0,0 +1,230 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.ranking import RankingIndex, preference_key
+from backend.app.serving.recommend import DEFAULT_SORT
+
+# Сколько вкладов показывается пользователю (top3 + next3 + hidden)
+TOP_K = 11
+# Сколько вкладов отдаётся по ставке, если ни один не прошёл порог
+FALLBACK_TOP = 5
+
+REPLENISH_CODES = {"any": 0, "yes": 1, "no": 2}
+REPLENISH_NAMES = {code: name for name, code in REPLENISH_CODES.items()}
+
+# Массивы ранжировщика, которые можно сохранить и отобразить в память
+RANKER_ARRAYS = ("amount_levels", "term_levels", "ids", "probability")
+
+
+class BatchRanker:
+    """
+    Подбор вкладов сразу для множества профилей.
+
+    Сумма и срок профиля сводятся к уровням среди различных значений
+    min_amount и term_months каталога, склонность к риску и цель — к кодам
+    preference_key. Одинаковые (с точки зрения каталога) профили
+    схлопываются, и каждый уникальный ключ ранжируется один раз по
+    индексу выдачи (RankingIndex) — тому же, что и в /recommend, поэтому
+    семантика совпадает: фильтр по сумме, сроку и пополнению, порог
+    threshold, порядок по уровню предпочтения и ставке или доходу,
+    при пустом результате — топ-5 кандидатов.
+
+    Доход линеен по сумме и взносу, поэтому порядок по доходу одинаков
+    у профилей с одним ключом и одним отношением взноса к сумме (как
+    ordering_key в кэше /recommend). Такие профили ранжируются один раз,
+    а доход выданных вкладов для всех них считается одной матрицей
+    IncomeEngine.project_matrix.
+    """
+
+    def __init__(
+        self,
+        catalog: pd.DataFrame,
+        threshold: float,
+        ranking: RankingIndex | None = None,
+    ):
+        self.amount_levels = np.unique(catalog["min_amount"].to_numpy())
+        self.term_levels = np.unique(catalog["term_months"].to_numpy())
+        self.ids = catalog["id"].to_numpy()
+        self.probability = catalog["probability"].to_numpy()
+        if ranking is None:
+            ranking = RankingIndex(catalog, threshold)
+        self.ranking = ranking
+
+    def arrays(self) -> dict:
+        """Массивы ранжировщика для сохранения (см. from_arrays)"""
+        return {name: getattr(self, name) for name in RANKER_ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, ranking: RankingIndex) -> "BatchRanker":
+        """Восстанавливает ранжировщик из массивов arrays() без пересчёта"""
+        ranker = cls.__new__(cls)
+        for name in RANKER_ARRAYS:
+            setattr(ranker, name, arrays[name])
+        ranker.ranking = ranking
+        return ranker
+
+    def profile_keys(
+        self, amount, term_months, can_replenish, risk_tolerance=None, goal=None
+    ) -> np.ndarray:
+        """
+        Нормализует профили до уровней каталога: профили с одинаковым
+        ключом получают одинаковую выдачу. Последние две колонки —
+        предпочтения по риску и цели (см. preference_key).
+        """
+        amount_key = np.searchsorted(
+            self.amount_levels, np.asarray(amount, dtype=float), side="right"
+        )
+        term_key = np.searchsorted(
+            self.term_levels, np.asarray(term_months, dtype=float), side="right"
+        )
+        replenish_key = np.array(
+            [REPLENISH_CODES.get(value, 0) for value in can_replenish]
+        )
+        if risk_tolerance is None:
+            risk_tolerance = [None] * len(replenish_key)
+        if goal is None:
+            goal = [None] * len(replenish_key)
+        preference = np.array(
+            [preference_key(r, g) for r, g in zip(risk_tolerance, goal)]
+        ).reshape(-1, 2)
+        return np.column_stack([amount_key, term_key, replenish_key, preference])
+
+    @cached_property
+    def _index_rows(self) -> np.ndarray:
+        """Строка индекса выдачи по позиции в каталоге (для IncomeEngine)"""
+        rows = np.empty(len(self.ranking.positions), dtype=np.intp)
+        rows[self.ranking.positions] = np.arange(len(rows))
+        return rows
+
+    def rank(
+        self,
+        keys: np.ndarray,
+        top_k: int = TOP_K,
+        sort_by: str = "rate",
+        amounts=None,
+        monthly_topups=None,
+    ) -> list[dict]:
+        """
+        Возвращает рекомендации для каждой строки keys:
+        {"recommendations": [{"id", "probability"}, ...], "fallback": bool}.
+
+        amounts и monthly_topups — суммы и взносы самих профилей: с ними
+        к рекомендациям добавляется доход за срок ("income", ₽), они же
+        нужны для порядка по доходу (sort_by="income").
+        """
+        if len(keys) == 0:
+            return []
+        with_income = amounts is not None
+        if amounts is None:
+            amounts = np.zeros(len(keys))
+        amounts = np.asarray(amounts, dtype=float)
+        topups = np.zeros_like(amounts)
+        if monthly_topups is not None:
+            topups = np.maximum(np.asarray(monthly_topups, dtype=float), 0.0)
+        groups = keys
+        if sort_by == "income":
+            ratio = np.divide(
+                topups, amounts, out=np.zeros_like(amounts), where=amounts > 0
+            )
+            groups = np.column_stack([keys, ratio])
+        unique_keys, inverse = np.unique(groups, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        results = [None] * len(keys)
+        members = np.argsort(inverse, kind="stable")
+        sizes = np.bincount(inverse, minlength=len(unique_keys))
+        for key, rows in zip(unique_keys, np.split(members, np.cumsum(sizes)[:-1])):
+            key = key[:5].astype(int)
+            # Порядок по доходу одинаков для всей группы — считаем по первому
+            first = rows[0]
+            picked, fallback = self._pick(
+                key, top_k, sort_by, amounts[first], topups[first]
+            )
+            ids = self.ids[picked].tolist()
+            probability = self.probability[picked].tolist()
+            income = None
+            if with_income and len(picked):
+                # Срок вклада не больше срока профиля, так что уровня срока
+                # достаточно: доход считается за весь срок вклада
+                income = self.ranking.income.project_matrix(
+                    amounts[rows],
+                    self.term_levels[key[1] - 1],
+                    topups[rows],
+                    self._index_rows[picked],
+                ).round(2)
+            for n, row in enumerate(rows):
+                recommendations = [
+                    {"id": deposit_id, "probability": proba}
+                    for deposit_id, proba in zip(ids, probability)
+                ]
+                if income is not None:
+                    for rec, value in zip(recommendations, income[n].tolist()):
+                        rec["income"] = value
+                results[row] = {
+                    "recommendations": recommendations,
+                    "fallback": fallback,
+                }
+        return results
+
+    def _pick(
+        self,
+        key: np.ndarray,
+        top_k: int,
+        sort_by: str,
+        amount: float,
+        monthly_topup: float,
+    ) -> tuple[np.ndarray, bool]:
+        """Позиции выданных вкладов для ключа профиля и признак fallback"""
+        amount_key, term_key, replenish_key, max_risk, goal = key.tolist()
+        # Уровень 0 означает «меньше любого значения в каталоге»
+        level = self.amount_levels[amount_key - 1] if amount_key else -np.inf
+        term = self.term_levels[term_key - 1] if term_key else -np.inf
+        if sort_by == "income":
+            # Строки те же, что и для уровня суммы, а доход — на сумму профиля
+            level = amount if amount_key else -np.inf
+        query = (level, term, REPLENISH_NAMES[replenish_key], (max_risk, goal))
+        order = {"sort_by": sort_by, "monthly_topup": monthly_topup}
+
+        picked = self.ranking.select(*query, top_k, **order)
+        # Для профилей без прошедших порог берём лучших кандидатов
+        fallback = len(picked) == 0
+        if fallback:
+            picked = self.ranking.select(
+                *query, min(top_k, FALLBACK_TOP), require_passed=False, **order
+            )
+        return picked, bool(fallback and len(picked))
+
+
+def iter_batch(
+    ranker: BatchRanker,
+    profiles: list,
+    top_k: int = TOP_K,
+    chunk_size: int = 1000,
+    sort_by: str = DEFAULT_SORT,
+):
+    """
+    Ранжирует профили блоками и отдаёт результаты по одному,
+    чтобы большой пакет можно было стримить без накопления ответа в памяти.
+    Порядок выдачи по умолчанию — как в /recommend (по доходу), к каждой
+    рекомендации добавляется доход на сумму профиля с его взносом.
+    """
+    for start in range(0, len(profiles), chunk_size):
+        chunk = profiles[start : start + chunk_size]
+        keys = ranker.profile_keys(
+            [p.amount for p in chunk],
+            [p.term_months for p in chunk],
+            [p.can_replenish for p in chunk],
+            [p.risk_tolerance for p in chunk],
+            [p.goal for p in chunk],
+        )
+        results = ranker.rank(
+            keys,
+            top_k,
+            sort_by,
+            [p.amount for p in chunk],
+            [getattr(p, "monthly_topup", 0.0) for p in chunk],
+        )
+        for offset, result in enumerate(results):
+            yield {"index": start + offset, **result}
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecommendationCache:
+    """
+    LRU-кэш результатов подбора с ограничением времени жизни записей.
+
+    Ключ — профиль, нормализованный к границам каталога
+    (CandidateIndex.profile_key), поэтому разные суммы и сроки,
+    дающие одинаковый набор кандидатов, делят одну запись.
+    Записи привязаны к версии снимка: при первом обращении с новой
+    версией (перезагрузка модели или каталога) кэш очищается.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._version = None
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version, key, *fallbacks):
+        """
+        Возвращает сохранённый результат по key или, если его нет,
+        по первому найденному из fallbacks; None — промах. Один вызов
+        учитывается как одно попадание или один промах.
+        """
+        with self._lock:
+            self._check_version(version)
+            now = time.monotonic()
+            for candidate in (key, *fallbacks):
+                entry = self._entries.get(candidate)
+                if entry is not None and now - entry[0] > self.ttl:
+                    del self._entries[candidate]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(candidate)
+                    self.hits += 1
+                    return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, version, key, value):
+        """Сохраняет результат, вытесняя самую давно использованную запись"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Принудительная очистка (например, после обновления данных)"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов для админ-панели"""
+        total = self.hits + self.misses
+        return {
+            "cache_size": len(self._entries),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "cache_invalidations": self.invalidations,
+        }
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from backend.app.serving.recommend import compute_recommendations
+
+
+class QueueFullError(Exception):
+    """Очередь инференса заполнена — запрос нужно отклонить (HTTP 429)"""
+
+
+def _timed_call(fn, *args):
+    """Выполняет fn в воркере и возвращает время старта для расчёта ожидания в очереди"""
+    return time.time(), fn(*args)
+
+
+class InferenceExecutor:
+    """
+    Ограниченный пул для CPU-нагруженной части /recommend.
+
+    kind="thread" — пул потоков с общим снимком модели в памяти процесса;
+    kind="process" — пул процессов, каждый из которых при старте сам
+    загружает модель и каталог (см. init_worker).
+
+    Одновременно выполняется не больше max_workers задач и ещё не больше
+    max_queue ждут своей очереди; остальные запросы сразу получают
+    QueueFullError, чтобы сервер не копил бесконечную очередь под нагрузкой.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int | None = None,
+        max_queue: int = 64,
+        initializer=None,
+        initargs: tuple = (),
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(
+                self.max_workers, initializer=initializer, initargs=initargs
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="inference"
+            )
+
+    async def run(self, fn, *args):
+        """
+        Выполняет fn(*args) в пуле.
+        Возвращает (результат, время ожидания в очереди в мс).
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise QueueFullError("Сервер перегружен, повторите запрос позже")
+
+        self.pending += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, result = await loop.run_in_executor(
+                self._pool, partial(_timed_call, fn, *args)
+            )
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result, max(0.0, (started - submitted) * 1000)
+
+    @property
+    def queued(self) -> int:
+        """Сколько запросов ждут свободного воркера"""
+        return max(0, self.pending - self.max_workers)
+
+    def stats(self) -> dict:
+        """Состояние пула для админ-панели"""
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "queue_limit": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Реестр снимков внутри процесса-воркера (только для kind="process")
+_worker_registry = None
+# Обслужил ли воркер хотя бы один запрос (первый ждал запуска процесса)
+_worker_warm = False
+
+
+def init_worker(model_path, csv_path, shared_dir=None):
+    """
+    Инициализатор процесса-воркера: загружает модель и каталог один раз
+    (с shared_dir — подключается к общему снимку вместо своей копии)
+    """
+    global _worker_registry
+    from backend.app.serving.registry import SnapshotRegistry
+
+    _worker_registry = SnapshotRegistry(model_path, csv_path, shared_dir)
+    _worker_registry.reload()
+
+
+def recommend_in_worker(
+    amount: float,
+    term_months: int,
+    can_replenish: str,
+    risk_tolerance: str | None = None,
+    goal: str | None = None,
+    monthly_topup: float = 0.0,
+    sort_by: str = "income",
+) -> dict:
+    """
+    Подбор вкладов в процессе-воркере по его собственному снимку.
+    Первый ответ воркера помечается "cold": его ожидание в очереди
+    включает запуск процесса и загрузку снимка (init_worker).
+    """
+    global _worker_warm
+    _worker_registry.refresh_if_changed()
+    result = compute_recommendations(
+        _worker_registry.current,
+        amount,
+        term_months,
+        can_replenish,
+        risk_tolerance,
+        goal,
+        monthly_topup,
+        sort_by,
+    )
+    if not _worker_warm:
+        _worker_warm = True
+        result["cold"] = True
+    return result
@@ -0,0 +1,165 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.app.artifacts import FOREST_SUFFIX
+from backend.app.catalog.storage import file_digest, replace_directory
+
+FOREST_ARRAYS = ("feature", "threshold", "children", "value", "roots")
+# Сколько строк обходится за раз: память ~ строк × деревьев × 8 байт
+CHUNK_ROWS = 8192
+
+
+def export_forest(
+    clf, path: str | Path, threshold: float, source: str | Path | None = None
+) -> Path:
+    """
+    Упаковывает обученный RandomForestClassifier в плоские массивы узлов
+    всех деревьев подряд: признак (-1 у листа), порог, пара потомков
+    (левый, правый) и доли классов в узле, плюс meta.json с признаками
+    и порогом. Запись атомарная, как у колоночного каталога.
+
+    source — путь к .joblib той же модели: его контрольная сумма
+    сохраняется в meta.json, чтобы не подхватить лес от старой модели.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    parts = {name: [] for name in FOREST_ARRAYS}
+    offset = 0
+    for estimator in clf.estimators_:
+        tree = estimator.tree_
+        leaf = tree.children_left < 0
+        value = tree.value[:, 0, :]
+        parts["feature"].append(np.where(leaf, -1, tree.feature))
+        parts["threshold"].append(tree.threshold)
+        children = np.stack([tree.children_left, tree.children_right], axis=1)
+        parts["children"].append(np.where(leaf[:, None], -1, children + offset))
+        # Доли классов в узле (как в DecisionTreeClassifier.predict_proba)
+        parts["value"].append(value / value.sum(axis=1, keepdims=True))
+        parts["roots"].append([offset])
+        offset += tree.node_count
+
+    arrays = {
+        # Индексы сразу в int64, чтобы при загрузке не копировать их из mmap
+        "feature": np.concatenate(parts["feature"]).astype(np.int64),
+        "threshold": np.concatenate(parts["threshold"]).astype(np.float64),
+        "children": np.concatenate(parts["children"]).astype(np.int64),
+        # По строке на класс: при обходе нужен сплошной вектор одного класса
+        "value": np.ascontiguousarray(np.concatenate(parts["value"]).T),
+        "roots": np.array(parts["roots"], dtype=np.int64).ravel(),
+    }
+    for name, values in arrays.items():
+        np.save(tmp_path / f"{name}.npy", values, allow_pickle=False)
+
+    meta = {
+        "n_trees": len(clf.estimators_),
+        "n_nodes": offset,
+        "features": [str(f) for f in clf.feature_names_in_],
+        "classes": np.asarray(clf.classes_).tolist(),
+        "threshold": threshold,
+        "source_digest": file_digest(source) if source else None,
+    }
+    (tmp_path / "meta.json").write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return replace_directory(tmp_path, path)
+
+
+class PackedForest:
+    """
+    Случайный лес, упакованный export_forest, с векторизованным
+    predict_proba без sklearn.
+
+    Массивы узлов отображаются в память только для чтения, поэтому
+    загрузка мгновенная, а воркеры-процессы делят одни и те же страницы.
+    Обход идёт сразу по всем парам (строка, дерево): на каждом шаге
+    активные пары спускаются на уровень вниз, а дошедшие до листа
+    выбывают, так что работа пропорциональна реальной глубине путей.
+    Признаки, как и в sklearn, сравниваются в float32.
+    """
+
+    def __init__(self, path: str | Path, mmap: bool = True):
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.features = meta["features"]
+        self.feature_names_in_ = np.array(self.features, dtype=object)
+        self.classes_ = np.array(meta["classes"])
+        self.threshold = meta["threshold"]
+        arrays = {
+            name: np.asarray(
+                np.load(
+                    self.path / f"{name}.npy",
+                    mmap_mode="r" if mmap else None,
+                    allow_pickle=False,
+                )
+            )
+            for name in FOREST_ARRAYS
+        }
+        self._feature = arrays["feature"].astype(np.intp, copy=False)
+        self._is_leaf = self._feature < 0
+        self._threshold = arrays["threshold"]
+        self._children = arrays["children"].ravel().astype(np.intp, copy=False)
+        self._value = arrays["value"]
+        self._roots = arrays["roots"].astype(np.intp, copy=False)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self._roots)
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def apply(self, X) -> np.ndarray:
+        """Номера листьев (деревья × строки) для каждой строки X"""
+        X = self._matrix(X)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        # Пары упорядочены по деревьям: узлы одного дерева лежат рядом
+        nodes = np.repeat(self._roots, n_rows)
+        pos = np.flatnonzero(~self._is_leaf[nodes])
+        current = nodes[pos]
+        offsets = (pos % n_rows) * n_features
+        while len(current):
+            values = flat[offsets + self._feature[current]]
+            # NaN не проходит сравнение и уходит вправо, как в sklearn
+            go_right = ~(values <= self._threshold[current])
+            current = self._children[current * 2 + go_right]
+            nodes[pos] = current
+            active = ~self._is_leaf[current]
+            current, offsets, pos = current[active], offsets[active], pos[active]
+        return nodes.reshape(self.n_trees, n_rows)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Вероятности классов (строки × классы), как у RandomForestClassifier"""
+        X = self._matrix(X)
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self.apply(X[start : start + CHUNK_ROWS])
+            for k, value in enumerate(self._value):
+                out[start : start + leaves.shape[1], k] = value[leaves].mean(axis=0)
+        return out
+
+
+def forest_source(model_path: str | Path) -> Path:
+    """
+    Путь, с которого следует читать модель: упакованный лес рядом
+    с .joblib, если он есть и собран из этого же .joblib, иначе сам .joblib.
+    """
+    model_path = Path(model_path)
+    packed = model_path.with_suffix(FOREST_SUFFIX)
+    meta_path = packed / "meta.json"
+    if not meta_path.exists():
+        return model_path
+    if model_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("source_digest") != file_digest(model_path):
+            return model_path
+    return packed
@@ -0,0 +1,105 @@
+from time import perf_counter
+
+# Сколько рекомендаций выводится на странице (top3 + next3 + hidden)
+MAX_SHOWN = 11
+# Сколько вкладов показывается, если ни один не прошёл порог
+FALLBACK_SHOWN = 5
+# Порядок выдачи по умолчанию: по доходу на сумму клиента
+DEFAULT_SORT = "income"
+
+
+def compute_recommendations(
+    snapshot,
+    amount: float,
+    term_months: int,
+    can_replenish: str = "any",
+    risk_tolerance: str | None = None,
+    goal: str | None = None,
+    monthly_topup: float = 0.0,
+    sort_by: str = DEFAULT_SORT,
+) -> dict:
+    """
+    Подбирает вклады для одного профиля по снимку модели и каталога.
+
+    Кандидаты — вклады, подходящие по сумме, сроку и пополнению; из них
+    выбираются прошедшие порог вероятности в порядке предпочтения
+    клиента (сначала в пределах склонности к риску, затем по цели)
+    и по доходу за срок на сумму клиента с ежемесячным взносом
+    monthly_topup (sort_by="income") или по ставке (sort_by="rate").
+    Возвращает словарь с ошибкой или списком рекомендаций (с доходом
+    в поле "income"), порогом, версией модели, порядком выдачи
+    и временем этапов (мс).
+    Не зависит от FastAPI, поэтому может выполняться как в потоке,
+    так и в отдельном процессе.
+    """
+    timings = {}
+    if snapshot is None:
+        return {"error": "Модель или данные не загружены.", "timings": timings}
+
+    # Число кандидатов по сумме, сроку и пополнению считается по индексу
+    # без сборки позиций (при can_replenish == "any" пополнение не фильтруется)
+    started = perf_counter()
+    candidates = snapshot.index.count(amount, term_months, can_replenish)
+    timings["filter"] = (perf_counter() - started) * 1000
+    if candidates == 0:
+        return {
+            "error": "Нет вкладов под ваш запрос",
+            "candidates": 0,
+            "timings": timings,
+        }
+
+    # Первые k по предпочтению и доходу (ставке) из заранее отсортированных
+    # партиций; вероятности и отметка порога посчитаны при загрузке каталога
+    started = perf_counter()
+    profile = (amount, term_months, can_replenish, risk_tolerance, goal)
+    order = {"sort_by": sort_by, "monthly_topup": monthly_topup}
+    positions = snapshot.ranking.top(*profile, k=MAX_SHOWN, **order)
+    # Если рекомендаций нет, возвращаем лучших кандидатов без учёта порога
+    fallback = len(positions) == 0
+    if fallback:
+        positions = snapshot.ranking.top(
+            *profile, k=FALLBACK_SHOWN, require_passed=False, **order
+        )
+    recs = snapshot.catalog.iloc[positions].to_dict("records")
+    recs = attach_income(recs, amount, term_months, monthly_topup)
+    timings["rank"] = (perf_counter() - started) * 1000
+
+    return {
+        "error": None,
+        "recs": recs,
+        "threshold": snapshot.threshold,
+        "model_version": snapshot.version,
+        "sort_by": sort_by,
+        "candidates": candidates,
+        "fallback": fallback,
+        "timings": timings,
+    }
+
+
+def attach_income(
+    recs: list[dict], amount: float, term_months: int, monthly_topup: float = 0.0
+) -> list[dict]:
+    """Добавляет к рекомендациям доход за срок на сумму клиента ("income", ₽)"""
+    from backend.app.catalog.income import IncomeEngine
+
+    if not recs:
+        return recs
+    engine = IncomeEngine.from_catalog(
+        {name: [rec[name] for rec in recs] for name in IncomeEngine.COLUMNS}
+    )
+    income = engine.project(amount, term_months, monthly_topup)
+    return [
+        {**rec, "income": round(float(value), 2)} for rec, value in zip(recs, income)
+    ]
+
+
+def ordering_key(amount: float, sort_by: str, monthly_topup: float = 0.0) -> tuple:
+    """
+    Часть ключа кэша, от которой зависит порядок выдачи сверх профиля.
+    Доход линеен по сумме и взносу, поэтому при одинаковом отношении
+    взноса к сумме порядок по доходу одинаков для любых сумм.
+    """
+    if sort_by != "income":
+        return ("rate",)
+    ratio = monthly_topup / amount if monthly_topup and amount > 0 else 0.0
+    return ("income", ratio)
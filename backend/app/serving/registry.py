@@ -0,0 +1,383 @@
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from backend.app.artifacts import COLUMNAR_SUFFIX, FOREST_SUFFIX
+
+# numpy, pandas и модули каталога импортируются при первой сборке снимка,
+# чтобы импорт сервера не платил за них до начала обслуживания
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from backend.app.catalog.index import CandidateIndex
+    from backend.app.catalog.ranking import RankingIndex
+    from backend.app.serving.batch import BatchRanker
+
+
+@dataclass(frozen=True)
+class ServingSnapshot:
+    """
+    Неизменяемый набор всего, что нужно для обслуживания /recommend:
+    модель, порог, каталог с посчитанными вероятностями, индексы кандидатов
+    и выдачи и ранжировщик для пакетных запросов.
+
+    Запрос берёт ссылку на снимок один раз и работает с ней до конца,
+    поэтому подмена снимка в реестре не затрагивает запросы «в полёте».
+    """
+
+    version: int
+    loaded_at: datetime
+    pipeline: object
+    threshold: float
+    catalog: "pd.DataFrame"
+    index: "CandidateIndex"
+    ranking: "RankingIndex"
+    batch: "BatchRanker"
+    stamp: tuple
+    # Снимок подключён из общего сегмента (см. serving/shared.py)
+    shared: bool = False
+
+
+def files_stamp(*paths: Path) -> tuple:
+    """Отпечаток файлов (mtime и размер) для отслеживания изменений на диске"""
+    return tuple(
+        (path.stat().st_mtime_ns, path.stat().st_size) if path.exists() else None
+        for path in paths
+    )
+
+
+def artifact_paths(model_path: Path, csv_path: Path) -> tuple:
+    """
+    Файлы, изменение которых требует пересобрать снимок: модель,
+    упакованный лес и каталог в обоих форматах.
+    """
+    return (
+        model_path,
+        model_path.with_suffix(FOREST_SUFFIX) / "meta.json",
+        csv_path,
+        csv_path.with_suffix(COLUMNAR_SUFFIX) / "schema.json",
+    )
+
+
+def load_model(model_path: Path) -> tuple:
+    """
+    Загружает модель и порог. Упакованный лес (.npforest) читается
+    без sklearn; .joblib — запасной вариант, если леса нет или он
+    собран из другой версии модели.
+    """
+    from backend.app.serving.forest import PackedForest, forest_source
+
+    source = forest_source(model_path)
+    if source.suffix == FOREST_SUFFIX:
+        forest = PackedForest(source)
+        return forest, forest.threshold
+
+    from joblib import load
+
+    artifact = load(model_path)
+    return artifact.get("pipeline"), artifact.get("threshold", 0.2)
+
+
+def build_snapshot(model_path: Path, csv_path: Path, version: int) -> ServingSnapshot:
+    """
+    Загружает модель и каталог, проверяет их и готовит снимок для обслуживания.
+
+    Выбрасывает ValueError, если артефакты отсутствуют или не проходят проверку.
+    """
+    from backend.app.catalog.scoring import (
+        add_derived_features,
+        ensure_id,
+        missing_features,
+        model_features,
+        score_catalog,
+    )
+    from backend.app.catalog.storage import (
+        catalog_source,
+        compact_catalog,
+        format_report,
+        load_catalog,
+        memory_report,
+    )
+    from backend.app.serving.forest import forest_source
+
+    source = catalog_source(csv_path)
+    stamp = files_stamp(*artifact_paths(model_path, csv_path))
+    if not forest_source(model_path).exists():
+        raise ValueError(f"Модель не найдена: {model_path.name}")
+    if not source.exists():
+        raise ValueError(f"CSV файл с данными не найден: {csv_path.name}")
+
+    pipeline, threshold = load_model(model_path)
+    if pipeline is None or not hasattr(pipeline, "predict_proba"):
+        raise ValueError("В артефакте нет модели с predict_proba")
+
+    loaded = ensure_id(load_catalog(source))
+    if loaded.empty:
+        raise ValueError("Каталог вкладов пуст")
+    catalog = compact_catalog(loaded)
+    # Колоночный каталог уже компактен, CSV читается с типами по умолчанию
+    if source.suffix != COLUMNAR_SUFFIX:
+        report = memory_report(loaded, catalog)
+        print(f"[INFO] Каталог в памяти: {format_report(report)}")
+    features = model_features(pipeline)
+    missing_cols = missing_features(catalog)
+    if not missing_cols:
+        catalog = add_derived_features(catalog, features)
+        missing_cols = missing_features(catalog, features)
+    if missing_cols:
+        raise ValueError(f"Отсутствуют признаки: {', '.join(missing_cols)}")
+
+    catalog = score_catalog(catalog, pipeline, features)
+    return assemble_snapshot(catalog, pipeline, threshold, version, stamp)
+
+
+def assemble_snapshot(
+    catalog: "pd.DataFrame",
+    pipeline,
+    threshold: float,
+    version: int,
+    stamp: tuple,
+) -> ServingSnapshot:
+    """Проверяет вероятности уже проскоренного каталога и строит индексы снимка"""
+    import numpy as np
+
+    from backend.app.catalog.index import CandidateIndex
+    from backend.app.catalog.ranking import RankingIndex
+    from backend.app.serving.batch import BatchRanker
+
+    proba = catalog["probability"].to_numpy()
+    if not np.all(np.isfinite(proba)) or proba.min() < 0 or proba.max() > 1:
+        raise ValueError("Модель вернула некорректные вероятности")
+
+    ranking = RankingIndex(catalog, threshold)
+    return ServingSnapshot(
+        version=version,
+        loaded_at=datetime.now(),
+        pipeline=pipeline,
+        threshold=threshold,
+        catalog=catalog,
+        index=CandidateIndex(catalog),
+        ranking=ranking,
+        batch=BatchRanker(catalog, threshold, ranking),
+        stamp=stamp,
+    )
+
+
+def patch_snapshot(
+    snapshot: ServingSnapshot, rows: "pd.DataFrame", deleted, version: int
+) -> ServingSnapshot:
+    """
+    Новый снимок из snapshot с заменёнными строками каталога.
+
+    rows — подготовленные (как в data_prep) новые версии строк: строки
+    с теми же id заменяются, новые добавляются в конец; строки с id
+    из deleted удаляются. Модель прогоняется только по rows, вероятности
+    остальных строк берутся из snapshot, индексы строятся заново.
+    Исходный снимок не меняется (его могут читать запросы «в полёте»).
+    ValueError, если rows нельзя встроить в каталог — например,
+    появилась новая валюта и набор dummy-колонок изменился.
+    """
+    import pandas as pd
+
+    from backend.app.catalog.scoring import (
+        add_derived_features,
+        model_features,
+        score_catalog,
+    )
+    from backend.app.catalog.storage import compact_catalog
+
+    catalog = snapshot.catalog
+    columns = list(catalog.columns)
+    changed = set(deleted)
+    if len(rows):
+        features = model_features(snapshot.pipeline)
+        rows = add_derived_features(rows.reset_index(drop=True), features)
+        unknown = sorted(set(rows.columns) - set(columns))
+        missing = sorted(set(columns) - set(rows.columns) - {"probability"})
+        if unknown or missing:
+            raise ValueError(
+                "Строки не совпадают по колонкам с каталогом "
+                f"(лишние: {unknown}, нет: {missing}), нужна полная пересборка"
+            )
+        rows = score_catalog(rows, snapshot.pipeline, features)[columns]
+        changed |= set(rows["id"].tolist())
+
+    kept = catalog[~catalog["id"].isin(changed)]
+    if len(rows):
+        # Новые значения категорий дописываются в конец словаря, коды
+        # остальных строк не меняются; целые сжимает compact_catalog
+        dtypes = {}
+        for name in columns:
+            dtype = catalog[name].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                values = pd.Index(rows[name].astype(object).unique())
+                new = values.difference(dtype.categories)
+                dtypes[name] = pd.CategoricalDtype(dtype.categories.append(new))
+        kept = pd.concat([kept.astype(dtypes), rows.astype(dtypes)])
+    return assemble_snapshot(
+        compact_catalog(kept.reset_index(drop=True)),
+        snapshot.pipeline,
+        snapshot.threshold,
+        version,
+        snapshot.stamp,
+    )
+
+
+class SnapshotRegistry:
+    """
+    Версионированный реестр снимков модели и каталога.
+
+    Новый снимок собирается и проверяется целиком в стороне, после чего
+    одной операцией присваивания подменяет текущий. Если загрузка
+    не удалась, продолжает работать предыдущая версия.
+
+    С shared_dir воркеры делят один снимок через общий сегмент: первый
+    взявший блокировку собирает и публикует поколение, остальные
+    подключаются к нему; версия снимка равна номеру поколения. Если
+    сегмент недоступен, снимок собирается в процессе, как без shared_dir.
+    """
+
+    def __init__(
+        self, model_path: Path, csv_path: Path, shared_dir: str | Path | None = None
+    ):
+        self.model_path = model_path
+        self.csv_path = csv_path
+        self.shared_dir = shared_dir
+        self._shared = None
+        # Поколение общего сегмента на момент последней попытки загрузки
+        self._attempted_generation = None
+        self.current: ServingSnapshot | None = None
+        self.last_error: str | None = None
+        self._version = 0
+        # Последняя версия, выданная снимку с изменениями из БД (см. patch)
+        self._patched_version = 0
+        # Отпечаток файлов последней попытки загрузки (успешной или нет)
+        self._attempted_stamp = None
+        self._reload_lock = threading.Lock()
+        # Выставляется после первой попытки загрузки (успешной или нет)
+        self._attempted = threading.Event()
+
+    def _stamp(self) -> tuple:
+        return files_stamp(*artifact_paths(self.model_path, self.csv_path))
+
+    def reload(self) -> ServingSnapshot | None:
+        """Синхронно собирает новый снимок и атомарно подменяет текущий"""
+        with self._reload_lock:
+            self._attempted_stamp = self._stamp()
+            try:
+                snapshot = self._load(self._attempted_stamp)
+            except Exception as exc:
+                self.last_error = str(exc)
+                print(f"[WARNING] Снимок не загружен: {exc}")
+                return self.current
+            finally:
+                self._attempted.set()
+            # Поколение общего сегмента могло совпасть по номеру с версией
+            # пропатченного снимка, а кэш подбора различает снимки по версии
+            if snapshot.version <= self._patched_version:
+                snapshot = replace(snapshot, version=self._version + 1)
+            self._version = snapshot.version
+            self.current = snapshot
+            self.last_error = None
+            print(
+                f"[INFO] Загружен снимок v{snapshot.version}: "
+                f"{len(snapshot.catalog)} записей."
+            )
+            return snapshot
+
+    def patch(self, rows, deleted=()) -> ServingSnapshot | None:
+        """
+        Встраивает изменённые строки каталога в текущий снимок
+        (см. patch_snapshot) и атомарно подменяет его снимком новой версии.
+        Файлы на диске не меняются: следующая полная перезагрузка берёт
+        каталог из них. Ошибки сборки пробрасываются вызывающему.
+        """
+        with self._reload_lock:
+            current = self.current
+            if current is None:
+                return None
+            snapshot = patch_snapshot(current, rows, deleted, self._version + 1)
+            self._version = self._patched_version = snapshot.version
+            self.current = snapshot
+            return snapshot
+
+    def _store(self):
+        if self._shared is None:
+            from backend.app.serving.shared import SharedSnapshotStore
+
+            self._shared = SharedSnapshotStore(self.shared_dir)
+        return self._shared
+
+    def _load(self, stamp: tuple) -> ServingSnapshot:
+        """
+        Собирает снимок: из общего сегмента, если он задан, иначе
+        (или если сегмент недоступен) — в памяти процесса.
+        """
+        if self.shared_dir is None:
+            return build_snapshot(self.model_path, self.csv_path, self._version + 1)
+
+        from backend.app.serving.shared import SharedSnapshotError
+
+        store = self._store()
+        self._attempted_generation = store.generation()
+        try:
+            with store.lock():
+                generation = store.generation()
+                if generation is None or store.stamp(generation) != stamp:
+                    # Файлы изменились: этот процесс становится загрузчиком
+                    built = build_snapshot(
+                        self.model_path, self.csv_path, (generation or 0) + 1
+                    )
+                    generation = store.publish(built, self.model_path)
+                snapshot = store.attach(generation)
+        except SharedSnapshotError as exc:
+            print(f"[WARNING] Общий снимок недоступен, загрузка в процессе: {exc}")
+            return build_snapshot(self.model_path, self.csv_path, self._version + 1)
+        self._attempted_generation = generation
+        return snapshot
+
+    def reload_in_background(self) -> threading.Thread | None:
+        """
+        Запускает перезагрузку в фоновом потоке.
+        Если перезагрузка уже идёт, новый поток не создаётся.
+        """
+        if self._reload_lock.locked():
+            return None
+        thread = threading.Thread(target=self.reload, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def warming_up(self) -> bool:
+        """Снимка ещё нет, а первая загрузка не завершилась"""
+        return self.current is None and not self._attempted.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> ServingSnapshot | None:
+        """Ждёт завершения первой загрузки и возвращает текущий снимок"""
+        self._attempted.wait(timeout)
+        return self.current
+
+    def refresh_if_changed(self):
+        """
+        Запускает фоновую перезагрузку, если файлы изменились на диске
+        или другой процесс опубликовал новое поколение общего снимка.
+        """
+        if self._stamp() != self._attempted_stamp or (
+            self.shared_dir is not None
+            and self._store().generation() != self._attempted_generation
+        ):
+            self.reload_in_background()
+
+    def status(self) -> dict:
+        """Текущая версия и время загрузки для админ-панели"""
+        current = self.current
+        return {
+            "warming_up": self.warming_up,
+            "model_version": current.version if current else None,
+            "loaded_at": current.loaded_at.isoformat() if current else None,
+            "rows": len(current.catalog) if current else 0,
+            "shared": bool(current and current.shared),
+            "load_error": self.last_error,
+        }
@@ -0,0 +1,179 @@
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.artifacts import COLUMNAR_SUFFIX, FOREST_SUFFIX
+from backend.app.catalog.index import CandidateIndex
+from backend.app.catalog.ranking import RankingIndex
+from backend.app.catalog.storage import load_columnar, replace_directory, save_catalog
+from backend.app.serving.batch import BatchRanker
+from backend.app.serving.forest import PackedForest, forest_source
+from backend.app.serving.registry import ServingSnapshot
+
+# Файл с номером последнего опубликованного поколения
+CURRENT_FILE = "CURRENT"
+# Файл межпроцессной блокировки загрузчика
+LOCK_FILE = ".lock"
+
+CATALOG_DIR = "catalog" + COLUMNAR_SUFFIX
+FOREST_DIR = "model" + FOREST_SUFFIX
+INDEX_DIR = "index"
+RANKING_DIR = "ranking"
+BATCH_DIR = "batch"
+
+
+class SharedSnapshotError(Exception):
+    """Общий сегмент недоступен или повреждён — нужна загрузка в процессе"""
+
+
+class SharedSnapshotStore:
+    """
+    Общий для воркеров сегмент со снимком модели и каталога.
+
+    Каталог сохраняется уже проскоренным (с колонкой probability) в
+    колоночном формате, рядом лежат упакованный лес и массивы индексов
+    кандидатов и выдачи и пакетного ранжировщика. Каждое поколение —
+    отдельная директория gen-<N>, файл CURRENT указывает на последнее.
+    Загрузчик (первый процесс, взявший блокировку) собирает снимок и
+    публикует новое поколение, остальные воркеры отображают его массивы
+    в память только для чтения. Если root лежит в /dev/shm, страницы
+    каталога и модели существуют в одном экземпляре на всю машину.
+    """
+
+    def __init__(self, root: str | Path, keep: int = 2):
+        self.root = Path(root)
+        # Сколько последних поколений хранить (старые могут ещё читать воркеры)
+        self.keep = keep
+
+    def path(self, generation: int) -> Path:
+        return self.root / f"gen-{generation:06d}"
+
+    def generation(self) -> int | None:
+        """Номер последнего опубликованного поколения или None"""
+        try:
+            return int((self.root / CURRENT_FILE).read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def lock(self):
+        """Эксклюзивная блокировка публикации между процессами"""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            lock_file = open(self.root / LOCK_FILE, "w")
+        except OSError as exc:
+            raise SharedSnapshotError(f"Нет доступа к {self.root}: {exc}") from exc
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stamp(self, generation: int) -> tuple | None:
+        """Отпечаток исходных файлов, из которых собрано поколение"""
+        try:
+            meta = json.loads((self.path(generation) / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+        return tuple(tuple(item) if item else None for item in meta["stamp"])
+
+    def publish(self, snapshot: ServingSnapshot, model_path: Path) -> int:
+        """
+        Записывает снимок новым поколением и переключает на него CURRENT.
+        Вызывается под lock(). Возвращает номер поколения.
+        """
+        generation = (self.generation() or 0) + 1
+        path = self.path(generation)
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            tmp_path.mkdir(parents=True)
+            save_catalog(snapshot.catalog, tmp_path / CATALOG_DIR)
+            save_arrays(snapshot.index.arrays(), tmp_path / INDEX_DIR)
+            save_arrays(snapshot.ranking.arrays(), tmp_path / RANKING_DIR)
+            save_arrays(snapshot.batch.arrays(), tmp_path / BATCH_DIR)
+            forest = forest_source(model_path)
+            if forest.suffix == FOREST_SUFFIX:
+                shutil.copytree(forest, tmp_path / FOREST_DIR)
+            meta = {
+                "generation": generation,
+                "threshold": snapshot.threshold,
+                "stamp": snapshot.stamp,
+                "created": datetime.now().isoformat(),
+            }
+            (tmp_path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            replace_directory(tmp_path, path)
+
+            current_tmp = self.root / (CURRENT_FILE + ".tmp")
+            current_tmp.write_text(str(generation))
+            os.replace(current_tmp, self.root / CURRENT_FILE)
+        except (OSError, ValueError) as exc:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise SharedSnapshotError(f"Не удалось опубликовать снимок: {exc}") from exc
+        self._prune(generation)
+        return generation
+
+    def attach(self, generation: int) -> ServingSnapshot:
+        """
+        Подключается к опубликованному поколению: колонки каталога,
+        массивы леса, индексов и ранжировщика отображаются в память только
+        для чтения, в процессе не пересчитывается ничего.
+        """
+        path = self.path(generation)
+        try:
+            meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+            catalog = load_columnar(path / CATALOG_DIR, mmap=True)
+            forest = path / FOREST_DIR
+            pipeline = None
+            if (forest / "meta.json").exists():
+                pipeline = PackedForest(forest)
+            index = CandidateIndex.from_arrays(load_arrays(path / INDEX_DIR))
+            ranking = RankingIndex.from_arrays(load_arrays(path / RANKING_DIR))
+            batch = BatchRanker.from_arrays(load_arrays(path / BATCH_DIR), ranking)
+        except (OSError, ValueError, KeyError) as exc:
+            message = f"Поколение {generation} недоступно: {exc}"
+            raise SharedSnapshotError(message) from exc
+        return ServingSnapshot(
+            version=generation,
+            loaded_at=datetime.now(),
+            pipeline=pipeline,
+            threshold=meta["threshold"],
+            catalog=catalog,
+            index=index,
+            ranking=ranking,
+            batch=batch,
+            stamp=self.stamp(generation),
+            shared=True,
+        )
+
+    def _prune(self, generation: int):
+        """Удаляет поколения старше keep последних"""
+        for path in self.root.glob("gen-*"):
+            try:
+                number = int(path.name[len("gen-") :].split(".")[0])
+            except ValueError:
+                continue
+            if number <= generation - self.keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def save_arrays(arrays: dict, path: Path):
+    """Сохраняет словарь массивов по файлу .npy на ключ"""
+    path.mkdir(parents=True)
+    for name, values in arrays.items():
+        np.save(path / f"{name}.npy", np.asarray(values), allow_pickle=False)
+
+
+def load_arrays(path: Path) -> dict:
+    """Загружает массивы save_arrays, отображая их в память только для чтения"""
+    return {
+        file.stem: np.asarray(np.load(file, mmap_mode="r", allow_pickle=False))
+        for file in path.glob("*.npy")
+    }
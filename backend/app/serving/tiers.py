@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from statistics import median
+
+# Уровни обслуживания /recommend от полного к дешёвому — порядки выдачи
+# (те же значения, что SORT_ORDERS в catalog/ranking.py). Вероятности
+# посчитаны при загрузке снимка, а на запрос уровни тратят разное:
+#   - income: партиции просматриваются с расчётом дохода на сумму клиента
+#     по каждой строке-кандидату (IncomeEngine) и слиянием по доходу;
+#   - rate: берутся первые k подходящих строк уже упорядоченных
+#     по ставке партиций, доход считается только для выданных вкладов.
+TIERS = ("income", "rate")
+
+
+class TierRouter:
+    """
+    Выбор уровня обслуживания /recommend по нагрузке.
+
+    Давление — наибольшее из отношений длины очереди пула к queue_budget
+    и p95 ответов за последние window_s секунд к p95_budget_ms. Бюджет 0
+    отключает критерий, по умолчанию отключены оба: сброс нагрузки
+    меняет порядок выдачи и включается явно. При давлении меньше 1 запрос
+    обслуживается так, как запрошен, от 1 до 2 — не дороже следующего
+    уровня TIERS и т. д.
+
+    Окно ограничено по времени, а не по числу ответов: медленный ответ
+    перестаёт влиять на выбор через window_s секунд даже на сервере
+    без трафика. p95 учитывается, только когда в окне не меньше
+    min_samples ответов, — один выброс не переводит сервер на дешёвый
+    уровень. Ответы холодного воркера (запуск процесса, загрузка снимка)
+    в окно не передаются (см. observe в main.py).
+
+    Стоимость уровней замеряется по самим ответам: медиана времени
+    подбора (без ожидания в очереди) за последние cost_window запросов.
+    """
+
+    def __init__(
+        self,
+        queue_budget: int = 0,
+        p95_budget_ms: float = 0.0,
+        window_s: float = 30.0,
+        min_samples: int = 20,
+        cost_window: int = 200,
+        clock=time.monotonic,
+    ):
+        self.queue_budget = queue_budget
+        self.p95_budget_ms = p95_budget_ms
+        self.window_s = window_s
+        self.min_samples = min_samples
+        self._clock = clock
+        # (момент ответа, время ответа в мс) в порядке поступления
+        self._latencies = deque()
+        self._costs = {tier: deque(maxlen=cost_window) for tier in TIERS}
+
+    def observe(self, tier: str, queued_ms: float, compute_ms: float):
+        """Учитывает один ответ: ожидание в очереди и время подбора, мс"""
+        self._latencies.append((self._clock(), queued_ms + compute_ms))
+        self._expire()
+        if tier in self._costs:
+            self._costs[tier].append(compute_ms)
+
+    def _expire(self):
+        """Убирает из окна ответы старше window_s секунд"""
+        horizon = self._clock() - self.window_s
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+
+    def p95(self) -> float | None:
+        """
+        p95 времени ответов за окно, мс (None — ответов в окне меньше
+        min_samples)
+        """
+        self._expire()
+        if len(self._latencies) < max(self.min_samples, 1):
+            return None
+        values = sorted(ms for _, ms in self._latencies)
+        return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+    def pressure(self, queued: int) -> float:
+        """Нагрузка относительно бюджетов: 1 — бюджет исчерпан"""
+        pressure = 0.0
+        if self.queue_budget > 0:
+            pressure = queued / self.queue_budget
+        p95 = self.p95()
+        if self.p95_budget_ms > 0 and p95 is not None:
+            pressure = max(pressure, p95 / self.p95_budget_ms)
+        return pressure
+
+    def choose(self, requested: str, queued: int) -> str:
+        """Уровень для запроса: запрошенный или, под нагрузкой, более дешёвый"""
+        level = min(int(self.pressure(queued)), len(TIERS) - 1)
+        return TIERS[max(TIERS.index(requested), level)]
+
+    def costs(self) -> dict:
+        """Медианное время подбора по уровням, мс (без ответов — None)"""
+        return {
+            tier: round(median(values), 3) if values else None
+            for tier, values in self._costs.items()
+        }
+
+    def stats(self) -> dict:
+        """Бюджеты, текущий p95 и стоимость уровней для админ-панели"""
+        p95 = self.p95()
+        return {
+            "shed_queue_budget": self.queue_budget,
+            "shed_p95_budget_ms": self.p95_budget_ms,
+            "shed_window_s": self.window_s,
+            "recent_p95_ms": round(p95, 3) if p95 is not None else None,
+            "tier_cost_ms": self.costs(),
+        }
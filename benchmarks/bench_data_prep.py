@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Микробенчмарки этапов scripts/data_prep.py на синтетических каталогах.
+
+Каждая функция цепочки замеряется отдельно на входе, подготовленном
+предыдущими этапами (копия делается вне замера), плюс цепочка целиком
+в обычном и потоковом режимах.
+
+Запуск:
+    python benchmarks/bench_data_prep.py --sizes 100000 1000000 --json prep.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import add_output_args, finish, measure
+from benchmarks.synthetic import synthetic_raw, write_synthetic_csv
+from scripts import data_prep
+
+# Этапы в порядке preprocess_frame
+STAGES = [
+    "clean_strings",
+    "drop_duplicates",
+    "fill_missing",
+    "normalize_types",
+    "encode_features",
+    "add_features",
+]
+
+
+def bench_size(rows: int, repeat: int, chunksize: int) -> dict:
+    results = {}
+    raw = synthetic_raw(rows)
+    df = raw
+    for name in STAGES:
+        fn = getattr(data_prep, name)
+        prepared = df
+        results[f"data_prep.{name}[{rows}]"] = measure(
+            fn, repeat=repeat, setup=lambda: prepared.copy()
+        )
+        df = fn(prepared.copy())
+
+    results[f"data_prep.preprocess_frame[{rows}]"] = measure(
+        data_prep.preprocess_frame, repeat=repeat, setup=lambda: raw.copy()
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_csv(os.path.join(tmp, "raw.csv"), rows)
+        results[f"data_prep.preprocess_csv[{rows}]"] = measure(
+            lambda: data_prep.preprocess_csv(path), repeat=repeat
+        )
+        results[f"data_prep.preprocess_csv_chunked[{rows}]"] = measure(
+            lambda: sum(
+                len(c) for c in data_prep.preprocess_csv_chunked(path, chunksize)
+            ),
+            repeat=repeat,
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.sizes:
+        results.update(bench_size(rows, args.repeat, args.chunksize))
+    finish("data_prep", results, args)
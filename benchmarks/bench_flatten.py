@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Бенчмарк развёртки valQvbList: прежний вложенный цикл против колоночной версии.
+
+Синтетические ответы получаются размножением сохранённого calc_1291.json:
+каждая копия — отдельный «регион» (terrBankCode), половина вкладов в копиях
+получает новые названия, остальные повторяют ключи со сдвинутой ставкой,
+чтобы нагрузить и развёртку, и выбор максимальной ставки.
+
+Запуск:
+    python benchmarks/bench_flatten.py --scales 1 10 100 --repeat 3
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.app.parsers.flatten import (
+    dedupe_max_rate,
+    flatten_columns,
+    flatten_records,
+)
+
+FIXTURE = (
+    Path(__file__).parent.parent
+    / "backend"
+    / "app"
+    / "parsers"
+    / "data_sber"
+    / "calc_1291.json"
+)
+
+
+def loop_flatten(payloads: list[dict]) -> list[dict]:
+    """Прежняя реализация из pars_dont_touch.main(): цикл и словарь по ключу"""
+    records_raw = []
+    for data in payloads:
+        for block in data.get("valQvbList", []):
+            currency = {643: "RUB", 810: "RUB", 840: "USD", 978: "EUR"}.get(
+                block["currencyCode"], "RUB"
+            )
+            for cs in block.get("csQvbList", []):
+                for q in cs.get("qvbList", []):
+                    name = q.get("depositShortName") or q["depositName"]
+                    term_m = q.get("begTerm", 0)
+                    can_repl = bool(q.get("isReplenish", False))
+                    for t in q.get("dcfTarList", []):
+                        records_raw.append(
+                            {
+                                "name": name,
+                                "term_months": term_m,
+                                "rate": t["rate"],
+                                "can_replenish": can_repl,
+                                "min_amount": t["sumBeg"],
+                                "currency": currency,
+                                "payout_mode": "end",
+                            }
+                        )
+
+    unique = {}
+    for r in records_raw:
+        key = (r["name"], r["term_months"], r["payout_mode"], r["min_amount"])
+        prev = unique.get(key)
+        if not prev or r["rate"] > prev["rate"]:
+            unique[key] = r
+    return list(unique.values())
+
+
+def synthetic_payloads(base: dict, scale: int) -> list[dict]:
+    """scale копий ответа как ответы разных регионов"""
+    payloads = []
+    for region in range(scale):
+        data = copy.deepcopy(base)
+        for block in data["valQvbList"]:
+            for cs in block["csQvbList"]:
+                for i, q in enumerate(cs["qvbList"]):
+                    if i % 2:
+                        q["depositShortName"] = f"{q.get('depositShortName')} #{region}"
+                    for t in q["dcfTarList"]:
+                        t["rate"] = round(t["rate"] + (region % 7) * 0.01, 2)
+        payloads.append(data)
+    return payloads
+
+
+def best_of(fn, payloads, repeat: int) -> tuple[float, list]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(payloads)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(scales: list[int], repeat: int) -> list[dict]:
+    base = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    rows = []
+    for scale in scales:
+        payloads = synthetic_payloads(base, scale)
+        loop_time, expected = best_of(loop_flatten, payloads, repeat)
+        vec_time, result = best_of(flatten_records, payloads, repeat)
+        # Без сборки словарей: колонки после дедупликации, как их получает загрузка
+        col_time, _ = best_of(
+            lambda p: dedupe_max_rate(flatten_columns(p)), payloads, repeat
+        )
+        assert result == expected, "результаты развёртки расходятся"
+        rows.append(
+            {
+                "scale": scale,
+                "records": len(result),
+                "loop_ms": loop_time * 1000,
+                "vectorized_ms": vec_time * 1000,
+                "columnar_ms": col_time * 1000,
+                "speedup": loop_time / vec_time,
+            }
+        )
+        print(
+            f"scale={scale:<5} records={len(result):<8} "
+            f"loop={loop_time * 1000:9.2f} ms  vectorized={vec_time * 1000:9.2f} ms  "
+            f"columnar={col_time * 1000:9.2f} ms  x{loop_time / vec_time:.2f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.scales, args.repeat)
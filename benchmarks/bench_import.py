@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Бенчмарк холодного старта сервера: импорт backend.app.main и прогрев.
+
+Каждое измерение — в новом процессе интерпретатора:
+  - import: время `import backend.app.main` и самые дорогие модули
+    по `python -X importtime`;
+  - ready: сколько проходит от старта lifespan до первого ответа `/`
+    и до готовности снимка (warming_up == False в /admin/progress).
+
+С --max-import-ms скрипт завершается с кодом 1, если импорт медленнее
+порога, — так регрессию можно ловить в CI.
+
+Запуск:
+    python benchmarks/bench_import.py --runs 5 --json import.json --max-import-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import backend.app.main
+print(time.perf_counter() - started)
+"""
+
+READY_SNIPPET = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from backend.app.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    client.get("/")
+    first = time.perf_counter()
+    while client.get("/admin/progress").json()["warming_up"]:
+        time.sleep(0.01)
+    ready = time.perf_counter()
+print(imported - started, first - imported, ready - imported)
+"""
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def top_imports(limit: int) -> list[dict]:
+    """
+    Самые дорогие прямые импорты (первый уровень вложенности
+    в выводе -X importtime) по суммарному времени.
+    """
+    stderr = run_python("import backend.app.main", "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:") :].split("|")
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append(
+                {
+                    "module": raw_name.strip(),
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                }
+            )
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:limit]
+
+
+def run(runs: int, top: int) -> dict:
+    import_ms = min(
+        float(run_python(IMPORT_SNIPPET).stdout.split()[-1]) * 1000
+        for _ in range(runs)
+    )
+    ready = [
+        [float(v) * 1000 for v in run_python(READY_SNIPPET).stdout.split()[-3:]]
+        for _ in range(runs)
+    ]
+    return {
+        "import_ms": round(import_ms, 1),
+        "first_response_ms": round(min(r[1] for r in ready), 1),
+        "ready_ms": round(min(r[2] for r in ready), 1),
+        "top_imports": top_imports(top),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Куда сохранить результат в JSON")
+    parser.add_argument(
+        "--max-import-ms", type=float, help="Порог времени импорта для регрессии"
+    )
+    args = parser.parse_args()
+
+    result = run(args.runs, args.top)
+    print(f"import backend.app.main: {result['import_ms']} ms")
+    print(f"первый ответ /:          {result['first_response_ms']} ms после импорта")
+    print(f"снимок готов:            {result['ready_ms']} ms после импорта")
+    for row in result["top_imports"]:
+        print(f"  {row['cumulative_ms']:9.1f} ms  {row['module']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        print(f"Регрессия: импорт дольше {args.max_import_ms} ms")
+        sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Бенчмарк расчёта дохода по вкладам (IncomeEngine).
+
+Для каждого размера каталога:
+  - income.project — доход по всем вкладам для одной суммы без пополнения;
+  - income.project_topup — то же с ежемесячным пополнением;
+  - income.matrix — матрица доходов для --amounts сумм сразу;
+  - ranking.top_income / ranking.top_income_topup — топ-11 по доходу
+    из индекса выдачи без взноса и с ежемесячным взносом (на профиль,
+    по набору случайных профилей);
+  - batch.rank_income_topup — пакетный подбор по доходу с взносами
+    (BatchRanker, доход выдачи через project_matrix), на профиль.
+
+--max-project-ms завершает скрипт с кодом 1, если медиана income.project
+или income.project_topup превышает заданный бюджет (например, 1 мс
+на 10^5 вкладов).
+
+Запуск:
+    python benchmarks/bench_income.py --sizes 100000 --max-project-ms 1
+    python benchmarks/bench_income.py --json income.json --baseline income_old.json
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from benchmarks.bench_recommend import random_profiles
+from benchmarks.common import add_output_args, finish, measure
+from benchmarks.synthetic import synthetic_clean
+
+
+def bench_size(rows: int, repeat: int, amounts_count: int) -> dict:
+    from backend.app.catalog.income import IncomeEngine
+    from backend.app.catalog.ranking import RankingIndex
+    from backend.app.serving.batch import BatchRanker
+
+    catalog = synthetic_clean(rows)
+    # Вероятность для порога индекса: в бенчмарке модель не нужна
+    catalog["probability"] = np.random.default_rng(0).random(len(catalog))
+    catalog["id"] = np.arange(len(catalog))
+    engine = IncomeEngine.from_catalog(catalog)
+    term = int(catalog["term_months"].max())
+
+    results = {
+        f"income.project[{rows}]": measure(
+            lambda: engine.project(100_000, term), repeat=repeat
+        ),
+        f"income.project_topup[{rows}]": measure(
+            lambda: engine.project(100_000, term, 10_000), repeat=repeat
+        ),
+    }
+    amounts = np.linspace(10_000, 5_000_000, amounts_count)
+    results[f"income.matrix[{amounts_count}x{rows}]"] = measure(
+        lambda: engine.project_matrix(amounts, term, amounts * 0.05),
+        repeat=max(1, repeat // 2),
+    )
+
+    ranking = RankingIndex(catalog, threshold=0.5)
+    profiles = random_profiles(catalog, 50)
+    for case, share in (("top_income", 0.0), ("top_income_topup", 0.05)):
+        results[f"ranking.{case}[{rows}]"] = per_profile(
+            measure(
+                lambda: [
+                    ranking.top(
+                        *p, k=11, sort_by="income", monthly_topup=p[0] * share
+                    )
+                    for p in profiles
+                ],
+                repeat=repeat,
+            ),
+            len(profiles),
+        )
+
+    ranker = BatchRanker(catalog, threshold=0.5, ranking=ranking)
+    batch = random_profiles(catalog, 1000, seed=1)
+    keys = ranker.profile_keys(*zip(*batch))
+    amounts = np.array([p[0] for p in batch], dtype=float)
+    # Взносы с разным отношением к сумме: профили не схлопываются в один ключ
+    topups = amounts * np.random.default_rng(1).choice([0.0, 0.02, 0.05], len(batch))
+    results[f"batch.rank_income_topup[{rows}]"] = per_profile(
+        measure(
+            lambda: ranker.rank(keys, 11, "income", amounts, topups),
+            repeat=max(1, repeat // 5),
+        ),
+        len(batch),
+    )
+    return results
+
+
+def per_profile(stats: dict, count: int) -> dict:
+    """Время замера, пересчитанное на один профиль"""
+    for key in ("min_ms", "median_ms", "p95_ms", "max_ms"):
+        stats[key] = round(stats[key] / count, 4)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--amounts", type=int, default=100)
+    parser.add_argument(
+        "--max-project-ms",
+        type=float,
+        help="Бюджет медианы income.project, мс (превышение — код 1)",
+    )
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.sizes:
+        results.update(bench_size(rows, args.repeat, args.amounts))
+    over_budget = [
+        case
+        for case, stats in results.items()
+        if args.max_project_ms is not None
+        and case.startswith(("income.project[", "income.project_topup["))
+        and stats["median_ms"] > args.max_project_ms
+    ]
+    finish("income", results, args)
+    if over_budget:
+        print(f"Превышен бюджет {args.max_project_ms} мс: {', '.join(over_budget)}")
+        sys.exit(1)
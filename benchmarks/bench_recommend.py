@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Микробенчмарки подбора вкладов на синтетических каталогах.
+
+Для каждого размера каталога:
+  - snapshot.build — загрузка колоночного каталога, скоринг и индексы;
+  - recommend.filter / rank — этапы compute_recommendations
+    (медиана по набору случайных профилей);
+  - recommend.total — подбор целиком, recommend.render — рендеринг
+    recommend.html с готовыми рекомендациями;
+  - batch.rank — пакетный подбор для 1000 профилей.
+
+Запуск:
+    python benchmarks/bench_recommend.py --sizes 100000 1000000 --json recommend.json
+    python benchmarks/bench_recommend.py --baseline recommend.json --threshold 0.2
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from jinja2 import Environment, FileSystemLoader
+
+from benchmarks.common import ROOT, add_output_args, finish, measure, summarize
+from benchmarks.synthetic import synthetic_clean
+
+MODEL_PATH = Path(ROOT) / "models" / "deposit_recommender.joblib"
+TEMPLATES_DIR = Path(ROOT) / "backend" / "app" / "templates"
+
+
+def random_profiles(catalog, count: int, seed: int = 0) -> list[tuple]:
+    """
+    Профили (сумма, срок, пополнение, склонность к риску, цель)
+    в диапазоне значений каталога
+    """
+    rng = np.random.default_rng(seed)
+    amounts = np.quantile(catalog["min_amount"], rng.random(count)) * 1.5
+    terms = rng.choice(np.unique(catalog["term_months"]), count)
+    replenish = rng.choice(["any", "yes", "no"], count)
+    risk = rng.choice(["low", "medium", "high"], count)
+    goal = rng.choice(["accumulation", "passive_income"], count)
+    return list(
+        zip(
+            amounts.tolist(),
+            terms.tolist(),
+            replenish.tolist(),
+            risk.tolist(),
+            goal.tolist(),
+        )
+    )
+
+
+def bench_size(rows: int, repeat: int, profiles_count: int) -> dict:
+    from backend.app.catalog.storage import save_catalog
+    from backend.app.serving.batch import iter_batch
+    from backend.app.serving.recommend import compute_recommendations
+    from backend.app.serving.registry import build_snapshot
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "clean.csv"
+        save_catalog(synthetic_clean(rows), csv_path.with_suffix(".npcat"))
+
+        snapshots = []
+        results[f"snapshot.build[{rows}]"] = measure(
+            lambda: snapshots.append(build_snapshot(MODEL_PATH, csv_path, 1)),
+            repeat=max(1, repeat // 2),
+            warmup=0,
+        )
+        snapshot = snapshots[-1]
+
+        profiles = random_profiles(snapshot.catalog, profiles_count)
+        stages = {}
+        for profile in profiles:
+            timings = compute_recommendations(snapshot, *profile)["timings"]
+            for stage, ms in timings.items():
+                stages.setdefault(stage, []).append(ms)
+        for stage, samples in stages.items():
+            results[f"recommend.{stage}[{rows}]"] = summarize(samples)
+
+        results[f"recommend.total[{rows}]"] = measure(
+            lambda: [compute_recommendations(snapshot, *p) for p in profiles[:20]],
+            repeat=repeat,
+        )
+
+        template = Environment(loader=FileSystemLoader(TEMPLATES_DIR)).get_template(
+            "recommend.html"
+        )
+        recs = next(
+            (
+                r["recs"]
+                for r in (compute_recommendations(snapshot, *p) for p in profiles)
+                if not r["error"]
+            ),
+            [],
+        )
+        results[f"recommend.render[{rows}]"] = measure(
+            lambda: template.render(
+                error=None,
+                top3=recs[:3],
+                next3=recs[3:6],
+                hidden=recs[6:11],
+                threshold=snapshot.threshold,
+            ),
+            repeat=repeat,
+        )
+
+        batch_profiles = [
+            SimpleNamespace(
+                amount=a, term_months=t, can_replenish=r, risk_tolerance=k, goal=g
+            )
+            for a, t, r, k, g in random_profiles(snapshot.catalog, 1000, seed=1)
+        ]
+        results[f"batch.rank[{rows}]"] = measure(
+            lambda: list(iter_batch(snapshot.batch, batch_profiles, 11)),
+            repeat=repeat,
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profiles", type=int, default=200)
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.sizes:
+        results.update(bench_size(rows, args.repeat, args.profiles))
+    finish("recommend", results, args)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Микробенчмарки записи вкладов в БД (backend/app/crud/deposit_crud.py).
+
+Нужна PostgreSQL из DATABASE_URL (asyncpg) с таблицей deposits. Записи
+получают префикс названия __bench_ и удаляются после каждого замера,
+остальные данные таблицы не затрагиваются.
+
+Случаи для каждого размера:
+  - bulk.insert / bulk.copy: первая загрузка (все строки новые);
+  - bulk.insert.unchanged / bulk.copy.unchanged: повтор без изменений;
+  - per_row: create_or_update_deposit по одной записи — тот же upsert,
+    но отдельным запросом и commit на строку (на первых --per-row-limit
+    строках, так как это на порядки медленнее).
+
+Запуск:
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_upsert.py --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import add_output_args, finish, summarize
+
+PREFIX = "__bench_"
+
+
+def bench_records(rows: int) -> list[dict]:
+    """Записи с уникальными ключами для upsert"""
+    from benchmarks.synthetic import synthetic_raw
+
+    df = synthetic_raw(rows).dropna()
+    df["name"] = PREFIX + df["name"]
+    df["min_amount"] = df["min_amount"] + df.index.to_numpy()
+    df["term_months"] = df["term_months"].astype(int)
+    return df.to_dict("records")
+
+
+async def bench_size(rows: int, repeat: int, per_row_limit: int) -> dict:
+    from sqlalchemy import delete
+
+    from backend.app.crud.deposit_crud import (
+        bulk_upsert_deposits,
+        create_or_update_deposit,
+    )
+    from backend.app.db.database import async_session
+    from backend.app.db.models import Deposit
+
+    records = bench_records(rows)
+
+    async def cleanup(session):
+        await session.execute(delete(Deposit).where(Deposit.name.like(f"{PREFIX}%")))
+        await session.commit()
+
+    samples: dict[str, list[float]] = {}
+    async with async_session() as session:
+        await cleanup(session)
+        for _ in range(repeat):
+            for method in ("insert", "copy"):
+                for case in (f"bulk.{method}", f"bulk.{method}.unchanged"):
+                    started = time.perf_counter()
+                    await bulk_upsert_deposits(session, records, method=method)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    samples.setdefault(f"{case}[{rows}]", []).append(elapsed)
+                await cleanup(session)
+
+            subset = records[:per_row_limit]
+            started = time.perf_counter()
+            for record in subset:
+                await create_or_update_deposit(session, record)
+            elapsed = (time.perf_counter() - started) * 1000
+            samples.setdefault(f"per_row[{len(subset)}]", []).append(elapsed)
+            await cleanup(session)
+    return {case: summarize(values) for case, values in samples.items()}
+
+
+async def main(sizes: list[int], repeat: int, per_row_limit: int) -> dict:
+    from backend.app.db.database import engine
+
+    results = {}
+    try:
+        for rows in sizes:
+            results.update(await bench_size(rows, repeat, per_row_limit))
+    finally:
+        await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--per-row-limit", type=int, default=500)
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    finish("upsert", asyncio.run(main(args.sizes, args.repeat, args.per_row_limit)), args)
@@ -0,0 +1,152 @@
+"""Общие части бенчмарков: замер времени, JSON с результатами и сравнение
+с базовым прогоном.
+
+Формат файла результатов:
+    {
+      "suite": "recommend",
+      "meta": {"python": ..., "platform": ..., "commit": ..., "created": ...},
+      "results": {"<случай>": {"median_ms": ..., "p95_ms": ..., ...}, ...}
+    }
+
+Сравнение идёт по median_ms (для нагрузочного теста — по p95_ms): случай
+считается регрессией, если он медленнее базового больше чем на threshold.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль q (0..100) с линейной интерполяцией"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    """Сводка по выборке времён в мс"""
+    return {
+        "runs": len(samples_ms),
+        "min_ms": round(min(samples_ms), 4),
+        "median_ms": round(statistics.median(samples_ms), 4),
+        "p95_ms": round(percentile(samples_ms, 95), 4),
+        "max_ms": round(max(samples_ms), 4),
+    }
+
+
+def measure(fn, repeat: int = 5, setup=None, warmup: int = 1) -> dict:
+    """
+    Запускает fn repeat раз и возвращает сводку по времени.
+
+    setup (если задан) вызывается перед каждым запуском вне замера,
+    а его результат передаётся в fn — так функции, меняющие вход
+    на месте, каждый раз получают свежую копию.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg) if setup else fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def run_meta() -> dict:
+    """Окружение прогона, чтобы сравнивать сопоставимые результаты"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit or None,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def save_results(suite: str, results: dict, path: str) -> dict:
+    """Сохраняет результаты набора в JSON"""
+    payload = {"suite": suite, "meta": run_meta(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return payload
+
+
+def compare(
+    results: dict, baseline_path: str, threshold: float, metric: str = "median_ms"
+) -> list[str]:
+    """
+    Сравнивает результаты с базовым JSON. Возвращает описания регрессий:
+    случаев, ставших медленнее больше чем на threshold (0.2 = 20%).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for case, current in results.items():
+        before = baseline.get(case, {}).get(metric)
+        now = current.get(metric)
+        if not before or now is None:
+            continue
+        change = now / before - 1
+        if change > threshold:
+            regressions.append(
+                f"{case}: {metric} {before:.3f} -> {now:.3f} ({change:+.0%})"
+            )
+    return regressions
+
+
+def add_output_args(parser):
+    """Общие аргументы сохранения и сравнения результатов"""
+    parser.add_argument("--json", help="Куда сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Допустимое замедление относительно базового прогона (0.2 = 20%%)",
+    )
+
+
+def finish(suite: str, results: dict, args, metric: str = "median_ms"):
+    """
+    Печатает результаты, сохраняет JSON и при регрессии относительно
+    --baseline завершает процесс с кодом 1.
+    """
+    for case, stats in results.items():
+        print(
+            f"{case:<48} "
+            + "  ".join(f"{k}={v}" for k, v in stats.items() if k != "runs")
+        )
+    if args.json:
+        save_results(suite, results, args.json)
+        print(f"Результаты сохранены: {args.json}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold, metric)
+        if regressions:
+            print("Регрессии относительно базового прогона:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Регрессий нет")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Нагрузочный тест POST /recommend на локальном сервере.
+
+Отправляет формы со случайными профилями (сумма, срок, пополнение,
+риск, цель) из --concurrency параллельных клиентов и печатает
+пропускную способность, p50/p95/p99 задержки и число ответов по
+статусам. 503 (переполнение очереди или прогрев) считаются отдельно
+и не входят в перцентили.
+
+С --start-server скрипт сам поднимает uvicorn на свободном порту и ждёт
+готовности снимка (warming_up == False в /admin/progress).
+
+Запуск:
+    python benchmarks/load_recommend.py --start-server --concurrency 32 --duration 30 --json load.json
+    python benchmarks/load_recommend.py --url http://127.0.0.1:8000 --requests 5000 --baseline load.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from benchmarks.common import ROOT, add_output_args, finish, percentile
+
+AMOUNTS = (10_000, 50_000, 100_000, 300_000, 500_000, 1_000_000, 5_000_000)
+TERMS = (1, 3, 6, 12, 18, 24, 36)
+
+
+def random_form(rng: random.Random) -> dict:
+    """Случайная форма подбора в диапазоне значений каталога"""
+    return {
+        "amount": str(rng.choice(AMOUNTS) * rng.uniform(0.8, 1.5)),
+        "term_months": str(rng.choice(TERMS)),
+        "risk_tolerance": rng.choice(("low", "medium", "high")),
+        "goal": rng.choice(("accumulation", "passive_income")),
+        "can_replenish": rng.choice(("any", "yes", "no")),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(workers: int, timeout: float = 120.0):
+    """Поднимает uvicorn с backend.app.main:app и ждёт готовности снимка"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError("Сервер завершился при запуске")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Сервер не прогрелся за отведённое время")
+            try:
+                progress = httpx.get(f"{url}/admin/progress", timeout=1).json()
+                if not progress.get("warming_up"):
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+async def run_load(
+    url: str, concurrency: int, requests: int | None, duration: float | None, seed: int
+) -> dict:
+    """
+    Гоняет /recommend до исчерпания requests или duration секунд.
+
+    Возвращает сводку: число запросов, rps, перцентили успешных
+    ответов и счётчик статусов.
+    """
+    rng = random.Random(seed)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        nonlocal remaining
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining is not None:
+            if remaining <= 0:
+                return False
+            remaining -= 1
+        return True
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+
+        async def worker():
+            while take():
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/recommend", data=random_form(rng))
+                    status = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                elapsed = (time.perf_counter() - started) * 1000
+                statuses[status] += 1
+                if status == "200":
+                    latencies.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "rps": round(total / wall, 1) if wall else 0.0,
+        "ok_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3) if latencies else 0.0,
+        "statuses": dict(statuses),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--start-server", action="store_true", help="Поднять локальный uvicorn"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Воркеры uvicorn")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="Число запросов")
+    parser.add_argument(
+        "--duration", type=float, help="Длительность в секундах (по умолчанию 10)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    add_output_args(parser)
+    args = parser.parse_args()
+    if args.requests is None and args.duration is None:
+        args.duration = 10.0
+
+    def load(url: str) -> dict:
+        return asyncio.run(
+            run_load(url, args.concurrency, args.requests, args.duration, args.seed)
+        )
+
+    if args.start_server:
+        with local_server(args.workers) as url:
+            summary = load(url)
+    else:
+        summary = load(args.url)
+
+    case = f"recommend.http[c={args.concurrency}]"
+    finish("load", {case: summary}, args, metric="p95_ms")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Генератор синтетических каталогов вкладов для бенчмарков.
+
+Строки берутся из data/raw/synthetic_deposits.csv с возвращением,
+к ставке добавляется шум, а названия получают суффикс варианта, чтобы
+число разных вкладов росло вместе с размером каталога. Небольшая доля
+строк дублируется и получает пропуски ставки/срока — так нагружаются
+и ветки очистки в scripts/data_prep.py.
+
+Запуск (10^7 строк пишутся блоками, не собираясь целиком в памяти):
+    python benchmarks/synthetic.py --rows 10000000 --output /tmp/raw_1e7.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import ROOT
+
+RAW_CSV = os.path.join(ROOT, "data", "raw", "synthetic_deposits.csv")
+# Доля строк-дубликатов и строк с пропусками в синтетике
+DUPLICATE_SHARE = 0.01
+MISSING_SHARE = 0.005
+
+
+def synthetic_raw(
+    rows: int, seed: int = 0, base: pd.DataFrame | None = None, start: int = 0
+) -> pd.DataFrame:
+    """
+    Сырой каталог из rows строк в формате data/raw/synthetic_deposits.csv.
+
+    start — номер первой строки, чтобы блоки одного большого каталога
+    получали разные варианты названий.
+    """
+    if base is None:
+        base = pd.read_csv(RAW_CSV)
+    rng = np.random.default_rng(seed + start)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+
+    # Вариантов названия примерно по одному на размер исходного каталога
+    variant = (start + np.arange(rows)) // len(base)
+    df["name"] = df["name"] + np.where(variant > 0, " " + variant.astype(str), "")
+    df["rate"] = (df["rate"] + rng.normal(0, 0.5, rows)).clip(0.01).round(2)
+
+    dup = rng.random(rows) < DUPLICATE_SHARE
+    if dup.any() and rows > 1:
+        source = rng.integers(0, rows, dup.sum())
+        df.loc[dup] = df.iloc[source].to_numpy()
+    df["rate"] = df["rate"].mask(rng.random(rows) < MISSING_SHARE)
+    df["term_months"] = df["term_months"].mask(rng.random(rows) < MISSING_SHARE)
+    return df
+
+
+def iter_synthetic_raw(rows: int, chunk_rows: int = 1_000_000, seed: int = 0):
+    """Тот же каталог блоками по chunk_rows строк"""
+    base = pd.read_csv(RAW_CSV)
+    for start in range(0, rows, chunk_rows):
+        yield synthetic_raw(min(chunk_rows, rows - start), seed, base, start)
+
+
+def write_synthetic_csv(
+    path: str, rows: int, chunk_rows: int = 1_000_000, seed: int = 0
+) -> str:
+    """Пишет сырой синтетический каталог в CSV блоками"""
+    for i, chunk in enumerate(iter_synthetic_raw(rows, chunk_rows, seed)):
+        chunk.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+    return path
+
+
+def synthetic_clean(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Очищенный каталог (как clean_deposits.csv) из синтетики"""
+    from scripts.data_prep import preprocess_frame
+
+    return preprocess_frame(synthetic_raw(rows, seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True, help="Путь к сырому CSV")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.output, args.rows, args.chunk_rows, args.seed)
+    print(f"Сохранено {args.rows} строк: {args.output}")
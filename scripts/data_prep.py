@@ -1,6 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 
+from backend.app.catalog.storage import (
+    COLUMNAR_SUFFIX,
+    compact_catalog,
+    format_report,
+    memory_report,
+    save_catalog,
+)
+
 
 def load_raw_csv(path: str) -> pd.DataFrame:
     """Загружает исходный CSV-файл с данными о вкладах"""
@@ -17,28 +31,77 @@ def load_raw_db(conn_str: str, table_name: str) -> pd.DataFrame:
 
 
 def clean_strings(df: pd.DataFrame) -> pd.DataFrame:
-    """Чистит текстовые поля, убирая неразрывные пробелы и лишние символы"""
+    """
+    Чистит текстовые поля, убирая неразрывные пробелы и лишние символы.
+    Название становится категорией: дальнейшие удаление дубликатов
+    и медианы по названию работают с кодами, а не со строками.
+    """
     # Замена NBSP на обычный пробел
     df["name"] = df["name"].astype(str).str.replace("\u00a0", " ", regex=False)
     # Убираем лишние пробелы
-    df["name"] = df["name"].str.strip()
+    df["name"] = df["name"].str.strip().astype("category")
     return df
 
 
-def drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
-    """Удаляет полные дубликаты строк"""
-    return df.drop_duplicates().reset_index(drop=True)
+def drop_duplicates(df: pd.DataFrame, seen: set | None = None) -> pd.DataFrame:
+    """
+    Удаляет полные дубликаты строк.
+
+    В потоковом режиме передаётся множество seen с хэшами уже встреченных
+    строк, общее для всех блоков: так дубликаты убираются глобально,
+    а в памяти держится по 8 байт на уникальную строку.
+    """
+    df = df.drop_duplicates()
+    if seen is not None:
+        hashes = row_hashes(df)
+        keep = ~pd.Series(hashes, index=df.index).isin(seen).to_numpy()
+        seen.update(hashes[keep].tolist())
+        df = df[keep]
+    return df.reset_index(drop=True)
+
+
+def row_hashes(df: pd.DataFrame):
+    """
+    Хэши строк, не зависящие от того, как pandas вывел типы в конкретном
+    блоке (int/float при пропусках, bool/object и т.п.).
+    """
+    normalized = pd.DataFrame(
+        {
+            col: (
+                df[col].astype(float)
+                if pd.api.types.is_numeric_dtype(df[col])
+                and not pd.api.types.is_bool_dtype(df[col])
+                else df[col].astype(str)
+            )
+            for col in df.columns
+        }
+    )
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
 
 
-def fill_missing(df: pd.DataFrame) -> pd.DataFrame:
+def fill_missing(
+    df: pd.DataFrame,
+    rate_medians: pd.Series | None = None,
+    term_mode: int | None = None,
+) -> pd.DataFrame:
     """
     Заполняет пропущенные значения:
       - rate: медианой по названию вклада
       - term_months: модой во всём датасете
       - остальные пропуски удаляет
+
+    В потоковом режиме медианы и мода посчитаны заранее по всему
+    источнику и передаются через rate_medians и term_mode.
     """
-    df["rate"] = df["rate"].fillna(df.groupby("name")["rate"].transform("median"))
-    df["term_months"] = df["term_months"].fillna(df["term_months"].mode()[0])
+    if rate_medians is None:
+        medians = df.groupby("name", observed=True)["rate"].transform("median")
+        df["rate"] = df["rate"].fillna(medians)
+    else:
+        # map категории возвращает категорию, если медианы не повторяются
+        df["rate"] = df["rate"].fillna(df["name"].map(rate_medians).astype(float))
+    if term_mode is None:
+        term_mode = df["term_months"].mode()[0]
+    df["term_months"] = df["term_months"].fillna(term_mode)
     df = df.dropna(subset=["currency", "min_amount"])
     return df
 
@@ -52,20 +115,35 @@ def normalize_types(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def encode_features(df: pd.DataFrame) -> pd.DataFrame:
-    """One-hot кодирование для категориальных признаков"""
+def encode_features(
+    df: pd.DataFrame, categories: dict[str, list] | None = None
+) -> pd.DataFrame:
+    """
+    One-hot кодирование для категориальных признаков.
+
+    В потоковом режиме categories задаёт полный набор значений каждой
+    колонки, чтобы все блоки получили одинаковые dummy-колонки.
+    """
+    if categories is not None:
+        for col, values in categories.items():
+            df[col] = pd.Categorical(df[col], categories=values)
     return pd.get_dummies(df, columns=["currency", "payout_mode"], drop_first=True)
 
 
-def add_features(df: pd.DataFrame) -> pd.DataFrame:
+def add_features(df: pd.DataFrame, term_max: int | None = None) -> pd.DataFrame:
     """
     Добавляет новые признаки:
       - risk_level: уровень риска
       - goal_accumulation: индикатор накопительной цели (срок >= 12 месяцев)
+
+    В потоковом режиме верхняя граница последней корзины (term_max)
+    берётся по всему источнику, а не по текущему блоку.
     """
+    if term_max is None:
+        term_max = df["term_months"].max()
     df["risk_level"] = pd.cut(
         df["term_months"],
-        bins=[0, 6, 12, 24, df["term_months"].max()],
+        bins=[0, 6, 12, 24, term_max],
         labels=["high", "medium", "low", "very_low"],
     )
     df["risk_level"] = df["risk_level"].map(
@@ -75,9 +153,8 @@ def add_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def preprocess_csv(input_path: str) -> pd.DataFrame:
-    """Полная цепочка препроцессинга из CSV"""
-    df = load_raw_csv(input_path)
+def preprocess_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Полная цепочка препроцессинга для уже загруженных сырых данных"""
     df = clean_strings(df)
     df = drop_duplicates(df)
     df = fill_missing(df)
@@ -87,16 +164,174 @@ def preprocess_csv(input_path: str) -> pd.DataFrame:
     return df
 
 
+def preprocess_csv(input_path: str) -> pd.DataFrame:
+    """Полная цепочка препроцессинга из CSV"""
+    return preprocess_frame(load_raw_csv(input_path))
+
+
 def preprocess_db(conn_str: str, table_name: str) -> pd.DataFrame:
     """Полная цепочка препроцессинга из БД"""
-    df = load_raw_db(conn_str, table_name)
+    return preprocess_frame(load_raw_db(conn_str, table_name))
+
+
+def preprocess_db_view(conn_str: str, refresh: bool = True) -> pd.DataFrame:
+    """
+    Признаки из материализованного представления deposit_features:
+    те же этапы, что и preprocess_db, выполнены в БД (см. db/features.py).
+    С refresh представление сначала обновляется без блокировки читателей.
+    """
+    from sqlalchemy import text
+
+    from backend.app.db.features import (
+        CATEGORIES_SQL,
+        FEATURE_DTYPES,
+        FEATURE_VIEW,
+        REFRESH_SQL,
+        check_categories,
+    )
+
+    engine = create_engine(conn_str)
+    with engine.begin() as conn:
+        check_categories(*conn.execute(text(CATEGORIES_SQL)).one())
+        if refresh:
+            conn.execute(text(REFRESH_SQL))
+        df = pd.read_sql(f"SELECT * FROM {FEATURE_VIEW} ORDER BY id", conn)
+    engine.dispose()
+    return df.astype(FEATURE_DTYPES)
+
+
+def iter_raw_csv(path: str, chunksize: int):
+    """Читает исходный CSV блоками по chunksize строк"""
+    yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def iter_raw_db(conn_str: str, table_name: str, chunksize: int):
+    """
+    Читает таблицу блоками по chunksize строк через серверный курсор,
+    не выгружая весь результат в память клиента.
+    """
+    engine = create_engine(conn_str)
+    query = f"SELECT * FROM {table_name}"
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        yield from pd.read_sql(query, conn, chunksize=chunksize)
+    engine.dispose()
+
+
+def collect_global_stats(chunks) -> dict:
+    """
+    Первый проход потокового режима: собирает по всему источнику то,
+    что в обычном режиме считается по целому DataFrame —
+    медианы ставки по названию, моду и максимум срока, наборы
+    значений категориальных колонок.
+    """
+    seen = set()
+    rates = {}
+    term_counts = pd.Series(dtype="int64")
+    categories = {"currency": set(), "payout_mode": set()}
+    term_max = None
+    term_na = False
+    has_rows = False
+
+    for chunk in chunks:
+        chunk = drop_duplicates(clean_strings(chunk), seen)
+        for name, group in chunk.groupby("name", observed=True)["rate"]:
+            rates.setdefault(name, []).append(group.dropna().to_numpy())
+        term_counts = term_counts.add(
+            chunk["term_months"].value_counts(), fill_value=0
+        )
+        # Максимум срока и категории — только по строкам, переживающим dropna
+        kept = chunk.dropna(subset=["currency", "min_amount"])
+        if not kept.empty:
+            has_rows = True
+            chunk_max = kept["term_months"].max()
+            if pd.notna(chunk_max):
+                term_max = chunk_max if term_max is None else max(term_max, chunk_max)
+            for col in categories:
+                categories[col].update(kept[col].dropna().unique().tolist())
+            term_na = term_na or kept["term_months"].isna().any()
+
+    # Мода: наиболее частое значение, при равенстве — наименьшее (как Series.mode)
+    term_mode = None
+    if not term_counts.empty:
+        top = term_counts[term_counts == term_counts.max()]
+        term_mode = top.index.min()
+    # Пропуски срока у сохраняемых строк заполняются модой и участвуют в максимуме
+    if term_na and term_mode is not None:
+        term_max = term_mode if term_max is None else max(term_max, term_mode)
+
+    rate_medians = pd.Series(
+        {
+            name: pd.Series(np.concatenate(parts)).median()
+            for name, parts in rates.items()
+        },
+        dtype=float,
+    )
+    return {
+        "rate_medians": rate_medians,
+        "names": sorted(rates),
+        "term_mode": term_mode,
+        "term_max": term_max if has_rows else None,
+        "categories": {col: sorted(values) for col, values in categories.items()},
+    }
+
+
+def preprocess_chunks(make_chunks):
+    """
+    Потоковая цепочка препроцессинга с ограниченным потреблением памяти.
+
+    make_chunks — функция без аргументов, возвращающая новый итератор
+    по блокам исходных данных (источник читается дважды). Первый проход
+    собирает глобальную статистику, второй прогоняет каждый блок через
+    те же этапы, что и обычный режим. Результат совпадает с
+    preprocess_csv / preprocess_db с точностью до индекса строк.
+    """
+    stats = collect_global_stats(make_chunks())
+    seen = set()
+    for chunk in make_chunks():
+        chunk = preprocess_rows(chunk, stats, seen)
+        if not chunk.empty:
+            yield chunk
+
+
+def preprocess_rows(df: pd.DataFrame, stats: dict, seen: set | None = None):
+    """
+    Прогоняет часть строк источника через этапы обычного режима
+    с глобальной статистикой stats (см. collect_global_stats): блок
+    потокового режима или изменённые строки таблицы при инкрементальной
+    синхронизации каталога. Медианы ставки и мода срока могут быть None —
+    тогда пропуски заполняются по самим строкам.
+    """
     df = clean_strings(df)
-    df = drop_duplicates(df)
-    df = fill_missing(df)
+    if stats.get("names") is not None:
+        # Общий словарь названий: блоки склеиваются в ту же категорию
+        df["name"] = df["name"].cat.set_categories(stats["names"])
+    df = drop_duplicates(df, seen)
+    df = fill_missing(df, stats.get("rate_medians"), stats.get("term_mode"))
+    if df.empty:
+        return df
     df = normalize_types(df)
-    df = encode_features(df)
-    df = add_features(df)
-    return df
+    df = encode_features(df, stats["categories"])
+    return add_features(df, stats["term_max"])
+
+
+def preprocess_csv_chunked(input_path: str, chunksize: int = 100_000):
+    """Потоковая цепочка препроцессинга из CSV"""
+    return preprocess_chunks(lambda: iter_raw_csv(input_path, chunksize))
+
+
+def preprocess_db_chunked(conn_str: str, table_name: str, chunksize: int = 100_000):
+    """Потоковая цепочка препроцессинга из БД"""
+    return preprocess_chunks(lambda: iter_raw_db(conn_str, table_name, chunksize))
+
+
+def write_csv_chunks(chunks, output: str) -> int:
+    """Пишет блоки в один CSV по мере поступления, возвращает число строк"""
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(output, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        rows += len(chunk)
+    return rows
 
 
 if __name__ == "__main__":
@@ -109,15 +344,67 @@ if __name__ == "__main__":
     group.add_argument("--input_csv", help="Путь к raw CSV")
     group.add_argument("--db_conn", help="Строка подключения к БД")
     parser.add_argument("--table", help="Имя таблицы при использовании БД")
+    parser.add_argument(
+        "--from-view",
+        action="store_true",
+        help="Читать готовые признаки из представления deposit_features (с --db_conn)",
+    )
     parser.add_argument(
         "--output", required=True, help="Путь для сохранения очищенного CSV"
     )
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=["csv", "columnar"],
+        default=["csv"],
+        help="Форматы вывода: csv и/или columnar (директория .npcat рядом с --output)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="Потоковая обработка блоками по N строк (только вывод в csv)",
+    )
     args = parser.parse_args()
 
+    if args.chunksize:
+        # Блоки пишутся в CSV по мере поступления: колоночный каталог
+        # и представление признаков требуют всего каталога сразу
+        if "columnar" in args.format:
+            parser.error("--chunksize поддерживает только --format csv")
+        if args.from_view:
+            parser.error("--chunksize нельзя совмещать с --from-view")
+        if args.input_csv:
+            chunks = preprocess_csv_chunked(args.input_csv, args.chunksize)
+        else:
+            chunks = preprocess_db_chunked(args.db_conn, args.table, args.chunksize)
+        # Те же компактные типы колонок, что и в обычном режиме
+        rows = write_csv_chunks(map(compact_catalog, chunks), args.output)
+        print(f"Сохранено очищенных данных: {args.output} ({rows} строк)")
+        sys.exit(0)
+
     if args.input_csv:
         df_clean = preprocess_csv(args.input_csv)
+    elif args.from_view:
+        df_clean = preprocess_db_view(args.db_conn)
     else:
         df_clean = preprocess_db(args.db_conn, args.table)
 
-    df_clean.to_csv(args.output, index=False)
-    print(f"Сохранено очищенных данных: {args.output}")
+    # Компактные типы колонок (см. CATALOG_SCHEMA) для обоих форматов вывода
+    catalog = compact_catalog(df_clean)
+    print(f"Память каталога: {format_report(memory_report(df_clean, catalog))}")
+    df_clean = catalog
+
+    if "csv" in args.format:
+        df_clean.to_csv(args.output, index=False)
+        print(f"Сохранено очищенных данных: {args.output}")
+    elif os.path.exists(args.output):
+        # Старый CSV рядом перекрыл бы новый колоночный каталог
+        os.remove(args.output)
+        print(f"Удалён устаревший CSV: {args.output}")
+    if "columnar" in args.format:
+        columnar_path = save_catalog(
+            df_clean,
+            os.path.splitext(args.output)[0] + COLUMNAR_SUFFIX,
+            source=args.output if "csv" in args.format else None,
+        )
+        print(f"Сохранён колоночный каталог: {columnar_path}")
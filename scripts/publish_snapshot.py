@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pathlib import Path
+
+from backend.app.serving.registry import SnapshotRegistry
+
+
+def publish_snapshot(shared_dir: str, data_path: str, model_path: str) -> int:
+    """
+    Процесс-загрузчик: собирает снимок модели и каталога и публикует его
+    в общий сегмент shared_dir, чтобы воркеры сервера только подключались
+    к готовому поколению. Если поколение по тем же файлам уже есть,
+    новое не создаётся.
+
+    Возвращает номер опубликованного поколения.
+    """
+    registry = SnapshotRegistry(Path(model_path), Path(data_path), shared_dir)
+    snapshot = registry.reload()
+    if snapshot is None or not snapshot.shared:
+        raise SystemExit(f"Снимок не опубликован: {registry.last_error}")
+    return snapshot.version
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Публикация снимка модели и каталога в общий сегмент"
+    )
+    parser.add_argument(
+        "--shared-dir",
+        default=os.getenv("SHARED_SNAPSHOT_DIR", "/dev/shm/deposits"),
+        help="Директория общего сегмента (та же, что SHARED_SNAPSHOT_DIR сервера)",
+    )
+    parser.add_argument(
+        "--data", default="data/clean/clean_deposits.csv", help="Путь к очищенному CSV"
+    )
+    parser.add_argument(
+        "--model", default="models/deposit_recommender.joblib", help="Путь к модели"
+    )
+    args = parser.parse_args()
+
+    generation = publish_snapshot(args.shared_dir, args.data, args.model)
+    print(f"Опубликовано поколение {generation}: {args.shared_dir}")
@@ -1,45 +1,106 @@
 import os
+import sys
 
-import numpy as np
-import pandas as pd
-from joblib import dump
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from joblib import dump, load
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.model_selection import train_test_split
 
-# Загружаем подготовленные данные
-df = pd.read_csv("data/clean/clean_deposits.csv")
+from backend.app.catalog.income import add_income_feature
+from backend.app.catalog.storage import load_catalog
+from backend.app.serving.forest import FOREST_SUFFIX, export_forest
+
+
+def train_model(
+    data_path: str = "data/clean/clean_deposits.csv",
+    model_output: str = "models/deposit_recommender.joblib",
+    income_feature: bool = False,
+) -> dict:
+    """
+    Обучает RandomForest на очищенном каталоге и сохраняет артефакт
+    {"pipeline": модель, "threshold": порог}, а рядом — упакованный
+    лес (.npforest), который сервер загружает без sklearn. Если рядом
+    с CSV есть колоночная версия каталога, читается она.
+
+    С income_feature в признаки добавляется projected_income — доход
+    на 100 000 ₽ за срок вклада (см. IncomeEngine); сервер досчитывает
+    его сам по списку признаков модели.
+
+    Возвращает метрики на отложенной выборке.
+    """
+    df = load_catalog(data_path)
+    if income_feature:
+        df = add_income_feature(df)
+
+    rate_threshold = df["rate"].quantile(0.9)
+    df["is_recommend"] = (
+        (df["rate"] >= rate_threshold) | (df["goal_accumulation"] == 1)
+    ).astype(int)
+
+    feature_cols = [c for c in df.columns if c not in ["name", "is_recommend"]]
+
+    X = df[feature_cols]
+    y = df["is_recommend"]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    clf = RandomForestClassifier(
+        n_estimators=200, random_state=42, class_weight="balanced"
+    )
+    clf.fit(X_train, y_train)
+
+    y_pred = clf.predict(X_test)
+    y_proba = clf.predict_proba(X_test)[:, 1]
+    roc_auc = roc_auc_score(y_test, y_proba)
 
-# Создаём целевую переменную:
-# Рекомендуем, если ставка в топ 10% или если цель накопления (goal_accumulation == 1)
-rate_threshold = df["rate"].quantile(0.9)
-df["is_recommend"] = (
-    (df["rate"] >= rate_threshold) | (df["goal_accumulation"] == 1)
-).astype(int)
+    print(classification_report(y_test, y_pred))
+    print(f"ROC AUC: {roc_auc:.3f}")
 
-# Фичи — все, кроме целевой и name
-feature_cols = [c for c in df.columns if c not in ["name", "is_recommend"]]
+    os.makedirs(os.path.dirname(model_output) or ".", exist_ok=True)
+    dump({"pipeline": clf, "threshold": 0.2}, model_output)
+    print(f"Модель сохранена: {model_output}")
+    packed = export_model(model_output)
+    print(f"Упакованный лес сохранён: {packed}")
+    return {"roc_auc": float(roc_auc), "rows": len(df)}
 
-X = df[feature_cols]
-y = df["is_recommend"]
 
-# Разбиваем на тренировочную и тестовую выборки с стратификацией
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+def export_model(model_path: str) -> str:
+    """Упаковывает лес из готового .joblib в .npforest рядом с ним"""
+    artifact = load(model_path)
+    path = os.path.splitext(model_path)[0] + FOREST_SUFFIX
+    export_forest(artifact["pipeline"], path, artifact["threshold"], source=model_path)
+    return path
 
-# Создаём и обучаем классификатор
-clf = RandomForestClassifier(n_estimators=200, random_state=42, class_weight="balanced")
-clf.fit(X_train, y_train)
 
-# Оценка на тесте
-y_pred = clf.predict(X_test)
-y_proba = clf.predict_proba(X_test)[:, 1]
+if __name__ == "__main__":
+    import argparse
 
-print(classification_report(y_test, y_pred))
-print(f"ROC AUC: {roc_auc_score(y_test, y_proba):.3f}")
+    parser = argparse.ArgumentParser(description="Обучение модели рекомендаций вкладов")
+    parser.add_argument(
+        "--data", default="data/clean/clean_deposits.csv", help="Путь к очищенному CSV"
+    )
+    parser.add_argument(
+        "--model-output",
+        default="models/deposit_recommender.joblib",
+        help="Путь для сохранения модели",
+    )
+    parser.add_argument(
+        "--export-only",
+        action="store_true",
+        help="Не обучать, а только упаковать уже сохранённую модель в .npforest",
+    )
+    parser.add_argument(
+        "--income-feature",
+        action="store_true",
+        help="Добавить в признаки доход за срок вклада (projected_income)",
+    )
+    args = parser.parse_args()
 
-# Сохраняем модель и порог (например 0.2)
-os.makedirs("models", exist_ok=True)
-dump({"pipeline": clf, "threshold": 0.2}, "models/deposit_recommender.joblib")
-print("Модель сохранена: models/deposit_recommender.joblib")
+    if args.export_only:
+        print(f"Упакованный лес сохранён: {export_model(args.model_output)}")
+    else:
+        train_model(args.data, args.model_output, args.income_feature)
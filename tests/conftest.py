@@ -1,9 +1,29 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
-from backend.app.main import app
+from backend.app.main import app, recommend_cache, registry
 
 
 @pytest.fixture
 def client():
+    # Снимок на сервере грузится в lifespan; тестам он нужен сразу
+    if registry.current is None:
+        registry.reload()
+    # Каждый тест начинает с пустого кэша рекомендаций
+    recommend_cache.clear()
     return TestClient(app)
+
+
+@pytest.fixture
+def pg_url(monkeypatch):
+    """
+    Строка подключения к тестовой PostgreSQL (asyncpg) из TEST_DATABASE_URL.
+    Тесты, которым нужна настоящая БД, пропускаются, если переменная не задана.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL не задана")
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
@@ -17,13 +17,16 @@ def test_progress_check(client):
 
     Проверяется:
     - статус ответа 200 OK;
-    - в ответе JSON присутствуют ключи 'progress' и 'status'.
+    - в ответе JSON присутствуют ключи 'progress' и 'status';
+    - в ответе есть версия модели и время её загрузки.
     """
     response = client.get("/admin/progress")
     assert response.status_code == 200
     data = response.json()
     assert "progress" in data
     assert "status" in data
+    assert "model_version" in data
+    assert "loaded_at" in data
 
 
 def test_update_trigger(client):
@@ -36,4 +39,140 @@ def test_update_trigger(client):
     """
     response = client.post("/admin/update")
     assert response.status_code == 200
-    assert "message" in response.json()
\ No newline at end of file
+    assert "message" in response.json()
+    assert client.get("/admin/progress").json()["active"] is False
+
+
+def test_recommend_uses_cached_scores(client):
+    """
+    Тестирует рекомендации на заранее посчитанных вероятностях.
+
+    Проверяется:
+    - статус ответа 200 OK и наличие таблицы рекомендаций;
+    - закэшированная колонка 'probability' совпадает с прямым
+      вызовом модели на тех же строках каталога.
+    """
+    from backend.app import main
+    from backend.app.catalog.scoring import FEATURES
+
+    response = client.post(
+        "/recommend",
+        data={
+            "amount": 100000,
+            "term_months": 12,
+            "risk_tolerance": "low",
+            "goal": "accumulation",
+            "can_replenish": "any",
+        },
+    )
+    assert response.status_code == 200
+    assert "Лучшие рекомендации" in response.text
+
+    snapshot = main.registry.current
+    sample = snapshot.catalog.head(50)
+    expected = snapshot.pipeline.predict_proba(sample[FEATURES])[:, 1]
+    assert (sample["probability"].to_numpy() == expected).all()
+
+
+def test_recommend_cache_hits_for_equivalent_profiles(client):
+    """
+    Тестирует кэш /recommend.
+
+    Проверяется:
+    - повторный запрос с эквивалентным профилем обслуживается из кэша
+      (этап cache в Server-Timing) и выдаёт ту же страницу;
+    - другая сумма в пределах тех же границ каталога тоже берётся из кэша,
+      а доход пересчитывается на неё;
+    - счётчики кэша видны в /admin/progress.
+    """
+    form = {
+        "amount": 123457,
+        "term_months": 13,
+        "risk_tolerance": "low",
+        "goal": "accumulation",
+        "can_replenish": "yes",
+    }
+    first = client.post("/recommend", data=form)
+    second = client.post("/recommend", data={**form, "term_months": 14})
+    assert first.status_code == second.status_code == 200
+    assert "cache;dur=" in second.headers["Server-Timing"]
+    assert first.text == second.text
+
+    third = client.post("/recommend", data={**form, "amount": 2 * form["amount"]})
+    assert "cache;dur=" in third.headers["Server-Timing"]
+    assert first.text != third.text
+
+    data = client.get("/admin/progress").json()
+    assert data["cache_hits"] >= 1
+    assert data["cache_misses"] >= 1
+
+
+def test_metrics_endpoint(client):
+    """
+    Тестирует эндпоинт /metrics.
+
+    Проверяется:
+    - ответ в текстовом формате Prometheus с гистограммой этапов
+      /recommend, счётчиками исходов и версией модели;
+    - админ-панель показывает те же счётчики исходов.
+    """
+    client.post(
+        "/recommend",
+        data={
+            "amount": 100000,
+            "term_months": 12,
+            "risk_tolerance": "low",
+            "goal": "accumulation",
+        },
+    )
+    client.post(
+        "/recommend",
+        data={"amount": 1, "term_months": 1, "risk_tolerance": "low", "goal": "x"},
+    )
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("filter", "rank", "render"):
+        assert f'deposit_recommend_stage_seconds_count{{stage="{stage}"}}' in text
+    assert "deposit_model_version " in text
+    assert "deposit_catalog_rows " in text
+
+    from backend.app import main
+
+    results = client.get("/admin/progress").json()["recommend_results"]
+    empty = main.metrics.registry.get_sample_value(
+        "deposit_recommend_results_total", {"outcome": "empty"}
+    )
+    assert results["empty"] == empty >= 1
+
+
+def test_recommend_warming_up(client, monkeypatch):
+    """
+    Тестирует ответы сервера до окончания первой загрузки снимка.
+
+    Проверяется:
+    - /recommend возвращает 503 с сообщением о прогреве и Retry-After;
+    - страницы, которым модель не нужна, отвечают сразу.
+    """
+    from backend.app import main
+    from backend.app.serving.registry import SnapshotRegistry
+
+    cold = SnapshotRegistry(main.MODEL_PATH, main.CSV_PATH)
+    monkeypatch.setattr(cold, "reload_in_background", lambda: None)
+    monkeypatch.setattr(main, "registry", cold)
+    monkeypatch.setattr(
+        main.metrics, "_sources", [cold.status, *main.metrics._sources[1:]]
+    )
+
+    response = client.post(
+        "/recommend",
+        data={"amount": 1000, "term_months": 6, "risk_tolerance": "low", "goal": "x"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert "прогревается" in response.text
+
+    assert client.get("/").status_code == 200
+    assert client.get("/admin").status_code == 200
+    assert client.get("/admin/progress").json()["warming_up"] is True
@@ -0,0 +1,97 @@
+import pandas as pd
+
+from backend.app.serving.batch import BatchRanker
+
+
+def test_batch_ranker_threshold_and_fallback():
+    """
+    Тестирует векторизованный пакетный подбор вкладов.
+
+    Проверяется:
+    - вклады фильтруются по сумме, сроку и пополнению и сортируются по ставке;
+    - при отсутствии вкладов выше порога возвращается топ по ставке (fallback);
+    - профиль без подходящих вкладов получает пустой список.
+    """
+    catalog = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "rate": [10.0, 15.0, 12.0, 20.0],
+            "term_months": [3, 12, 6, 24],
+            "can_replenish": [1, 0, 1, 1],
+            "min_amount": [1000, 1000, 50000, 1000],
+            "probability": [0.9, 0.5, 0.1, 0.05],
+            "risk_level": [3, 2, 3, 1],
+            "goal_accumulation": [0, 1, 0, 1],
+            "payout_mode_monthly": [False, True, False, True],
+            "currency_RUB": [True, True, False, True],
+            "currency_USD": [False, False, True, False],
+        }
+    )
+    ranker = BatchRanker(catalog, threshold=0.2)
+    keys = ranker.profile_keys(
+        [100000, 60000, 100, 100000],
+        [12, 6, 12, 24],
+        ["any", "yes", "any", "no"],
+    )
+    results = ranker.rank(keys)
+
+    assert [r["id"] for r in results[0]["recommendations"]] == [2, 1]
+    assert results[0]["fallback"] is False
+    # Вклад 3 ниже порога, остаётся только 1
+    assert [r["id"] for r in results[1]["recommendations"]] == [1]
+    assert results[2]["recommendations"] == []
+    # Для "no" подходит только вклад 2 (выше порога)
+    assert [r["id"] for r in results[3]["recommendations"]] == [2]
+
+    # Порог выше всех вероятностей — топ кандидатов по ставке
+    strict = BatchRanker(catalog, threshold=0.95)
+    fallback = strict.rank(keys[:1])[0]
+    assert [r["id"] for r in fallback["recommendations"]] == [2, 3, 1]
+    assert fallback["fallback"] is True
+
+
+def test_batch_endpoint_stream(client):
+    """
+    Тестирует JSON-эндпоинт пакетных рекомендаций в режиме NDJSON.
+
+    Проверяется:
+    - на каждый профиль приходит ровно одна строка с индексом профиля
+      и списком рекомендаций;
+    - по умолчанию выдача, как и в /recommend, упорядочена по доходу
+      на сумму профиля с взносом и совпадает с RankingIndex.top;
+    - sort_by=rate возвращает порядок по ставке.
+    """
+    profiles = [
+        {"amount": 100000, "term_months": 12, "can_replenish": "any"},
+        {"amount": 10, "term_months": 1},
+    ]
+    response = client.post(
+        "/recommend/batch?stream=true", json={"profiles": profiles}
+    )
+    assert response.status_code == 200
+    lines = response.text.strip().split("\n")
+    assert len(lines) == 2
+    assert '"index": 0' in lines[0]
+    assert '"recommendations": []' in lines[1]
+
+    from backend.app.main import registry
+
+    profile = {"amount": 250000, "term_months": 24, "monthly_topup": 5000}
+    ranking = registry.current.ranking
+    for sort_by in ("income", "rate"):
+        body = client.post(
+            "/recommend/batch", json={"profiles": [profile], "sort_by": sort_by}
+        ).json()
+        recs = body["results"][0]["recommendations"]
+        top = ranking.top(
+            250000,
+            24,
+            "any",
+            "low",
+            "accumulation",
+            sort_by=sort_by,
+            monthly_topup=5000,
+        )
+        ids = registry.current.catalog["id"].to_numpy()[top]
+        assert [r["id"] for r in recs] == ids.tolist()
+        assert all(r["income"] > 0 for r in recs)
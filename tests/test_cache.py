@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.index import CandidateIndex
+from backend.app.serving.cache import RecommendationCache
+
+
+def test_profile_key_groups_equivalent_profiles():
+    """
+    Тестирует нормализацию профиля к границам каталога.
+
+    Проверяется:
+    - профили с одинаковым ключом дают одинаковый набор кандидатов;
+    - сумма и срок между границами сводятся к ближайшей границе снизу;
+    - склонность к риску и цель входят в ключ в виде кодов предпочтений.
+    """
+    df = pd.DataFrame(
+        {
+            "min_amount": [1000, 50000, 10000, 1000, 300000],
+            "term_months": [3, 12, 12, 6, 24],
+            "can_replenish": [1, 0, 1, 0, 1],
+        }
+    )
+    index = CandidateIndex(df)
+    assert index.profile_key(20000, 13) == (10000, 12, "any", 3, 2)
+    assert index.profile_key(500, 1, "yes") == (None, None, "yes", 3, 2)
+    assert index.profile_key(20000, 13, "no", "low", "passive_income") == (
+        10000,
+        12,
+        "no",
+        1,
+        0,
+    )
+
+    by_key = {}
+    for amount, term, replenish in itertools.product(
+        [0, 999, 1000, 9999, 20000, 50000, 1e6],
+        [1, 3, 5, 12, 20, 36],
+        ["any", "yes", "no"],
+    ):
+        key = index.profile_key(amount, term, replenish)
+        positions = index.query(amount, term, replenish)
+        if key in by_key:
+            np.testing.assert_array_equal(by_key[key], positions)
+        by_key[key] = positions
+
+
+def test_cache_lru_ttl_and_version(monkeypatch):
+    """
+    Тестирует LRU-кэш рекомендаций.
+
+    Проверяется:
+    - вытеснение самой давно использованной записи;
+    - истечение времени жизни записи;
+    - очистка при смене версии снимка и счётчики попаданий/промахов;
+    - поиск по запасным ключам — один промах или одно попадание на вызов.
+    """
+    now = [0.0]
+    monkeypatch.setattr("backend.app.serving.cache.time.monotonic", lambda: now[0])
+    cache = RecommendationCache(maxsize=2, ttl=10)
+
+    cache.put(1, "a", {"recs": 1})
+    cache.put(1, "b", {"recs": 2})
+    assert cache.get(1, "a") == {"recs": 1}
+    cache.put(1, "c", {"recs": 3})
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") == {"recs": 1}
+
+    now[0] = 11
+    assert cache.get(1, "c") is None
+
+    cache.put(1, "a", {"recs": 1})
+    assert cache.get(2, "a") is None
+    stats = cache.stats()
+    assert stats["cache_hits"] == 2
+    assert stats["cache_misses"] == 3
+    assert stats["cache_invalidations"] == 1
+    assert stats["cache_size"] == 0
+
+    cache.put(2, "rate", {"recs": 4})
+    assert cache.get(2, "income", "rate") == {"recs": 4}
+    assert cache.get(2, "income", "other") is None
+    stats = cache.stats()
+    assert stats["cache_hits"] == 3
+    assert stats["cache_misses"] == 4
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from scripts.data_prep import preprocess_csv, preprocess_csv_chunked
+
+
+def test_chunked_pipeline_matches_in_memory(tmp_path):
+    """
+    Тестирует потоковый режим подготовки данных.
+
+    Проверяется, что при разных размерах блоков результат совпадает
+    с обычной обработкой целиком, включая глобальные шаги:
+    удаление дубликатов между блоками, медиану ставки по названию,
+    моду срока и границу последней корзины risk_level.
+    """
+    rng = np.random.default_rng(0)
+    n = 500
+    raw = pd.DataFrame(
+        {
+            "name": rng.choice(["Лучший %", "СберВклад ", " Желание"], n),
+            "rate": rng.uniform(5, 20, n).round(2),
+            "term_months": rng.choice([3, 6, 12, 24, 36], n).astype(float),
+            "min_amount": rng.choice([1000, 10000, 50000], n).astype(float),
+            "can_replenish": rng.choice([True, False], n),
+            "currency": rng.choice(["RUB", "USD", "EUR"], n),
+            "payout_mode": rng.choice(["end", "monthly"], n),
+        }
+    )
+    raw.loc[rng.choice(n, 40, replace=False), "rate"] = np.nan
+    raw.loc[rng.choice(n, 30, replace=False), "term_months"] = np.nan
+    raw.loc[rng.choice(n, 10, replace=False), "currency"] = np.nan
+    raw = pd.concat([raw, raw.sample(60, random_state=1)], ignore_index=True)
+    input_path = tmp_path / "raw.csv"
+    raw.to_csv(input_path, index=False)
+
+    expected = preprocess_csv(str(input_path)).reset_index(drop=True)
+    for chunksize in (37, 128, 10_000):
+        chunks = list(preprocess_csv_chunked(str(input_path), chunksize))
+        result = pd.concat(chunks, ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
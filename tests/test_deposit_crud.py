@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from backend.app.crud.deposit_crud import _prepare_records
+
+
+def test_prepare_records_defaults_and_dedupe():
+    """
+    Тестирует подготовку записей к массовому upsert.
+
+    Проверяется:
+    - недостающие поля заполняются значениями по умолчанию из модели;
+    - при повторе ключа остаётся последняя запись.
+    """
+    base = {"name": "А", "term_months": 3, "min_amount": 1000, "can_replenish": True}
+    records = _prepare_records([dict(base, rate=10.0), dict(base, rate=12.0)])
+    assert len(records) == 1
+    assert records[0]["rate"] == 12.0
+    assert records[0]["currency"] == "RUB"
+    assert records[0]["payout_mode"] == "end"
+
+
+@pytest.mark.parametrize("method", ["insert", "copy"])
+def test_bulk_upsert_counts(pg_url, method):
+    """
+    Тестирует массовый upsert на настоящей PostgreSQL.
+
+    Проверяется:
+    - первый прогон вставляет все записи;
+    - повтор без изменений ничего не перезаписывает;
+    - изменённые ставки учитываются как обновления.
+    """
+    from sqlalchemy import delete
+
+    from backend.app.crud.deposit_crud import bulk_upsert_deposits
+    from backend.app.db.database import async_session, engine
+    from backend.app.db.models import Deposit
+
+    prefix = f"__test_bulk_{method}_"
+    records = [
+        {
+            "name": f"{prefix}{i % 7}",
+            "term_months": i % 5 + 1,
+            "min_amount": float(i),
+            "rate": 5.0,
+            "can_replenish": bool(i % 2),
+        }
+        for i in range(300)
+    ]
+
+    async def scenario():
+        try:
+            async with async_session() as session:
+                first = await bulk_upsert_deposits(
+                    session, records, method=method, chunk_size=64
+                )
+                second = await bulk_upsert_deposits(session, records, method=method)
+                changed = [
+                    dict(r, rate=6.0) if i < 30 else r for i, r in enumerate(records)
+                ]
+                third = await bulk_upsert_deposits(session, changed, method=method)
+                await session.execute(
+                    delete(Deposit).where(Deposit.name.like(f"{prefix}%"))
+                )
+                await session.commit()
+        finally:
+            await engine.dispose()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == {"inserted": 300, "updated": 0, "unchanged": 0}
+    assert second == {"inserted": 0, "updated": 0, "unchanged": 300}
+    assert third == {"inserted": 0, "updated": 30, "unchanged": 270}
+
+
+def test_create_or_update_deposit_uses_bulk_upsert(pg_url):
+    """
+    Тестирует upsert одной записи через bulk_upsert_deposits.
+
+    Проверяется:
+    - новая запись вставляется со значениями по умолчанию;
+    - повтор с другой ставкой обновляет ту же строку по составному ключу;
+    - вклад с тем же названием, но другим сроком — отдельная строка.
+    """
+    from sqlalchemy import delete
+
+    from backend.app.crud.deposit_crud import create_or_update_deposit
+    from backend.app.db.database import async_session, engine
+    from backend.app.db.models import Deposit
+
+    name = "__test_single_upsert"
+    record = {
+        "name": name,
+        "term_months": 6,
+        "min_amount": 1000.0,
+        "rate": 5.0,
+        "can_replenish": True,
+    }
+
+    async def scenario():
+        try:
+            async with async_session() as session:
+                created = await create_or_update_deposit(session, record)
+                created = (created.id, created.rate, created.currency)
+                updated = await create_or_update_deposit(
+                    session, {**record, "rate": 7.0}
+                )
+                updated = (updated.id, updated.rate)
+                other = await create_or_update_deposit(
+                    session, {**record, "term_months": 12}
+                )
+                other = other.id
+                await session.execute(delete(Deposit).where(Deposit.name == name))
+                await session.commit()
+        finally:
+            await engine.dispose()
+        return created, updated, other
+
+    created, updated, other = asyncio.run(scenario())
+    assert created[1:] == (5.0, "RUB")
+    assert updated == (created[0], 7.0)
+    assert other != created[0]
@@ -0,0 +1,112 @@
+
+def test_deposits_keyset_pages_and_etag(pg_url):
+    """
+    Тестирует /deposits на настоящей PostgreSQL.
+
+    Проверяется:
+    - обход страниц по next_cursor выдаёт те же строки, что ORDER BY
+      rate, id в SQL, без пропусков и повторов (включая равные ставки);
+    - фильтры по валюте, сроку, сумме и пополнению;
+    - ETag совпадает с версией каталога, If-None-Match даёт 304,
+      а изменение таблицы увеличивает версию;
+    - повреждённый курсор — 400.
+    """
+    from anyio.from_thread import start_blocking_portal
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete, insert
+
+    from backend.app.db import database
+    from backend.app.db.catalog_version import install_version
+    from backend.app.db.models import Deposit
+    from backend.app.main import app
+
+    prefix = "__test_browse_"
+    # Сроки 900+ месяцев отделяют тестовые строки от настоящего каталога
+    records = [
+        {
+            "name": f"{prefix}{i}",
+            "rate": [5.0, 7.5, 7.5, 3.0, 9.0][i % 5],
+            "term_months": 900 + i % 3,
+            "min_amount": 1000.0 * (i % 4),
+            "can_replenish": bool(i % 2),
+            "currency": ["RUB", "USD", "EUR"][i % 3],
+        }
+        for i in range(23)
+    ]
+    cleanup = delete(Deposit).where(Deposit.name.like(f"{prefix}%"))
+
+    async def execute(*statements):
+        async with database.engine.begin() as conn:
+            await install_version(conn)
+            for statement in statements:
+                await conn.execute(statement)
+
+    def walk(client, order="desc", limit=4, **params):
+        rows, cursor = [], None
+        while True:
+            query = {"term_min": 900, "order": order, "limit": limit, **params}
+            if cursor:
+                query["cursor"] = cursor
+            body = client.get("/deposits", params=query).json()
+            rows += [(item["rate"], item["id"]) for item in body["items"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return rows
+
+    # Один цикл событий на весь тест, чтобы пул asyncpg не переходил
+    # между циклами; lifespan не запускается — снимок каталога не нужен
+    client = TestClient(app)
+    with start_blocking_portal(**client.async_backend) as client.portal:
+        try:
+            client.portal.call(execute, cleanup, insert(Deposit).values(records))
+            first = client.get("/deposits", params={"term_min": 900, "limit": 5})
+            assert first.status_code == 200
+            names = [item["name"] for item in first.json()["items"]]
+            assert len(names) == 5 and all(n.startswith(prefix) for n in names)
+
+            everything = walk(client, order="asc", limit=100)
+            assert len(everything) == len(records)
+            assert walk(client, order="asc") == sorted(everything)
+            assert walk(client) == sorted(everything, reverse=True)
+
+            filtered = walk(
+                client,
+                currency=["USD", "EUR"],
+                term_max=901,
+                amount_min=1000,
+                amount_max=2000,
+                replenishable=True,
+            )
+            expected = [
+                r for r in records
+                if r["currency"] in ("USD", "EUR") and r["term_months"] <= 901
+                and 1000 <= r["min_amount"] <= 2000 and r["can_replenish"]
+            ]
+            assert len(filtered) == len(expected) > 0
+
+            etag = first.headers["ETag"]
+            assert etag == f'"{first.json()["version"]}"'
+            cached = client.get(
+                "/deposits",
+                params={"term_min": 900, "limit": 5},
+                headers={"If-None-Match": etag},
+            )
+            assert cached.status_code == 304
+            assert cached.headers["ETag"] == etag
+
+            client.portal.call(
+                execute, insert(Deposit).values({**records[0], "name": f"{prefix}x"})
+            )
+            fresh = client.get(
+                "/deposits",
+                params={"term_min": 900, "limit": 5},
+                headers={"If-None-Match": etag},
+            )
+            assert fresh.status_code == 200
+            assert fresh.json()["version"] > first.json()["version"]
+
+            bad = client.get("/deposits", params={"cursor": "not-a-cursor"})
+            assert bad.status_code == 400
+        finally:
+            client.portal.call(execute, cleanup)
+            client.portal.call(database.engine.dispose)
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.app.serving.executor import InferenceExecutor, QueueFullError
+
+
+def test_executor_rejects_when_queue_full():
+    """
+    Тестирует ограничение очереди пула инференса.
+
+    Проверяется:
+    - при занятом воркере и нулевой очереди новый запрос получает QueueFullError;
+    - после освобождения воркера запросы снова принимаются.
+    """
+    executor = InferenceExecutor(kind="thread", max_workers=1, max_queue=0)
+
+    async def scenario():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await executor.run(sum, [1, 2])
+        await slow
+        result, queued_ms = await executor.run(sum, [1, 2])
+        return result, queued_ms
+
+    result, queued_ms = asyncio.run(scenario())
+    assert result == 3
+    assert queued_ms >= 0
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+def test_recommend_reports_stage_timings(client):
+    """
+    Тестирует заголовок Server-Timing у /recommend.
+
+    Проверяется, что в ответе есть время ожидания в очереди,
+    фильтрации, отбора выдачи и рендеринга.
+    """
+    response = client.post(
+        "/recommend",
+        data={
+            "amount": 100000,
+            "term_months": 12,
+            "risk_tolerance": "low",
+            "goal": "accumulation",
+        },
+    )
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    for stage in ("queue", "filter", "rank", "render"):
+        assert f"{stage};dur=" in timing
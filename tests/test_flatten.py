@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.parsers.flatten import flatten_columns, flatten_records, key_codes
+
+FIXTURE = (
+    Path(__file__).parent.parent
+    / "backend"
+    / "app"
+    / "parsers"
+    / "data_sber"
+    / "calc_1291.json"
+)
+
+
+def reference_records(data: dict) -> list[dict]:
+    """Прежний цикл: словарь по ключу с заменой на большую ставку"""
+    unique = {}
+    for block in data["valQvbList"]:
+        currency = {643: "RUB", 840: "USD", 978: "EUR"}.get(block["currencyCode"], "RUB")
+        for cs in block["csQvbList"]:
+            for q in cs["qvbList"]:
+                for t in q["dcfTarList"]:
+                    r = {
+                        "name": q.get("depositShortName") or q["depositName"],
+                        "term_months": q.get("begTerm", 0),
+                        "rate": t["rate"],
+                        "can_replenish": bool(q.get("isReplenish", False)),
+                        "min_amount": t["sumBeg"],
+                        "currency": currency,
+                        "payout_mode": "end",
+                    }
+                    key = (r["name"], r["term_months"], "end", r["min_amount"])
+                    if key not in unique or r["rate"] > unique[key]["rate"]:
+                        unique[key] = r
+    return list(unique.values())
+
+
+def test_flatten_matches_loop_on_fixture():
+    """Векторизованная развёртка совпадает с прежним циклом, включая порядок"""
+    data = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    assert flatten_records(data) == reference_records(data)
+
+
+def test_flatten_keeps_first_of_equal_rates():
+    """Из нескольких регионов берётся максимальная ставка, при равенстве — первая"""
+    def payload(rate, replenish):
+        return {
+            "valQvbList": [
+                {
+                    "currencyCode": 810,
+                    "csQvbList": [
+                        {
+                            "qvbList": [
+                                {
+                                    "depositName": "Вклад",
+                                    "begTerm": 6,
+                                    "isReplenish": replenish,
+                                    "dcfTarList": [{"rate": rate, "sumBeg": 1000}],
+                                }
+                            ]
+                        }
+                    ],
+                }
+            ]
+        }
+
+    records = flatten_records(
+        [payload(5.0, True), payload(7.0, False), payload(7.0, True)]
+    )
+    assert records == [
+        {
+            "name": "Вклад",
+            "term_months": 6,
+            "rate": 7.0,
+            "can_replenish": False,
+            "min_amount": 1000,
+            "currency": "RUB",
+            "payout_mode": "end",
+        }
+    ]
+    assert len(flatten_columns([payload(5.0, True)] * 3)["rate"]) == 3
+    assert flatten_records({}) == []
+
+
+def test_key_codes_without_collisions():
+    """
+    Тестирует номера ключей дедупликации.
+
+    Проверяется:
+    - пропуск в колонке ключа — отдельное значение, а не код -1,
+      который совпал бы с соседним ключом (1 * 3 - 1 == 0 * 3 + 2);
+    - одинаковые ключи с пропусками получают один номер;
+    - номера совпадают с факторизацией кортежей ключа.
+    """
+    columns = {
+        "name": np.array(["a", "a", "a", "b", "a", "b"], dtype=object),
+        "term_months": np.full(6, 6),
+        "payout_mode": np.array(["end"] * 6, dtype=object),
+        "min_amount": np.array([3000, 1000, 5000, None, None, None], dtype=object),
+        "rate": np.zeros(6),
+    }
+    # Раньше ("b", None) получал тот же номер, что и ("a", 5000)
+    assert key_codes(columns).tolist() == [0, 1, 2, 3, 4, 3]
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    columns = {
+        "name": rng.choice(["a", "b", "c", None], n).astype(object),
+        "term_months": rng.choice([3, 6, 12], n),
+        "payout_mode": np.array(["end"] * n, dtype=object),
+        "min_amount": rng.choice([1000.0, 5000.0, np.nan], n),
+        "rate": rng.random(n),
+    }
+    keys = list(
+        zip(
+            *(
+                [str(v) for v in columns[col]]
+                for col in ("name", "term_months", "payout_mode", "min_amount")
+            )
+        )
+    )
+    first = {}
+    expected = [first.setdefault(key, len(first)) for key in keys]
+    assert key_codes(columns).tolist() == expected
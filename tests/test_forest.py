@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+from joblib import load
+
+from backend.app.catalog.scoring import FEATURES, ensure_id
+from backend.app.catalog.storage import load_catalog
+from backend.app.serving.forest import (
+    FOREST_SUFFIX,
+    PackedForest,
+    export_forest,
+    forest_source,
+)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "deposit_recommender.joblib"
+CSV_PATH = PROJECT_ROOT / "data" / "clean" / "clean_deposits.csv"
+
+
+def test_packed_forest_matches_sklearn(tmp_path):
+    """
+    Тестирует упакованный лес.
+
+    Проверяется:
+    - вероятности на clean_deposits.csv совпадают с predict_proba sklearn;
+    - порог и признаки переносятся в meta.json;
+    - пустой вход даёт пустой результат нужной формы.
+    """
+    artifact = load(MODEL_PATH)
+    clf = artifact["pipeline"]
+    path = export_forest(clf, tmp_path / "model.npforest", artifact["threshold"])
+    forest = PackedForest(path)
+
+    X = ensure_id(load_catalog(CSV_PATH))[FEATURES]
+    np.testing.assert_allclose(
+        forest.predict_proba(X), clf.predict_proba(X), rtol=0, atol=1e-12
+    )
+    assert forest.threshold == artifact["threshold"]
+    assert forest.features == FEATURES
+    assert forest.predict_proba(X.iloc[:0]).shape == (0, 2)
+
+
+def test_forest_source_checks_model_digest(tmp_path):
+    """
+    Тестирует выбор источника модели.
+
+    Проверяется, что упакованный лес используется, только если он собран
+    из того же .joblib; после замены .joblib сервер читает сам .joblib.
+    """
+    model_path = tmp_path / "model.joblib"
+    shutil.copy(MODEL_PATH, model_path)
+    assert forest_source(model_path) == model_path
+
+    artifact = load(model_path)
+    export_forest(
+        artifact["pipeline"],
+        model_path.with_suffix(FOREST_SUFFIX),
+        artifact["threshold"],
+        source=model_path,
+    )
+    assert forest_source(model_path) == model_path.with_suffix(FOREST_SUFFIX)
+
+    model_path.write_bytes(model_path.read_bytes() + b"\0")
+    assert forest_source(model_path) == model_path
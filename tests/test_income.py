@@ -0,0 +1,140 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.income import IncomeEngine
+from backend.app.catalog.ranking import RankingIndex, preference_key, preference_tier
+
+
+def simulate_income(rate, term, monthly, replenish, months, amount, topup, fx=1.0):
+    """Помесячный расчёт дохода по одному вкладу (эталон для формул)"""
+    r = rate / 1200
+    balance, paid = float(amount), 0.0
+    h = min(term, months)
+    for month in range(1, h + 1):
+        interest = balance * r
+        if monthly:
+            paid += interest
+        else:
+            balance += interest
+        if replenish and month < h:
+            balance += topup
+    invested = amount + (topup * max(h - 1, 0) if replenish else 0)
+    return (balance + paid) * fx ** (h / 12) - invested
+
+
+def catalog(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    term = rng.choice([3, 6, 12, 24, 36], n)
+    currency = rng.integers(0, 3, n)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "rate": rng.choice([0.0, 4.5, 7.5, 10.0, 12.0, 15.0], n),
+            "term_months": term,
+            "can_replenish": rng.integers(0, 2, n),
+            "min_amount": rng.choice([1000, 10000, 100000], n),
+            "currency_RUB": currency == 0,
+            "currency_USD": currency == 1,
+            "payout_mode_monthly": rng.random(n) < 0.5,
+            "probability": rng.random(n).round(1),
+            "risk_level": np.digitize(term, [7, 13, 25]).choose([3, 2, 1, 0]),
+            "goal_accumulation": (term >= 12).astype(int),
+        }
+    )
+
+
+def test_income_matches_monthly_simulation():
+    """
+    Тестирует векторизованный расчёт дохода.
+
+    Проверяется:
+    - доход совпадает с помесячным расчётом для выплаты процентов
+      и капитализации, с пополнением и без, с ростом курса валюты;
+    - при нулевом сроке клиента доход и множители равны нулю (взносов нет);
+    - матрица по многим суммам совпадает с расчётом для каждой суммы.
+    """
+    df = catalog(60)
+    drift = {"USD": 0.05, "EUR": -0.02}
+    engine = IncomeEngine.from_catalog(df, currency_drift=drift)
+    fx = np.select([df["currency_RUB"], df["currency_USD"]], [1.0, 1.05], 0.98)
+
+    for months, amount, topup in itertools.product(
+        [0, 1, 6, 24], [50000], [0, 3000]
+    ):
+        expected = [
+            simulate_income(
+                row.rate,
+                row.term_months,
+                row.payout_mode_monthly,
+                row.can_replenish,
+                months,
+                amount,
+                topup,
+                rate_fx,
+            )
+            for row, rate_fx in zip(df.itertuples(), fx)
+        ]
+        np.testing.assert_allclose(
+            engine.project(amount, months, topup), expected, rtol=1e-9, atol=1e-6
+        )
+
+    principal, topup = engine.factors(0)
+    assert not principal.any() and not topup.any()
+    assert (engine.upper_bound(df["rate"], 50000, 0, 3000) == 0).all()
+
+    amounts = np.array([1000.0, 25000.0, 300000.0])
+    topups = np.array([0.0, 500.0, 10000.0])
+    matrix = engine.project_matrix(amounts, 12, topups)
+    for row, amount, topup in zip(matrix, amounts, topups):
+        np.testing.assert_allclose(row, engine.project(amount, 12, topup))
+
+
+def test_ranking_index_orders_by_income():
+    """
+    Тестирует выдачу по доходу в индексе выдачи.
+
+    Проверяется, что топ-k с sort_by="income" совпадает с фильтрацией
+    и полной сортировкой каталога по (уровень предпочтения, доход,
+    ставка, вероятность) — ранняя остановка по верхней оценке дохода
+    не теряет вкладов.
+    """
+    df = catalog(3000, seed=1)
+    ranking = RankingIndex(df, threshold=0.5)
+    engine = IncomeEngine.from_catalog(df)
+
+    for amount, months, topup, replenish, risk, goal in itertools.product(
+        [20000, 500000],
+        [6, 36],
+        [0, 20000],
+        ["any", "yes"],
+        ["low", None],
+        ["accumulation", None],
+    ):
+        mask = (df["min_amount"] <= amount) & (df["term_months"] <= months)
+        mask &= df["probability"] >= 0.5
+        if replenish == "yes":
+            mask &= df["can_replenish"] == 1
+        tier = preference_tier(
+            df["risk_level"], df["goal_accumulation"], *preference_key(risk, goal)
+        )
+        expected = df.assign(
+            tier=tier,
+            income=engine.project(amount, months, topup),
+            position=np.arange(len(df)),
+        )[mask].sort_values(
+            ["tier", "income", "rate", "probability", "position"],
+            ascending=[True, False, False, False, True],
+        )
+        top = ranking.top(
+            amount,
+            months,
+            replenish,
+            risk,
+            goal,
+            k=11,
+            sort_by="income",
+            monthly_topup=topup,
+        )
+        assert top.tolist() == expected.index[:11].tolist()
@@ -0,0 +1,130 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.income import IncomeEngine
+from backend.app.catalog.index import CandidateIndex
+from backend.app.catalog.ranking import RankingIndex, preference_key, preference_tier
+from backend.app.serving.batch import BatchRanker
+
+
+def test_candidate_index_matches_masks():
+    """
+    Тестирует индекс кандидатов для /recommend.
+
+    Проверяется, что для разных сумм, сроков и режимов пополнения
+    индекс возвращает ровно те же строки и в том же порядке,
+    что и булевы маски по всему DataFrame.
+    """
+    df = pd.DataFrame(
+        {
+            "min_amount": [1000, 50000, 10000, 1000, 300000, 10000],
+            "term_months": [3, 12, 12, 6, 24, 3],
+            "can_replenish": [1, 0, 1, 0, 1, 1],
+        }
+    )
+    index = CandidateIndex(df)
+
+    for amount, term, replenish in itertools.product(
+        [0, 1000, 20000, 1e6], [1, 3, 12, 36], ["any", "yes", "no"]
+    ):
+        mask = (df["min_amount"] <= amount) & (df["term_months"] <= term)
+        if replenish == "yes":
+            mask &= df["can_replenish"] == 1
+        elif replenish == "no":
+            mask &= df["can_replenish"] == 0
+        assert np.array_equal(
+            index.query(amount, term, replenish), np.flatnonzero(mask)
+        )
+
+
+def test_ranking_index_matches_full_sort():
+    """
+    Тестирует индекс выдачи с учётом склонности к риску и цели.
+
+    Проверяется:
+    - топ-k из партиций совпадает с фильтрацией и полной сортировкой
+      каталога по (уровень предпочтения, ставка, вероятность);
+    - без учёта порога (require_passed=False) — то же для всех кандидатов;
+    - пакетный ранжировщик выдаёт тот же порядок вкладов, в том числе
+      по доходу с взносом, и тот же доход на сумму каждого профиля.
+    """
+    rng = np.random.default_rng(0)
+    n = 400
+    term = rng.choice([3, 6, 12, 24, 36], n)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "rate": rng.choice([5.0, 7.5, 10.0, 12.0, 15.0], n),
+            "term_months": term,
+            "can_replenish": rng.integers(0, 2, n),
+            "min_amount": rng.choice([1000, 10000, 100000], n),
+            "probability": rng.random(n).round(1),
+            "risk_level": np.digitize(term, [7, 13, 25]).choose([3, 2, 1, 0]),
+            "goal_accumulation": (term >= 12).astype(int),
+            "payout_mode_monthly": rng.random(n) < 0.5,
+            "currency_RUB": rng.random(n) < 0.7,
+            "currency_USD": False,
+        }
+    )
+    ranking = RankingIndex(df, threshold=0.5)
+    ranker = BatchRanker(df, threshold=0.5)
+
+    profiles = list(
+        itertools.product(
+            [5000, 200000],
+            [6, 24],
+            ["any", "yes", "no"],
+            ["low", "medium", "high", None],
+            ["accumulation", "passive_income", None],
+        )
+    )
+    for amount, term_months, replenish, risk, goal in profiles:
+        mask = (df["min_amount"] <= amount) & (df["term_months"] <= term_months)
+        if replenish != "any":
+            mask &= df["can_replenish"] == (replenish == "yes")
+        max_risk, goal_key = preference_key(risk, goal)
+        tier = preference_tier(
+            df["risk_level"], df["goal_accumulation"], max_risk, goal_key
+        )
+        expected = df.assign(tier=tier, position=np.arange(n)).sort_values(
+            ["tier", "rate", "probability", "position"],
+            ascending=[True, False, False, True],
+        )
+        for require_passed, k in ((True, 11), (False, 5)):
+            selected = expected[mask[expected.index]]
+            if require_passed:
+                selected = selected[selected["probability"] >= 0.5]
+            top = ranking.top(
+                amount, term_months, replenish, risk, goal, k, require_passed
+            )
+            assert top.tolist() == selected.index[:k].tolist()
+
+    keys = ranker.profile_keys(*zip(*profiles))
+    for profile, result in zip(profiles, ranker.rank(keys, 11)):
+        top = ranking.top(*profile, k=11)
+        if not len(top):
+            top = ranking.top(*profile, k=5, require_passed=False)
+        assert [r["id"] for r in result["recommendations"]] == top.tolist()
+
+    engine = IncomeEngine.from_catalog(df)
+    amounts = [amount * 1.5 for amount, *_ in profiles]
+    topups = [amount * 0.1 * (i % 3) for i, amount in enumerate(amounts)]
+    ranked = ranker.rank(keys, 11, "income", amounts, topups)
+    for profile, amount, topup, result in zip(profiles, amounts, topups, ranked):
+        query = (amount, *profile[1:])
+        top = ranking.top(*query, k=11, sort_by="income", monthly_topup=topup)
+        if not len(top):
+            top = ranking.top(
+                *query,
+                k=5,
+                require_passed=False,
+                sort_by="income",
+                monthly_topup=topup,
+            )
+        assert [r["id"] for r in result["recommendations"]] == top.tolist()
+        expected = engine.project(amount, profile[1], topup)[top].round(2)
+        np.testing.assert_allclose(
+            [r["income"] for r in result["recommendations"]], expected
+        )
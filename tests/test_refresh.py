@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from backend.app.jobs.refresh import RefreshJob, RefreshStatus, train_stage
+
+CSV_PATH = Path(__file__).parent.parent / "data" / "clean" / "clean_deposits.csv"
+
+
+def test_train_stage_skips_unchanged_input(tmp_path):
+    """
+    Тестирует пропуск этапа обучения при неизменном каталоге.
+
+    Проверяется:
+    - первый запуск обучает модель и сохраняет артефакт;
+    - повторный запуск с той же контрольной суммой пропускается.
+    """
+    data_path = tmp_path / "clean.csv"
+    model_path = tmp_path / "model.joblib"
+    pd.read_csv(CSV_PATH).head(300).to_csv(data_path, index=False)
+
+    first = train_stage(str(data_path), str(model_path), None)
+    assert first["skipped"] is False
+    assert model_path.exists()
+
+    second = train_stage(str(data_path), str(model_path), first["digest"])
+    assert second["skipped"] is True
+
+
+def test_refresh_rejects_concurrent_start(tmp_path):
+    """
+    Тестирует защиту от одновременного запуска обновления.
+
+    Проверяется:
+    - повторный запуск во время активного обновления отклоняется;
+    - из одновременных запусков из разных потоков проходит ровно один.
+    """
+    job = RefreshJob(
+        RefreshStatus(),
+        table="deposits",
+        clean_path=tmp_path / "clean.csv",
+        model_path=tmp_path / "model.joblib",
+        state_path=tmp_path / "state.json",
+        on_reload=lambda: None,
+    )
+    assert job.try_start() is True
+    assert job.try_start() is False
+
+    job.progress.active = False
+    barrier = threading.Barrier(16)
+
+    def start():
+        barrier.wait()
+        return job.try_start()
+
+    with ThreadPoolExecutor(16) as pool:
+        started = list(pool.map(lambda _: start(), range(16)))
+    assert started.count(True) == 1
@@ -0,0 +1,91 @@
+import shutil
+import time
+from pathlib import Path
+
+from backend.app.serving.registry import SnapshotRegistry
+
+PROJECT_ROOT = Path(__file__).parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "deposit_recommender.joblib"
+CSV_PATH = PROJECT_ROOT / "data" / "clean" / "clean_deposits.csv"
+
+
+def test_reload_swaps_snapshot_atomically(tmp_path):
+    """
+    Тестирует горячую перезагрузку модели и каталога.
+
+    Проверяется:
+    - после изменения CSV реестр собирает новую версию снимка;
+    - ранее выданный снимок остаётся неизменным для запросов «в полёте»;
+    - при сломанном каталоге продолжает работать последняя рабочая версия.
+    """
+    model_path = tmp_path / "model.joblib"
+    csv_path = tmp_path / "clean.csv"
+    shutil.copy(MODEL_PATH, model_path)
+    shutil.copy(CSV_PATH, csv_path)
+
+    registry = SnapshotRegistry(model_path, csv_path)
+    first = registry.reload()
+    assert first.version == 1
+    rows = len(first.catalog)
+
+    # Оставляем в каталоге только первые 100 строк
+    lines = csv_path.read_text(encoding="utf-8").splitlines()
+    csv_path.write_text("\n".join(lines[:101]) + "\n", encoding="utf-8")
+    second = registry.reload()
+    assert second.version == 2
+    assert len(second.catalog) == 100
+    assert len(first.catalog) == rows
+    assert registry.current is second
+
+    # Каталог без нужных признаков не проходит проверку
+    csv_path.write_text("name,rate\nТест,5.0\n", encoding="utf-8")
+    assert registry.reload() is second
+    assert registry.current is second
+    assert "Отсутствуют признаки" in registry.status()["load_error"]
+
+
+def test_shared_snapshot_between_workers(tmp_path):
+    """
+    Тестирует общий для воркеров снимок.
+
+    Проверяется:
+    - первый реестр публикует поколение, второй подключается к нему
+      без повторной сборки и видит ту же версию и те же вероятности;
+    - колонки подключённого каталога отображены в память только для чтения;
+    - после публикации нового поколения второй реестр переходит на него;
+    - при недоступном сегменте снимок собирается в процессе.
+    """
+    model_path = tmp_path / "model.joblib"
+    csv_path = tmp_path / "clean.csv"
+    shutil.copy(MODEL_PATH, model_path)
+    shutil.copy(CSV_PATH, csv_path)
+    shared_dir = tmp_path / "shm"
+
+    loader = SnapshotRegistry(model_path, csv_path, shared_dir)
+    worker = SnapshotRegistry(model_path, csv_path, shared_dir)
+    local = SnapshotRegistry(model_path, csv_path).reload()
+    first = loader.reload()
+    attached = worker.reload()
+    assert first.shared and attached.shared
+    assert attached.version == first.version == 1
+    assert worker.status()["shared"]
+    probability = attached.catalog["probability"].to_numpy()
+    assert not probability.flags.writeable
+    assert (probability == local.catalog["probability"].to_numpy()).all()
+
+    lines = csv_path.read_text(encoding="utf-8").splitlines()
+    csv_path.write_text("\n".join(lines[:101]) + "\n", encoding="utf-8")
+    assert loader.reload().version == 2
+    worker.refresh_if_changed()
+    worker.wait_ready()
+    for _ in range(100):
+        if worker.current.version == 2:
+            break
+        time.sleep(0.05)
+    assert worker.current.version == 2
+    assert len(worker.current.catalog) == 100
+
+    blocked = tmp_path / "not_a_dir"
+    blocked.write_text("")
+    fallback = SnapshotRegistry(model_path, csv_path, blocked).reload()
+    assert fallback is not None and not fallback.shared
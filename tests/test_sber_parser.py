@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from backend.app.parsers.sber_parser import sync_groups
+
+FIXTURES = Path(__file__).parent.parent / "backend" / "app" / "parsers" / "data_sber"
+
+
+@pytest.fixture
+def stub_server(tmp_path):
+    """
+    Локальный HTTP-сервер, отдающий сохранённые calc_<id>.json
+    с ETag и поддержкой If-None-Match (ответ 304).
+    """
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    shutil.copy(FIXTURES / "calc_1291.json", fixtures / "calc_1291.json")
+    shutil.copy(FIXTURES / "calc_1291.json", fixtures / "calc_1292.json")
+    options = {"etag": True}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            group_id = self.path.split("?")[0].rstrip("/").split("/")[-1]
+            path = fixtures / f"calc_{group_id}.json"
+            if not path.exists():
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = path.read_bytes()
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if options["etag"] and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if options["etag"]:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/group", fixtures, options
+    server.shutdown()
+
+
+def test_incremental_sync_offline(stub_server, tmp_path):
+    """
+    Тестирует инкрементальный парсинг нескольких групп на локальной заглушке.
+
+    Проверяется:
+    - первый прогон скачивает все группы и разворачивает тарифы;
+    - повтор получает 304 по ETag и не отдаёт записей;
+    - без ETag неизменённая группа отсекается по хэшу содержимого;
+    - после изменения ставки в одной группе в БД уходит только она;
+    - если запись в БД (apply) упала, кэш группы не обновляется,
+      и следующий прогон снова отдаёт её записи.
+    """
+    base_url, fixtures, options = stub_server
+    cache_dir = tmp_path / "cache"
+
+    def run(groups, apply=None):
+        results = asyncio.run(
+            sync_groups(
+                groups, base_url=base_url, cache_dir=cache_dir, rate=100, apply=apply
+            )
+        )
+        return {r["group_id"]: r for r in results}
+
+    first = run([1291, 1292, 404])
+    assert first[1291]["status"] == "changed"
+    assert first[1292]["status"] == "changed"
+    assert first[404]["status"] == "error"
+    assert len(first[1291]["records"]) > 0
+    assert (cache_dir / "calc_1291.json").exists()
+
+    second = run([1291, 1292])
+    assert {r["status"] for r in second.values()} == {"not_modified"}
+
+    options["etag"] = False
+    third = run([1291, 1292])
+    assert {r["status"] for r in third.values()} == {"unchanged"}
+
+    data = json.loads((fixtures / "calc_1292.json").read_text(encoding="utf-8"))
+    data["valQvbList"][0]["csQvbList"][0]["qvbList"][0]["dcfTarList"][0]["rate"] += 1
+    (fixtures / "calc_1292.json").write_text(json.dumps(data), encoding="utf-8")
+    fourth = run([1291, 1292])
+    assert fourth[1291]["status"] == "unchanged"
+    assert fourth[1292]["status"] == "changed"
+    assert len(fourth[1292]["records"]) == len(first[1292]["records"])
+
+    async def failing_upsert(records):
+        raise RuntimeError("БД недоступна")
+
+    data["valQvbList"][0]["csQvbList"][0]["qvbList"][0]["dcfTarList"][0]["rate"] += 1
+    (fixtures / "calc_1292.json").write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        run([1291, 1292], apply=failing_upsert)
+
+    applied = []
+
+    async def upsert(records):
+        applied.extend(records)
+
+    fifth = run([1291, 1292], apply=upsert)
+    assert fifth[1292]["status"] == "changed"
+    assert len(applied) == len(fifth[1292]["records"])
+    assert run([1291, 1292])[1292]["status"] == "unchanged"
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.catalog.storage import (
+    catalog_source,
+    compact_catalog,
+    load_catalog,
+    memory_report,
+    save_catalog,
+)
+
+
+def test_columnar_catalog_roundtrip(tmp_path):
+    """
+    Тестирует колоночный формат очищенного каталога.
+
+    Проверяется:
+    - после сохранения и загрузки данные совпадают с исходными, а типы
+      колонок — компактные по схеме каталога (название — категория);
+    - числовые колонки и коды названий отображены в память только для чтения;
+    - целые, не помещающиеся в компактный тип, остаются int64;
+    - на повторяющихся названиях каталог занимает меньше памяти;
+    - при наличии колоночной версии рядом с CSV загрузчик выбирает её.
+    """
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "name": ["Лучший %", "СберВклад"],
+            "rate": [18.5, 17.0],
+            "term_months": [6, 12],
+            "can_replenish": [0, 1],
+            "min_amount": [100000, 1000],
+            "currency_RUB": [True, False],
+            "payout_mode_monthly": [False, True],
+            "risk_level": [2, 1],
+            "goal_accumulation": [0, 1],
+        }
+    )
+    csv_path = tmp_path / "clean.csv"
+    df.to_csv(csv_path, index=False)
+    columnar_path = save_catalog(df, tmp_path / "clean.npcat", source=csv_path)
+
+    loaded = load_catalog(columnar_path)
+    pd.testing.assert_frame_equal(loaded, compact_catalog(df))
+    pd.testing.assert_frame_equal(loaded.astype(df.dtypes.to_dict()), df)
+    assert isinstance(loaded["name"].dtype, pd.CategoricalDtype)
+    assert loaded["term_months"].dtype == np.int16
+    assert not loaded["rate"].to_numpy().flags.writeable
+    assert not loaded["name"].cat.codes.to_numpy().flags.writeable
+
+    wide = compact_catalog(df.assign(min_amount=[100000, 2**40]))
+    assert wide["min_amount"].dtype == np.int64
+
+    big = pd.concat([df] * 500, ignore_index=True)
+    report = memory_report(big, compact_catalog(big))
+    name_before, name_after = report["columns"]["name"]
+    assert report["after"] < report["before"] and name_after < name_before
+
+    assert catalog_source(csv_path) == columnar_path
+
+
+def test_stale_columnar_catalog_is_ignored(tmp_path):
+    """
+    Тестирует выбор между CSV и устаревшей колоночной версией.
+
+    Проверяется:
+    - после перезаписи CSV загрузчик читает CSV, а не колоночную версию,
+      собранную из прежнего CSV;
+    - колоночная версия без записанного CSV-источника уступает CSV рядом;
+    - без CSV рядом колоночная версия читается как есть.
+    """
+    df = pd.DataFrame({"id": [1, 2], "name": ["А", "Б"], "rate": [5.0, 6.0]})
+    csv_path = tmp_path / "clean.csv"
+    df.to_csv(csv_path, index=False)
+    columnar_path = save_catalog(df, tmp_path / "clean.npcat", source=csv_path)
+    assert catalog_source(csv_path) == columnar_path
+
+    df.assign(rate=[7.0, 8.0]).to_csv(csv_path, index=False)
+    assert catalog_source(csv_path) == csv_path
+    assert load_catalog(csv_path)["rate"].tolist() == [7.0, 8.0]
+
+    save_catalog(df, columnar_path)
+    assert catalog_source(csv_path) == csv_path
+
+    csv_path.unlink()
+    assert catalog_source(csv_path) == columnar_path
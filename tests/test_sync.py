@@ -0,0 +1,169 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app.jobs.sync import CatalogSync, diff_rows
+from backend.app.serving.registry import SnapshotRegistry
+
+PROJECT_ROOT = Path(__file__).parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "deposit_recommender.joblib"
+CSV_PATH = PROJECT_ROOT / "data" / "clean" / "clean_deposits.csv"
+
+
+def test_patch_snapshot_rescores_changed_rows():
+    """
+    Тестирует встраивание изменённых строк в снимок.
+
+    Проверяется:
+    - diff_rows находит изменённые, новые и удалённые строки,
+      а пропуск на одном месте в обеих версиях изменением не считает;
+    - после patch версия растёт, прежний снимок не меняется;
+    - вероятности изменённых строк совпадают с полной пересборкой,
+      остальные строки переносятся без изменений;
+    - строки с новым набором dummy-колонок отклоняются;
+    - следующая перезагрузка из файлов получает версию выше патча.
+    """
+    registry = SnapshotRegistry(MODEL_PATH, CSV_PATH)
+    first = registry.reload()
+    catalog = first.catalog
+
+    table = catalog.drop(columns="probability")
+    table.loc[[0, 1], "rate"] = [30.0, 0.5]
+    new_row = table.iloc[[2]].assign(id=table["id"].max() + 1, min_amount=1.0)
+    deleted_id = int(table["id"].iloc[3])
+    table = table.drop(index=3)
+    table = pd.concat([table, new_row], ignore_index=True)
+
+    rows, deleted = diff_rows(catalog, table)
+    expected = [*catalog["id"].iloc[:2], new_row["id"].iloc[0]]
+    assert sorted(rows["id"]) == sorted(expected)
+    assert deleted == {deleted_id}
+
+    with_gap = catalog.copy()
+    with_gap.loc[5, "rate"] = np.nan
+    gap_table = table.copy()
+    gap_table.loc[gap_table["id"] == with_gap.loc[5, "id"], "rate"] = np.nan
+    gap_rows, _ = diff_rows(with_gap, gap_table)
+    assert sorted(gap_rows["id"]) == sorted(expected)
+
+    patched = registry.patch(rows, deleted)
+    assert patched.version == 2 and registry.current is patched
+    assert len(first.catalog) == len(catalog)
+    assert len(patched.catalog) == len(catalog)
+    assert deleted_id not in set(patched.catalog["id"])
+
+    rebuilt = SnapshotRegistry(MODEL_PATH, CSV_PATH).reload()
+    full = rebuilt.pipeline.predict_proba(
+        table[list(rebuilt.pipeline.feature_names_in_)]
+    )[:, 1]
+    by_id = patched.catalog.set_index("id")["probability"]
+    np.testing.assert_allclose(by_id.loc[table["id"]].to_numpy(), full)
+    assert patched.catalog["rate"].dtype == catalog["rate"].dtype
+
+    with pytest.raises(ValueError, match="полная пересборка"):
+        registry.patch(rows.assign(currency_EUR=True))
+    assert registry.current is patched
+
+    assert registry.reload().version == 3
+
+
+def test_catalog_sync_applies_notifications(pg_url):
+    """
+    Тестирует синхронизацию каталога с таблицей deposits.
+
+    Проверяется:
+    - триггер отправляет NOTIFY с id вставленной строки;
+    - CatalogSync.apply добавляет строку в каталог снимка с вероятностью
+      модели, а после удаления строки из таблицы убирает её из каталога;
+    - table_stats отдаёт медиану ставки по всей таблице для названий
+      изменённых строк (название очищается как в clean_strings).
+    """
+    from sqlalchemy import delete, insert
+
+    from backend.app.db.database import engine
+    from backend.app.db.models import Deposit
+    from backend.app.db.notify import (
+        CHANNEL,
+        install_trigger,
+        parse_payload,
+        table_stats,
+    )
+
+    registry = SnapshotRegistry(MODEL_PATH, CSV_PATH)
+    registry.reload()
+    sync = CatalogSync(registry)
+    name = "__test_sync_deposit"
+
+    async def notified(statement) -> set[int]:
+        payloads = asyncio.Queue()
+
+        def on_notify(connection, pid, channel, payload):
+            payloads.put_nowait(payload)
+
+        async with engine.connect() as listener:
+            raw = await listener.get_raw_connection()
+            driver = raw.driver_connection
+            await driver.add_listener(CHANNEL, on_notify)
+            async with engine.begin() as conn:
+                await conn.execute(statement)
+            payload = await asyncio.wait_for(payloads.get(), 5)
+            await driver.remove_listener(CHANNEL, on_notify)
+        return parse_payload(payload)
+
+    async def scenario():
+        try:
+            async with engine.begin() as conn:
+                await install_trigger(conn)
+                await conn.execute(delete(Deposit).where(Deposit.name == name))
+            ids = await notified(
+                insert(Deposit).values(
+                    name=name,
+                    rate=25.0,
+                    term_months=12,
+                    min_amount=1000.0,
+                    can_replenish=True,
+                    currency="RUB",
+                    payout_mode="monthly",
+                )
+            )
+            assert len(ids) == 1
+            assert await sync.apply(ids) == 1
+            added = registry.current.catalog.set_index("id").loc[next(iter(ids))]
+
+            async with engine.begin() as conn:
+                await conn.execute(
+                    insert(Deposit).values(
+                        name=f"\u00a0{name} ",
+                        rate=15.0,
+                        term_months=6,
+                        min_amount=1000.0,
+                        can_replenish=False,
+                    )
+                )
+            stats = await table_stats([name])
+            assert stats["rate_medians"].to_dict() == {name: 20.0}
+            async with engine.begin() as conn:
+                await conn.execute(
+                    delete(Deposit).where(Deposit.name == f"\u00a0{name} ")
+                )
+
+            removed = await notified(delete(Deposit).where(Deposit.name == name))
+            assert removed == ids
+            assert await sync.apply(removed) == 1
+            return added, removed
+        finally:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    delete(Deposit).where(Deposit.name.contains(name))
+                )
+            await engine.dispose()
+
+    added, removed = asyncio.run(scenario())
+    assert added["rate"] == 25.0
+    assert 0.0 <= added["probability"] <= 1.0
+    assert registry.current.version == 3
+    assert not registry.current.catalog["id"].isin(removed).any()
+    assert sync.status()["sync_batches"] == 2
@@ -0,0 +1,176 @@
+from backend.app.serving.tiers import TierRouter
+
+
+def test_router_sheds_by_queue_depth_and_p95():
+    """
+    Тестирует выбор уровня обслуживания по нагрузке.
+
+    Проверяется:
+    - по умолчанию сброс выключен: запрос по доходу остаётся по доходу
+      при любой очереди и любых задержках;
+    - без нагрузки запрос обслуживается в запрошенном порядке;
+    - очередь от бюджета переводит выдачу по доходу на выдачу по ставке,
+      а запрос по ставке остаётся по ставке;
+    - p95 не считается, пока в окне меньше min_samples ответов;
+    - p95 ответов за окно сверх бюджета тоже включает дешёвый уровень,
+      когда медленные ответы выходят из окна, а быстрые приходят,
+      запросы возвращаются на полный;
+    - стоимость уровней — медиана времени подбора без ожидания в очереди.
+    """
+    default = TierRouter()
+    for _ in range(50):
+        default.observe("income", queued_ms=10_000.0, compute_ms=1.0)
+    assert default.choose("income", queued=10_000) == "income"
+
+    now = [0.0]
+    router = TierRouter(
+        queue_budget=4,
+        p95_budget_ms=50,
+        window_s=10,
+        min_samples=5,
+        clock=lambda: now[0],
+    )
+    assert router.choose("income", queued=0) == "income"
+    assert router.choose("rate", queued=0) == "rate"
+    assert router.choose("income", queued=4) == "rate"
+    assert router.choose("income", queued=100) == "rate"
+
+    for _ in range(4):
+        router.observe("income", queued_ms=58.0, compute_ms=2.0)
+    assert router.p95() is None
+    assert router.choose("income", queued=0) == "income"
+    router.observe("income", queued_ms=58.0, compute_ms=2.0)
+    assert router.p95() == 60.0
+    assert router.choose("income", queued=0) == "rate"
+    now[0] = 11.0
+    for _ in range(20):
+        router.observe("rate", queued_ms=0.0, compute_ms=1.0)
+    assert router.choose("income", queued=0) == "income"
+    assert router.stats()["recent_p95_ms"] == 1.0
+    assert router.costs() == {"income": 2.0, "rate": 1.0}
+
+
+def test_router_window_is_time_bounded():
+    """
+    Тестирует окно p95 по времени.
+
+    Проверяется:
+    - медленные ответы (холодный старт) переводят на дешёвый уровень,
+      пока они в окне;
+    - через window_s секунд без запросов они выпадают из окна,
+      и запрос снова обслуживается по доходу.
+    """
+    now = [0.0]
+    router = TierRouter(
+        p95_budget_ms=50, window_s=10, min_samples=3, clock=lambda: now[0]
+    )
+    for _ in range(3):
+        router.observe("income", queued_ms=900.0, compute_ms=5.0)
+    now[0] = 9.0
+    assert router.choose("income", queued=0) == "rate"
+    now[0] = 10.5
+    assert router.p95() is None
+    assert router.choose("income", queued=0) == "income"
+    assert router.stats()["shed_window_s"] == 10
+
+
+def test_worker_marks_first_response_cold(monkeypatch):
+    """
+    Тестирует отметку первого ответа процесса-воркера.
+
+    Проверяется:
+    - первый ответ воркера помечен cold (в его ожидание вошёл запуск
+      процесса), последующие — нет.
+    """
+    from types import SimpleNamespace
+
+    from backend.app.serving import executor
+
+    registry = SimpleNamespace(current=None, refresh_if_changed=lambda: None)
+    monkeypatch.setattr(executor, "_worker_warm", False)
+    monkeypatch.setattr(executor, "_worker_registry", registry)
+    monkeypatch.setattr(
+        executor, "compute_recommendations", lambda snapshot, *args: {}
+    )
+    args = (100_000, 12, "any")
+    assert executor.recommend_in_worker(*args).get("cold") is True
+    assert "cold" not in executor.recommend_in_worker(*args)
+
+
+def test_recommend_sheds_to_rate_order(client):
+    """
+    Тестирует дешёвый уровень /recommend под нагрузкой.
+
+    Проверяется:
+    - по умолчанию сброс выключен (оба бюджета 0);
+    - без нагрузки ответ обслуживается по доходу (X-Recommend-Tier);
+    - при p95 сверх бюджета — по ставке, страница сообщает об этом
+      предупреждением и строкой порядка, а таблица совпадает
+      с явным запросом sort_by=rate;
+    - дешёвый уровень действительно дешевле: медиана этапа rank
+      по ставке меньше, чем по доходу, на одних и тех же профилях;
+    - уровень виден в /metrics.
+    """
+    from statistics import median
+
+    from backend.app import main
+    from backend.app.serving.recommend import compute_recommendations
+
+    form = {
+        "amount": 100000,
+        "term_months": 12,
+        "risk_tolerance": "low",
+        "goal": "accumulation",
+    }
+    router = main.tier_router
+    assert router.queue_budget == 0
+    assert router.p95_budget_ms == 0
+    budget, min_samples = router.p95_budget_ms, router.min_samples
+    try:
+        router._latencies.clear()
+        full = client.post("/recommend", data=form)
+        assert full.headers["X-Recommend-Tier"] == "income"
+        assert "Сервис под нагрузкой" not in full.text
+        assert "Порядок: по доходу за срок" in full.text
+
+        router.p95_budget_ms = 1e-6
+        router.min_samples = 1
+        router.observe("income", 0.0, 1.0)
+        # Другой срок — другой ключ кэша, ответ считается заново
+        shed = client.post("/recommend", data={**form, "term_months": 24})
+        assert shed.status_code == 200
+        assert shed.headers["X-Recommend-Tier"] == "rate"
+        assert "Сервис под нагрузкой" in shed.text
+        assert "Порядок: по ставке (упрощённый из-за нагрузки)" in shed.text
+    finally:
+        router.p95_budget_ms, router.min_samples = budget, min_samples
+        router._latencies.clear()
+
+    explicit = client.post(
+        "/recommend", data={**form, "term_months": 24, "sort_by": "rate"}
+    )
+    assert explicit.headers["X-Recommend-Tier"] == "rate"
+    assert "Сервис под нагрузкой" not in explicit.text
+    assert "Порядок: по ставке\n" in explicit.text
+    assert explicit.text.split("</p>")[-1] == shed.text.split("</p>")[-1]
+
+    snapshot = main.registry.current
+    profiles = [
+        (amount, term, replenish, risk, goal)
+        for amount in (10_000, 100_000, 1_000_000)
+        for term in (6, 12, 24, 36)
+        for replenish in ("any", "yes")
+        for risk in ("low", "high")
+        for goal in ("accumulation", "passive_income")
+    ]
+    rank_ms = {}
+    for sort_by in ("income", "rate"):
+        rank_ms[sort_by] = median(
+            compute_recommendations(snapshot, *p, 0.0, sort_by)["timings"]["rank"]
+            for p in profiles
+        )
+    assert rank_ms["rate"] < rank_ms["income"]
+
+    body = client.get("/metrics").text
+    assert 'deposit_recommend_tier_total{tier="rate"}' in body
+    assert 'deposit_recommend_tier_cost_ms{tier="income"}' in body